@@ -0,0 +1,54 @@
+"""
+Memory and speed of a `SectionTable` document against a list of sections.
+
+The text is allocated before measuring: a columnar document shares it, while a
+list document copies every section's content into its own string.
+
+Run from the repository root::
+
+    python benchmarks/bench_columnar.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import mixed  # noqa: E402
+from mdslice import from_text  # noqa: E402
+
+
+def main(n_lines: int = 1_000_000, repeat: int = 3) -> None:
+    text = "".join(mixed(n_lines))
+    print(f"{len(text) / 2**20:.1f} MB of text, {n_lines:,d} lines")
+    for columnar in (False, True):
+        gc.collect()
+        tracemalloc.start()
+        doc = from_text(text, columnar=columnar)
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        n_sections = len(doc.sections)
+        label = "columnar" if columnar else "list"
+        print(
+            f"{label:9s} {n_sections:>9,d} sections  {held / 2**20:7.1f} MiB held  "
+            f"{held / n_sections:6.1f} bytes/section"
+        )
+        for name, run in (
+            ("parse", lambda: from_text(text, columnar=columnar)),
+            ("headers", doc.headers),
+            ("to_dict", doc.to_dict),
+            ("iterate", lambda: sum(1 for _ in doc.sections)),
+        ):
+            best = min(timeit.repeat(run, number=1, repeat=repeat))
+            print(f"          {name:8s} {best * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,82 @@
+"""
+Memory held by a corpus of READMEs sharing boilerplate, with and without a
+`ContentPool`, and the pool's hit rate.
+
+The pool itself costs about 100 bytes per remembered content, so it pays off when
+the repeated contents outweigh the unique ones; the memory held once the pool has
+been dropped shows the documents alone.
+
+Run from the repository root::
+
+    python benchmarks/bench_content_pool.py [n_docs]
+"""
+
+from __future__ import annotations
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import _sentence  # noqa: E402
+from mdslice import ContentPool, from_text  # noqa: E402
+
+BOILERPLATE = [
+    "![build](https://ci.example.com/badge.svg)\n",
+    "![coverage](https://cov.example.com/badge.svg)\n",
+    "## License\n",
+    "Released under the MIT license. See LICENSE for details.\n",
+    "> Contributions are welcome, please read CONTRIBUTING.md first.\n",
+    "```bash\npip install package\n```\n",
+]
+
+
+def readmes(n_docs: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    docs = []
+    for i in range(n_docs):
+        parts = [f"# Project {i}\n", "\n"]
+        for block in BOILERPLATE:
+            if rng.random() < 0.8:
+                parts.extend((block, "\n"))
+        for _ in range(rng.randint(1, 3)):
+            parts.extend((_sentence(rng), "\n\n"))
+        docs.append("".join(parts))
+    return docs
+
+
+def measure(texts: List[str], pool: Optional[ContentPool]) -> None:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    docs = [from_text(text, pool=pool) for text in texts]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    label = "no pool" if pool is None else "pool"
+    print(f"{label:8s} {held / 2**20:8.1f} MiB held  {elapsed:6.2f} s (traced)")
+    if pool is not None:
+        print(f"         {pool!r}")
+        pool.clear()
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+        print(f"         {held / 2**20:8.1f} MiB held by the documents alone")
+    tracemalloc.stop()
+    del docs
+
+
+def main(n_docs: int = 20_000) -> None:
+    texts = readmes(n_docs)
+    print(f"{n_docs:,d} documents")
+    measure(texts, None)
+    measure(texts, ContentPool())
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,56 @@
+"""
+Parse time and peak RSS of `parse_markdown_file` in each parse mode.
+
+Every mode runs in a fresh interpreter so peak RSS is not shared between them.
+Run from the repository root::
+
+    python benchmarks/bench_file_modes.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import mixed  # noqa: E402
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+
+_CHILD = """
+import resource, sys, time
+sys.path.insert(0, {src!r})
+from mdslice import parse_markdown_file
+start = time.perf_counter()
+doc = parse_markdown_file({path!r}, mode={mode!r})
+titles = [s.content for s in doc.headers()]
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(len(doc.sections), elapsed, rss)
+doc.close()
+"""
+
+
+def main(n_lines: int = 2_000_000) -> None:
+    with tempfile.TemporaryDirectory() as td:
+        path = Path(td) / "corpus.md"
+        path.write_text("".join(mixed(n_lines)), encoding="utf-8")
+        size_mb = path.stat().st_size / 2**20
+        print(f"{size_mb:.1f} MB, {n_lines:,d} lines")
+        for mode in ("text", "bytes", "mmap"):
+            code = _CHILD.format(src=SRC, path=str(path), mode=mode)
+            out = subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, check=True
+            ).stdout.split()
+            n_sections, elapsed, rss_kb = int(out[0]), float(out[1]), int(out[2])
+            print(
+                f"{mode:6s} {n_sections:>9,d} sections  {elapsed * 1e3:8.1f} ms  "
+                f"peak RSS {rss_kb / 1024:8.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,44 @@
+"""
+Cost of handing a document to another thread: a defensive `copy.deepcopy`
+against a `freeze` snapshot, which copies no content and can be shared as is.
+
+Run from the repository root::
+
+    python benchmarks/bench_freeze.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import copy
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import mixed  # noqa: E402
+from mdslice import from_text  # noqa: E402
+
+
+def main(n_lines: int = 200_000, repeat: int = 3) -> None:
+    doc = from_text("".join(mixed(n_lines)))
+    frozen = doc.freeze()
+    print(f"{n_lines:,d} lines, {len(doc.sections):,d} sections")
+
+    def first_hash():
+        return hash(doc.freeze())
+
+    for name, run in (
+        ("deepcopy(document)", lambda: copy.deepcopy(doc)),
+        ("document.freeze()", doc.freeze),
+        ("deepcopy(snapshot)", lambda: copy.deepcopy(frozen)),
+        ("freeze + first hash", first_hash),
+        ("cached hash", lambda: hash(frozen)),
+    ):
+        best = min(timeit.repeat(run, number=1, repeat=repeat))
+        print(f"{name:20s} {best * 1e3:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,71 @@
+"""
+Keyword queries over a corpus: scanning every section for the query terms
+against a saved `FullTextIndex`, plus the cost of building, saving and opening
+the index.
+
+Run from the repository root::
+
+    python benchmarks/bench_fulltext.py [n_documents]
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import paragraph_heavy  # noqa: E402
+from mdslice import FullTextIndex, from_text  # noqa: E402
+from mdslice.fulltext import _tokenize  # noqa: E402
+
+QUERIES = ("fence depth", "quote image token", "markdown")
+
+
+def scan(docs, query):
+    # Sections holding any query term, without ranking them
+    terms = set(_tokenize(query))
+    return [
+        (doc.path, i)
+        for doc in docs
+        for i, section in enumerate(doc.sections)
+        if terms.intersection(_tokenize(section.content))
+    ]
+
+
+def main(n_documents: int = 200, n_lines: int = 2_000, number: int = 5) -> None:
+    docs = []
+    for seed in range(n_documents):
+        doc = from_text("".join(paragraph_heavy(n_lines, seed=seed)))
+        doc.path = Path(f"doc{seed}.md")
+        docs.append(doc)
+    n_sections = sum(len(doc.sections) for doc in docs)
+    print(f"{n_documents:,d} documents, {n_sections:,d} sections")
+
+    with tempfile.TemporaryDirectory() as td:
+        index_path = Path(td) / "corpus.idx"
+        index = FullTextIndex()
+        build = timeit.timeit(lambda: [index.add(doc) for doc in docs], number=1)
+        save = timeit.timeit(lambda: index.save(index_path), number=1)
+        index.close()
+        size = index_path.stat().st_size
+        print(f"build {build:.2f} s  save {save:.2f} s  file {size / 2**20:.1f} MiB")
+        opened = timeit.timeit(lambda: FullTextIndex(index_path).close(), number=number)
+        print(f"open {opened / number * 1e3:.2f} ms")
+
+        with FullTextIndex(index_path) as index:
+            for query in QUERIES:
+                scanned = timeit.timeit(lambda: scan(docs, query), number=1)
+                ranked = timeit.timeit(lambda: index.search(query), number=number)
+                print(
+                    f"{query:18s} {len(scan(docs, query)):>8,d} sections  "
+                    f"scan {scanned * 1e3:8.1f} ms  "
+                    f"index top 10 {ranked / number * 1e3:7.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,60 @@
+"""
+A table of contents endpoint calling `headers` with several depth ranges on the
+same document: filtering every section on each call against the depth-bucketed
+header index.
+
+Run from the repository root::
+
+    python benchmarks/bench_headers.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import mixed, paragraph_heavy  # noqa: E402
+from mdslice import SectionType, from_text  # noqa: E402
+
+RANGES = ((1, 1), (1, 2), (2, 3), (None, None))
+
+
+def _scan_headers(doc, min_depth, max_depth):
+    # What `headers` did before the index: up to three passes per call
+    result = [s for s in doc.sections if s.type == SectionType.HEADER]
+    if min_depth is not None:
+        result = [s for s in result if s.depth >= min_depth]
+    if max_depth is not None:
+        result = [s for s in result if s.depth <= max_depth]
+    return result
+
+
+def main(n_lines: int = 1_000_000, number: int = 10) -> None:
+    # Level 2 headers from one corpus, level 1 headers from the other
+    lines = paragraph_heavy(n_lines // 2) + ["\n"] + mixed(n_lines // 2)
+    doc = from_text("".join(lines))
+    print(f"{n_lines:,d} lines, {len(doc.sections):,d} sections")
+    first = timeit.timeit(doc.headers, number=1)
+    print(f"first call, building the index: {first * 1e3:.1f} ms")
+    for min_depth, max_depth in RANGES:
+        assert doc.headers(min_depth, max_depth) == _scan_headers(
+            doc, min_depth, max_depth
+        )
+        scan = timeit.timeit(
+            lambda: _scan_headers(doc, min_depth, max_depth), number=number
+        )
+        indexed = timeit.timeit(
+            lambda: doc.headers(min_depth, max_depth), number=number
+        )
+        print(
+            f"depths {min_depth}..{max_depth}  scan {scan / number * 1e3:7.2f} ms  "
+            f"indexed {indexed / number * 1e3:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
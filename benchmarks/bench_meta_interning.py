@@ -0,0 +1,60 @@
+"""
+Memory held by code block metadata, with interned meta mappings and with a fresh
+dictionary per block as before.
+
+Run from the repository root::
+
+    python benchmarks/bench_meta_interning.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import code_heavy  # noqa: E402
+from mdslice import SectionType, from_text  # noqa: E402
+from mdslice import parser  # noqa: E402
+
+
+def fresh_meta(sec_type, code_lang):
+    return {"lang": code_lang} if sec_type == SectionType.CODE and code_lang else None
+
+
+def measure(text: str, columnar: bool) -> int:
+    gc.collect()
+    tracemalloc.start()
+    doc = from_text(text, columnar=columnar)
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del doc
+    return held
+
+
+def main(n_lines: int = 1_000_000) -> None:
+    text = "".join(code_heavy(n_lines))
+    doc = from_text(text)
+    n_meta = sum(1 for s in doc.sections if s.meta is not None)
+    print(f"{n_lines:,d} lines, {len(doc.sections):,d} sections, {n_meta:,d} with meta")
+    del doc
+    for columnar in (False, True):
+        with mock.patch.object(parser, "_code_meta", fresh_meta):
+            before = measure(text, columnar)
+        after = measure(text, columnar)
+        label = "columnar" if columnar else "list"
+        print(
+            f"{label:9s} fresh dicts {before / 2**20:7.1f} MiB  "
+            f"interned {after / 2**20:7.1f} MiB  "
+            f"saved {(before - after) / n_meta:6.1f} bytes/block"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
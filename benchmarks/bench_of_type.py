@@ -0,0 +1,42 @@
+"""
+Repeated type-filtered queries on one document: a list comprehension over all
+sections against `of_type`, which answers from a per-type position index.
+
+Run from the repository root::
+
+    python benchmarks/bench_of_type.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import paragraph_heavy  # noqa: E402
+from mdslice import SectionType, from_text  # noqa: E402
+
+
+def main(n_lines: int = 1_000_000, number: int = 20) -> None:
+    doc = from_text("".join(paragraph_heavy(n_lines)))
+    print(f"{n_lines:,d} lines, {len(doc.sections):,d} sections")
+    first = timeit.timeit(lambda: doc.of_type(SectionType.HEADER), number=1)
+    print(f"first call, building the index: {first * 1e3:.1f} ms")
+    for types in ((SectionType.HEADER,), (SectionType.HEADER, SectionType.LIST)):
+        names = "+".join(t.name for t in types)
+        scan = timeit.timeit(
+            lambda: [s for s in doc.sections if s.type in types], number=number
+        )
+        indexed = timeit.timeit(lambda: doc.of_type(*types), number=number)
+        print(
+            f"{names:12s} {len(doc.of_type(*types)):>8,d} matches  "
+            f"scan {scan / number * 1e3:7.2f} ms  "
+            f"of_type {indexed / number * 1e3:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
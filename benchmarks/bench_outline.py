@@ -0,0 +1,54 @@
+"""
+Finding the sections under every header of a long manual: locating each header
+among the sections and scanning forward from it, against one `outline` pass.
+
+Run from the repository root::
+
+    python benchmarks/bench_outline.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import paragraph_heavy  # noqa: E402
+from mdslice import SectionType, from_text  # noqa: E402
+
+
+def _rescan(doc):
+    # For each header rendered, find it among the sections, then scan forward
+    # to the next header of the same or a smaller depth
+    sections = doc.sections
+    ranges = []
+    for header in doc.headers():
+        start = next(i for i, s in enumerate(sections) if s is header)
+        end = start + 1
+        while end < len(sections) and not (
+            sections[end].type == SectionType.HEADER
+            and sections[end].depth <= header.depth
+        ):
+            end += 1
+        ranges.append((start, end))
+    return ranges
+
+
+def _outline(doc):
+    return [(node.start, node.end) for node in doc.outline().walk()][1:]
+
+
+def main(n_lines: int = 20_000) -> None:
+    doc = from_text("# Manual\n\n" + "".join(paragraph_heavy(n_lines)))
+    print(f"{n_lines:,d} lines, {len(doc.sections):,d} sections")
+    assert _rescan(doc) == _outline(doc)
+    for name, run in (("rescan", _rescan), ("outline", _outline)):
+        best = min(timeit.repeat(lambda: run(doc), number=1, repeat=3))
+        print(f"{name:8s} {best * 1e3:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
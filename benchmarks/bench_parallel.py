@@ -0,0 +1,44 @@
+"""
+Speedup of `parse_markdown_file(..., workers=N)` over a single-process parse.
+
+Run from the repository root::
+
+    python benchmarks/bench_parallel.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import mixed  # noqa: E402
+from mdslice import parse_markdown_file  # noqa: E402
+
+
+def main(n_lines: int = 2_000_000) -> None:
+    with tempfile.TemporaryDirectory() as td:
+        path = Path(td) / "corpus.md"
+        path.write_text("".join(mixed(n_lines)), encoding="utf-8")
+        print(f"{path.stat().st_size / 2**20:.1f} MB, {n_lines:,d} lines")
+        baseline = None
+        cpus = os.cpu_count() or 1
+        counts = sorted({n for n in (2, 4, 8, 16, 32, cpus) if 1 < n <= cpus})
+        for workers in [None, *counts]:
+            start = time.perf_counter()
+            doc = parse_markdown_file(path, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(
+                f"workers={str(workers):4s} {len(doc.sections):>9,d} sections  "
+                f"{elapsed * 1e3:8.1f} ms  speedup {baseline / elapsed:5.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
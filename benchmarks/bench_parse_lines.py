@@ -0,0 +1,37 @@
+"""
+Throughput of `parse_lines` on paragraph-heavy and list-heavy corpora.
+
+Run from the repository root::
+
+    python benchmarks/bench_parse_lines.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import list_heavy, mixed, paragraph_heavy  # noqa: E402
+from mdslice.parser import parse_lines  # noqa: E402
+
+
+def main(n_lines: int = 200_000, repeat: int = 5) -> None:
+    for name, factory in (
+        ("paragraph-heavy", paragraph_heavy),
+        ("list-heavy", list_heavy),
+        ("mixed", mixed),
+    ):
+        lines = factory(n_lines)
+        best = min(timeit.repeat(lambda: parse_lines(lines), number=1, repeat=repeat))
+        print(
+            f"{name:16s} {len(lines):>9,d} lines  {best * 1e3:8.1f} ms  "
+            f"{len(lines) / best / 1e6:6.2f} M lines/s"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
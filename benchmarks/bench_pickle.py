@@ -0,0 +1,65 @@
+"""
+Pickle round trip of a `MarkdownDocument` against its list of sections.
+
+A list pickles every `ParsedSection` and its meta one object at a time, which
+is what returning sections from a process pool used to cost. A document pickles
+its sections as a few columnar buffers, in band or, with protocol 5 and a
+buffer_callback, out of band.
+
+Run from the repository root::
+
+    python benchmarks/bench_pickle.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import pickle
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import mixed  # noqa: E402
+from mdslice import from_text  # noqa: E402
+
+
+def _round_trip(obj, protocol, out_of_band=False):
+    if not out_of_band:
+        return pickle.loads(pickle.dumps(obj, protocol=protocol))
+    buffers = []
+    data = pickle.dumps(obj, protocol=protocol, buffer_callback=buffers.append)
+    return pickle.loads(data, buffers=buffers)
+
+
+def main(n_lines: int = 1_000_000, repeat: int = 3) -> None:
+    text = "".join(mixed(n_lines))
+    doc = from_text(text)
+    columnar = from_text(text, columnar=True)
+    n_sections = len(doc.sections)
+    print(f"{len(text) / 2**20:.1f} MB of text, {n_sections:,d} sections")
+    cases = (
+        ("list of sections", doc.sections, pickle.HIGHEST_PROTOCOL, False),
+        ("document, protocol 4", doc, 4, False),
+        ("document, protocol 5", doc, 5, False),
+        ("document, out of band", doc, 5, True),
+        ("columnar, out of band", columnar, 5, True),
+    )
+    baseline = None
+    for label, obj, protocol, out_of_band in cases:
+        size = len(pickle.dumps(obj, protocol=protocol))
+        best = min(
+            timeit.repeat(
+                lambda: _round_trip(obj, protocol, out_of_band), number=1, repeat=repeat
+            )
+        )
+        baseline = baseline or best
+        print(
+            f"{label:22s} {best * 1e3:8.1f} ms  {n_sections / best / 1e6:5.2f} "
+            f"M sections/s  {size / 2**20:6.1f} MiB  speedup {baseline / best:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,50 @@
+"""
+Outline extraction: `scan_headers` against `parse_markdown_file` + `headers()`.
+
+Run from the repository root::
+
+    python benchmarks/bench_scan_headers.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import list_heavy, mixed, paragraph_heavy  # noqa: E402
+from mdslice import SectionType, parse_markdown_file, scan_headers  # noqa: E402
+
+
+def main(n_lines: int = 200_000, repeat: int = 5) -> None:
+    with tempfile.TemporaryDirectory() as td:
+        path = Path(td) / "corpus.md"
+        for name, factory in (
+            ("paragraph-heavy", paragraph_heavy),
+            ("list-heavy", list_heavy),
+            ("mixed", mixed),
+        ):
+            path.write_text("".join(factory(n_lines)), encoding="utf-8")
+            headers = scan_headers(path)
+            assert headers == parse_markdown_file(path).headers()
+            for label, run in (
+                ("full parse", lambda: parse_markdown_file(path).headers()),
+                (
+                    "include=HEADER",
+                    lambda: parse_markdown_file(path, include={SectionType.HEADER}),
+                ),
+                ("scan_headers", lambda: scan_headers(path)),
+            ):
+                best = min(timeit.repeat(run, number=1, repeat=repeat))
+                print(
+                    f"{name:16s} {label:15s} {len(headers):>7,d} headers  "
+                    f"{best * 1e3:8.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,51 @@
+"""
+Regex search over one document: a per-section ``re.finditer`` loop against
+`search`, which runs the pattern once over a buffer of every section's content.
+
+Run from the repository root::
+
+    python benchmarks/bench_search.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import paragraph_heavy  # noqa: E402
+from mdslice import from_text  # noqa: E402
+
+
+def per_section(doc, regex):
+    return [
+        (i, match.span())
+        for i, section in enumerate(doc.sections)
+        for match in regex.finditer(section.content)
+    ]
+
+
+def main(n_lines: int = 1_000_000, number: int = 5) -> None:
+    doc = from_text("".join(paragraph_heavy(n_lines)))
+    print(f"{n_lines:,d} lines, {len(doc.sections):,d} sections")
+    first = timeit.timeit(lambda: list(doc.search("x")), number=1)
+    print(f"first call, building the buffer: {first * 1e3:.1f} ms")
+    for pattern in (r"quote image", r"\bfence\b", r"zzz"):
+        regex = re.compile(pattern)
+        found = [(i, span) for i, span, _ in doc.search(regex)]
+        assert found == per_section(doc, regex)
+        loop = timeit.timeit(lambda: per_section(doc, regex), number=number)
+        single = timeit.timeit(lambda: list(doc.search(regex)), number=number)
+        print(
+            f"{pattern:14s} {len(found):>8,d} matches  "
+            f"per section {loop / number * 1e3:7.1f} ms  "
+            f"search {single / number * 1e3:7.1f} ms  ({loop / single:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
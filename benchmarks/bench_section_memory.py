@@ -0,0 +1,70 @@
+"""
+Memory held per section, with the slotted `ParsedSection` and with the plain
+``@dataclass`` layout it replaced.
+
+The mixed corpus is repeated lazily until the wanted number of sections has been
+parsed, and the memory still allocated once they are collected in a list is
+measured with tracemalloc. Content strings are the same for both layouts, so the
+difference is the per-object overhead.
+
+Run from the repository root::
+
+    python benchmarks/bench_section_memory.py [n_sections]
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from itertools import cycle, islice
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import mixed  # noqa: E402
+from mdslice.models import ParsedSection, SectionType  # noqa: E402
+from mdslice.parser import _LineParser  # noqa: E402
+
+
+@dataclass
+class DictSection:
+    """The previous `ParsedSection` layout, with a per-instance __dict__."""
+
+    type: SectionType
+    content: str
+    depth: int = 0
+    meta: Optional[Dict[str, Any]] = None
+
+
+def measure(make_section: Any, n_sections: int) -> int:
+    lines = mixed(1_000)
+    gc.collect()
+    tracemalloc.start()
+    parser = _LineParser(make_section=make_section)
+    sections = list(islice(parser.feed(cycle(lines)), n_sections))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(sections) == n_sections
+    return current
+
+
+def main(n_sections: int = 1_000_000) -> None:
+    results = {}
+    for name, factory in (("dataclass", DictSection), ("slotted", ParsedSection)):
+        results[name] = measure(factory, n_sections)
+        print(
+            f"{name:10s} {n_sections:>10,d} sections  "
+            f"{results[name] / 2**20:8.1f} MiB  "
+            f"{results[name] / n_sections:6.1f} bytes/section"
+        )
+    saved = results["dataclass"] - results["slotted"]
+    print(f"saved      {saved / n_sections:6.1f} bytes/section")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,98 @@
+"""
+Running the same selectors against many documents: Python predicates tested on
+every section, tracking the enclosing headers, against compiled selectors
+answered from the type, depth and outline indexes.
+
+Run from the repository root::
+
+    python benchmarks/bench_selectors.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import mixed  # noqa: E402
+from mdslice import SectionType, compile_selector, from_text  # noqa: E402
+
+H, CODE, TABLE, QUOTE, IMAGE = (
+    SectionType.HEADER,
+    SectionType.CODE,
+    SectionType.TABLE,
+    SectionType.QUOTE,
+    SectionType.IMAGE,
+)
+
+
+def _lang(section):
+    return section.meta and section.meta.get("lang")
+
+
+# Each selector with the predicate on (section, enclosing headers) it stands for
+QUERIES = {
+    "h1..h2": lambda s, up: s.type == H and s.depth <= 2,
+    "h2 > code[lang=python]": lambda s, up: (
+        s.type == CODE and _lang(s) == "python" and up and up[-1].depth == 2
+    ),
+    'table:under("Install")': lambda s, up: (
+        s.type == TABLE and any(h.content == "Install" for h in up)
+    ),
+    "h1 quote": lambda s, up: s.type == QUOTE and any(h.depth == 1 for h in up),
+    "code[lang=bash], image": lambda s, up: (
+        (s.type == CODE and _lang(s) == "bash") or s.type == IMAGE
+    ),
+}
+
+
+def corpus(n_lines):
+    # Every other header becomes an h2, and every tenth is titled "Install"
+    lines = mixed(n_lines)
+    n_headers = 0
+    for i, line in enumerate(lines):
+        if line.startswith("# "):
+            if n_headers % 10 == 0:
+                line = "# Install\n"
+            lines[i] = "#" * (1 + n_headers % 2) + line[1:]
+            n_headers += 1
+    return "".join(lines)
+
+
+def scan(doc, predicate):
+    matches = []
+    enclosing = []
+    for section in doc.sections:
+        if section.type == H:
+            while enclosing and enclosing[-1].depth >= section.depth:
+                enclosing.pop()
+        if predicate(section, enclosing):
+            matches.append(section)
+        if section.type == H:
+            enclosing.append(section)
+    return matches
+
+
+def main(n_lines: int = 500_000, number: int = 5) -> None:
+    doc = from_text(corpus(n_lines))
+    print(f"{n_lines:,d} lines, {len(doc.sections):,d} sections")
+    first = timeit.timeit(lambda: doc.select("h1 quote"), number=1)
+    print(f"first call, building the indexes: {first * 1e3:.1f} ms")
+    for text, predicate in QUERIES.items():
+        selector = compile_selector(text)
+        found = selector.select(doc)
+        assert found == scan(doc, predicate), text
+        scanned = timeit.timeit(lambda: scan(doc, predicate), number=number)
+        selected = timeit.timeit(lambda: selector.select(doc), number=number)
+        print(
+            f"{text:24s} {len(found):>7,d} matches  "
+            f"scan {scanned / number * 1e3:7.1f} ms  "
+            f"select {selected / number * 1e3:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,39 @@
+"""
+Paginating a large document: copying ``doc.sections[a:b]`` against the view
+returned by ``doc[a:b]``, which shares the document's sections.
+
+Run from the repository root::
+
+    python benchmarks/bench_slicing.py [n_lines]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import mixed  # noqa: E402
+from mdslice import from_text  # noqa: E402
+
+
+def main(n_lines: int = 1_000_000, number: int = 1000) -> None:
+    doc = from_text("".join(mixed(n_lines)))
+    n_sections = len(doc.sections)
+    print(f"{n_lines:,d} lines, {n_sections:,d} sections")
+    for page in (50, 5_000, n_sections // 2):
+        start = n_sections // 4
+        stop = start + page
+        copied = timeit.timeit(lambda: doc.sections[start:stop], number=number)
+        viewed = timeit.timeit(lambda: doc[start:stop], number=number)
+        print(
+            f"page of {page:>9,d}  copy {copied / number * 1e6:10.2f} us  "
+            f"view {viewed / number * 1e6:8.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
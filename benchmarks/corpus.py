@@ -0,0 +1,75 @@
+"""Synthetic Markdown corpora shared by the benchmark scripts."""
+
+from __future__ import annotations
+
+import random
+from typing import List
+
+_WORDS = (
+    "markdown section parser header paragraph list table code block quote "
+    "image fence depth content meta slice document stream token buffer line"
+).split()
+
+
+def _sentence(rng: random.Random, n_words: int = 12) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+def paragraph_heavy(n_lines: int, seed: int = 0) -> List[str]:
+    """Mostly prose: paragraphs of a few lines with an occasional header."""
+    rng = random.Random(seed)
+    lines: List[str] = []
+    while len(lines) < n_lines:
+        lines.append(f"## {_sentence(rng, 3)}\n")
+        lines.append("\n")
+        for _ in range(rng.randint(2, 6)):
+            for _ in range(rng.randint(2, 5)):
+                lines.append(_sentence(rng) + "\n")
+            lines.append("\n")
+    return lines[:n_lines]
+
+
+def list_heavy(n_lines: int, seed: int = 0) -> List[str]:
+    """Mostly bullet and ordered lists separated by short paragraphs."""
+    rng = random.Random(seed)
+    lines: List[str] = []
+    while len(lines) < n_lines:
+        lines.append(_sentence(rng, 6) + "\n")
+        for i in range(rng.randint(3, 10)):
+            marker = rng.choice(("-", "*", "+", f"{i + 1}."))
+            lines.append(f"{marker} {_sentence(rng, 6)}\n")
+        lines.append("\n")
+    return lines[:n_lines]
+
+
+def mixed(n_lines: int, seed: int = 0) -> List[str]:
+    """A README-like mix of every section type the parser knows about."""
+    rng = random.Random(seed)
+    lines: List[str] = []
+    while len(lines) < n_lines:
+        lines.extend((f"# {_sentence(rng, 3)}\n", "\n"))
+        lines.extend(_sentence(rng) + "\n" for _ in range(3))
+        lines.append("\n")
+        lines.extend(f"- {_sentence(rng, 5)}\n" for _ in range(4))
+        lines.append("\n")
+        lang = rng.choice(("python", "bash", "json", ""))
+        lines.append(f"```{lang}\n")
+        lines.extend(f"    {_sentence(rng, 4)}\n" for _ in range(5))
+        lines.extend(("```\n", "\n"))
+        lines.extend(("| a | b |\n", "|---|---|\n", "| 1 | 2 |\n", "\n"))
+        lines.extend(("> " + _sentence(rng) + "\n", "\n"))
+        lines.extend(("![badge](https://example.com/badge.svg)\n", "\n"))
+    return lines[:n_lines]
+
+
+def code_heavy(n_lines: int, seed: int = 0) -> List[str]:
+    """Short code blocks in a handful of languages, each under a line of prose."""
+    rng = random.Random(seed)
+    langs = ("python", "python", "bash", "json", "yaml", "js", "")
+    lines: List[str] = []
+    while len(lines) < n_lines:
+        lines.extend((_sentence(rng, 8) + "\n", "\n"))
+        lines.append(f"```{rng.choice(langs)}\n")
+        lines.extend(f"{_sentence(rng, 4)}\n" for _ in range(rng.randint(1, 4)))
+        lines.extend(("```\n", "\n"))
+    return lines[:n_lines]
@@ -1,9 +1,36 @@
-from .main import parse_markdown_file
-from .models import SectionType, ParsedSection, MarkdownDocument
+from .main import parse_markdown_file, parse_bytes, from_text, iter_markdown_file
+from .parser import iter_sections, PushParser
+from .models import (
+    SectionType,
+    ParsedSection,
+    MarkdownDocument,
+    FrozenDocument,
+    MemoryUsage,
+    OutlineNode,
+    SourceSpans,
+)
+from .fulltext import FullTextIndex
+from .pool import ContentPool
+from .scanner import scan_headers
+from .selectors import Selector, compile_selector
 
 __all__ = [
     "parse_markdown_file",
+    "parse_bytes",
+    "from_text",
+    "iter_sections",
+    "iter_markdown_file",
+    "PushParser",
+    "scan_headers",
+    "compile_selector",
+    "Selector",
+    "ContentPool",
+    "FullTextIndex",
     "MarkdownDocument",
+    "FrozenDocument",
     "SectionType",
     "ParsedSection",
+    "MemoryUsage",
+    "OutlineNode",
+    "SourceSpans",
 ]
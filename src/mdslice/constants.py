@@ -1,5 +1,6 @@
 from __future__ import annotations
 from .models import SectionType
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
 import re
 
 
@@ -22,4 +23,181 @@ PATTERNS = [
     (_LIST_RE, SectionType.LIST),
 ]
 
+# First characters that can open a fence or underline a setext header
+_FENCE_CHARS = "`~"
+_SETEXT_CHARS = "=-"
+
+# PATTERNS indexed by the only first characters their regexes can match, so a
+# stripped line is tried against at most one rule. Non-ASCII decimal digits
+# (also matched by `\d`) fall back to LIST_PATTERNS in the parser.
+LIST_PATTERNS = ((_LIST_RE, SectionType.LIST),)
+PATTERNS_BY_FIRST_CHAR = {
+    "|": ((_TABLE_RE, SectionType.TABLE),),
+    "!": ((_IMAGE_RE, SectionType.IMAGE),),
+    ">": ((_QUOTE_RE, SectionType.QUOTE),),
+    **{char: LIST_PATTERNS for char in "*+-0123456789"},
+}
+
+# Byte-string twins of the rules above, used by the bytes engine. `\s` and `\d`
+# only match ASCII here, and `bytes.strip` only strips ASCII whitespace, so lines
+# holding the separators \x1c-\x1f or non-ASCII bytes fall back to the `str`
+# rules, which keeps both engines in agreement on any UTF-8 input.
+_TEXT_ONLY_RE_B = re.compile(rb"[\x1c-\x1f\x80-\xff]")
+_TEXT_ONLY_BYTES = frozenset(range(0x1C, 0x20)) | frozenset(range(0x80, 0x100))
+
+
+def _decode_line(line: bytes) -> str:
+    return line.decode("utf-8", "surrogateescape")
+
+
+def _encode_line(line: str) -> bytes:
+    return line.encode("utf-8", "surrogateescape")
+
+
+def _strip_bytes(line: bytes) -> bytes:
+    stripped = line.strip()
+    if stripped and (
+        stripped[0] in _TEXT_ONLY_BYTES or stripped[-1] in _TEXT_ONLY_BYTES
+    ):
+        return _encode_line(_decode_line(stripped).strip())
+    return stripped
+
+
+def _lstrip_bytes(line: bytes) -> bytes:
+    stripped = line.lstrip()
+    if stripped and stripped[0] in _TEXT_ONLY_BYTES:
+        return _encode_line(_decode_line(stripped).lstrip())
+    return stripped
+
+
+def _rstrip_bytes(line: bytes) -> bytes:
+    stripped = line.rstrip()
+    if stripped and stripped[-1] in _TEXT_ONLY_BYTES:
+        return _encode_line(_decode_line(stripped).rstrip())
+    return stripped
+
+
+def _split_bytes(line: bytes) -> List[bytes]:
+    if _TEXT_ONLY_RE_B.search(line):
+        return [_encode_line(word) for word in _decode_line(line).split()]
+    return line.split()
+
+
+class _TextFallbackPattern:
+    """
+    A bytes rule that retries the `str` rule on lines the ASCII-only classes
+    could misjudge. Only the truth of the match is meaningful.
+    """
+
+    __slots__ = ("pattern", "text_pattern")
+
+    def __init__(self, pattern: re.Pattern, text_pattern: re.Pattern) -> None:
+        self.pattern = pattern
+        self.text_pattern = text_pattern
+
+    def match(self, line: bytes) -> Any:
+        m = self.pattern.match(line)
+        if m is None and _TEXT_ONLY_RE_B.search(line):
+            return self.text_pattern.match(_decode_line(line))
+        return m
+
+
+_HEADER_RE_B = re.compile(rb"^(#{1,6})\s*(.*)$")
+_FENCE_OPEN_RE_B = re.compile(rb"^([`~]{3,})(.*)$")
+_FENCE_CLOSE_RE_B = re.compile(rb"^([`~]{3,})\s*$")
+_TABLE_RE_B = re.compile(rb"^\|.*\|\s*$")
+_IMAGE_RE_B = re.compile(rb"^!\[[^\]]*\]\([^\)]*\)")
+_QUOTE_RE_B = re.compile(rb"^>\s?")
+_LIST_RE_B = _TextFallbackPattern(re.compile(rb"^(?:[*+-]|\d+\.)\s+"), _LIST_RE)
+_SETEXT_H1_RE_B = re.compile(rb"^={3,}\s*$")
+_SETEXT_H2_RE_B = re.compile(rb"^-{3,}\s*$")
+
+LIST_PATTERNS_B = ((_LIST_RE_B, SectionType.LIST),)
+PATTERNS_BY_FIRST_CHAR_B = {
+    b"|": ((_TABLE_RE_B, SectionType.TABLE),),
+    b"!": ((_IMAGE_RE_B, SectionType.IMAGE),),
+    b">": ((_QUOTE_RE_B, SectionType.QUOTE),),
+    **{bytes((char,)): LIST_PATTERNS_B for char in b"*+-0123456789"},
+    # Lead bytes of non-ASCII characters, some of which are decimal digits
+    **{bytes((char,)): LIST_PATTERNS_B for char in range(0x80, 0x100)},
+}
+
+
+class Grammar(NamedTuple):
+    """
+    The rules and literals the parser state machine needs for one string type.
+
+    The parser only ever touches lines through these fields, which lets the same
+    state machine run over `str` lines or raw UTF-8 `bytes` lines. Character sets
+    are frozensets of one-character strings, as ``bytes in bytes`` is slow. The
+    strip and split functions follow `str` semantics for both types.
+    """
+
+    empty: Any
+    nbsp: Any
+    newline_chars: Any
+    fence_chars: Any
+    setext_chars: Any
+    header_char: Any
+    setext_h1_char: Any
+    fence_open: re.Pattern
+    fence_close: re.Pattern
+    header: re.Pattern
+    setext_h1: re.Pattern
+    setext_h2: re.Pattern
+    patterns_by_first_char: Dict[Any, Tuple[Tuple[re.Pattern, SectionType], ...]]
+    list_patterns: Tuple[Tuple[re.Pattern, SectionType], ...]
+    to_str: Callable[[Any], str]
+    strip: Callable[[Any], Any]
+    lstrip: Callable[[Any], Any]
+    rstrip: Callable[[Any], Any]
+    split: Callable[[Any], List[Any]]
+
+
+TEXT_GRAMMAR = Grammar(
+    empty="",
+    nbsp="&nbsp;",
+    newline_chars="\n",
+    fence_chars=frozenset(_FENCE_CHARS),
+    setext_chars=frozenset(_SETEXT_CHARS),
+    header_char="#",
+    setext_h1_char="=",
+    fence_open=_FENCE_OPEN_RE,
+    fence_close=_FENCE_CLOSE_RE,
+    header=_HEADER_RE,
+    setext_h1=_SETEXT_H1_RE,
+    setext_h2=_SETEXT_H2_RE,
+    patterns_by_first_char=PATTERNS_BY_FIRST_CHAR,
+    list_patterns=LIST_PATTERNS,
+    to_str=str,
+    strip=str.strip,
+    lstrip=str.lstrip,
+    rstrip=str.rstrip,
+    split=str.split,
+)
+
+# Raw lines keep their "\r\n" or "\r" endings, which text mode would have
+# translated, so both are stripped from the end of a section.
+BYTES_GRAMMAR = Grammar(
+    empty=b"",
+    nbsp=b"&nbsp;",
+    newline_chars=b"\r\n",
+    fence_chars=frozenset(char.encode() for char in _FENCE_CHARS),
+    setext_chars=frozenset(char.encode() for char in _SETEXT_CHARS),
+    header_char=b"#",
+    setext_h1_char=b"=",
+    fence_open=_FENCE_OPEN_RE_B,
+    fence_close=_FENCE_CLOSE_RE_B,
+    header=_HEADER_RE_B,
+    setext_h1=_SETEXT_H1_RE_B,
+    setext_h2=_SETEXT_H2_RE_B,
+    patterns_by_first_char=PATTERNS_BY_FIRST_CHAR_B,
+    list_patterns=LIST_PATTERNS_B,
+    to_str=bytes.decode,
+    strip=_strip_bytes,
+    lstrip=_lstrip_bytes,
+    rstrip=_rstrip_bytes,
+    split=_split_bytes,
+)
+
 DEPTH = "depth"
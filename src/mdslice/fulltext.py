@@ -0,0 +1,527 @@
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from collections import Counter
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from .models import (
+    MappedSection,
+    MarkdownDocument,
+    ParsedSection,
+    SectionType,
+    intern_meta,
+)
+
+_MAGIC = b"MDFT"
+_VERSION = 1
+# Magic and version, then the number of documents, sections and terms, and the
+# total length of the sections in terms
+_HEADER = struct.Struct("<4sI4q")
+# The columns of an index file, in file order, with the type of their items.
+# Sections are numbered across documents, and the postings of each term are
+# sorted by document and section
+_COLUMNS = (
+    ("doc_starts", "q"),  # First section of each document, and the total
+    ("types", "B"),
+    ("depths", "B"),
+    ("lengths", "I"),  # Number of terms in each section
+    ("text_offsets", "q"),  # Content of each section within `text`
+    ("text", "B"),
+    ("meta_offsets", "q"),  # JSON meta of each section within `metas`
+    ("metas", "B"),
+    ("term_offsets", "q"),  # Each term within `terms`
+    ("terms", "B"),  # UTF-8 terms, sorted
+    ("posting_offsets", "q"),  # Postings of each term
+    ("post_docs", "I"),
+    ("post_sections", "I"),  # Position of the section within its document
+    ("post_tfs", "I"),  # Occurrences of the term in the section
+    ("paths", "B"),  # JSON list of the document paths
+)
+# Offset and number of items of each column
+_DIRECTORY = struct.Struct(f"<{2 * len(_COLUMNS)}q")
+_TYPES_BY_VALUE = {sec_type.value: sec_type for sec_type in SectionType}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# A posting: document id, section position within the document, term frequency
+_Posting = Tuple[int, int, int]
+
+
+def _tokenize(text: str) -> List[str]:
+    # The lowercase word terms of `text`
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _path_key(path: Union[Path, str]) -> str:
+    return str(Path(path))
+
+
+class _Segment:
+    """
+    The columns of an index file, read in place from a read-only mapping.
+
+    Opening only parses the header and the list of paths: every other column
+    is a memoryview over the mapping, so its pages are read when a query
+    touches them.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._views: List[memoryview] = []
+        mapping = None
+        try:
+            with open(path, "rb") as fid:
+                # Empty files cannot be mapped, and are not indexes either
+                mapping = mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, *counts = _HEADER.unpack_from(mapping)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"{path} is not an mdslice full-text index")
+            self.n_docs, self.n_sections, self.n_terms, self.total_length = counts
+            directory = _DIRECTORY.unpack_from(mapping, _HEADER.size)
+        except (ValueError, struct.error) as error:
+            if mapping is not None:
+                mapping.close()
+            raise ValueError(f"{path} is not an mdslice full-text index") from error
+        self.mapping = mapping
+        view = memoryview(self.mapping)
+        self._views.append(view)
+        columns: Dict[str, Any] = {}
+        for (name, typecode), offset, count in zip(
+            _COLUMNS, directory[::2], directory[1::2]
+        ):
+            size = count * array(typecode).itemsize
+            column = view[offset : offset + size].cast(typecode)
+            self._views.append(column)
+            if typecode != "B" and sys.byteorder != "little":
+                column = array(typecode, column.tobytes())
+                column.byteswap()
+            columns[name] = column
+        self.doc_starts = columns["doc_starts"]
+        self.types = columns["types"]
+        self.depths = columns["depths"]
+        self.lengths = columns["lengths"]
+        self.text_offsets = columns["text_offsets"]
+        self.text = columns["text"]
+        self.meta_offsets = columns["meta_offsets"]
+        self.metas = columns["metas"]
+        self.term_offsets = columns["term_offsets"]
+        self.terms = columns["terms"]
+        self.posting_offsets = columns["posting_offsets"]
+        self.post_docs = columns["post_docs"]
+        self.post_sections = columns["post_sections"]
+        self.post_tfs = columns["post_tfs"]
+        self.paths: List[str] = json.loads(columns["paths"].tobytes())
+        # MappedSection offsets count from the start of the mapping
+        self.text_start = directory[2 * _COLUMNS.index(("text", "B"))]
+
+    def find(self, term: str) -> int:
+        """Returns the position of `term`, or -1 if it is not indexed."""
+        # UTF-8 bytes sort in the same order as the code points of the terms
+        key = term.encode("utf-8")
+        offsets, terms = self.term_offsets, self.terms
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if terms[offsets[mid] : offsets[mid + 1]].tobytes() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_terms and terms[offsets[lo] : offsets[lo + 1]] == key:
+            return lo
+        return -1
+
+    def term(self, i: int) -> str:
+        return str(self.terms[self.term_offsets[i] : self.term_offsets[i + 1]], "utf-8")
+
+    def postings(self, i: int) -> Iterator[_Posting]:
+        start, end = self.posting_offsets[i], self.posting_offsets[i + 1]
+        return zip(
+            self.post_docs[start:end],
+            self.post_sections[start:end],
+            self.post_tfs[start:end],
+        )
+
+    def section(self, doc: int, position: int) -> ParsedSection:
+        i = self.doc_starts[doc] + position
+        meta_start, meta_end = self.meta_offsets[i], self.meta_offsets[i + 1]
+        meta = None
+        if meta_end > meta_start:
+            meta = intern_meta(**json.loads(self.metas[meta_start:meta_end].tobytes()))
+        return MappedSection(
+            _TYPES_BY_VALUE[self.types[i]],
+            self.mapping,
+            self.text_start + self.text_offsets[i],
+            self.text_start + self.text_offsets[i + 1],
+            self.depths[i],
+            meta,
+        )
+
+    def close(self) -> None:
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self.mapping.close()
+
+
+class FullTextIndex:
+    """
+    A keyword index over the sections of many documents, ranked with BM25.
+
+    Every section is tokenized into lowercase word terms, and each term maps to
+    its postings: the document, the position of the section within it and the
+    number of occurrences. `save` writes the index, sections included, to one
+    file, which `FullTextIndex(path)` maps back in read-only: opening only reads
+    the header and the document paths, and queries only touch the postings of
+    their terms and the sections they return.
+
+    Documents are keyed by path. `add` and `remove` apply to the mapped file
+    through an in-memory overlay of added documents and removed ids, which
+    `save` merges into a new file, renumbering the documents and dropping the
+    removed ones without tokenizing the sections again.
+
+    Sections returned from the file read their content from the mapping; they
+    cannot be accessed once the index is closed.
+
+    :ivar path: The file the index was loaded from and is saved to, or None.
+    :type path: Optional[Path]
+    :ivar k1: BM25 term frequency saturation.
+    :type k1: float
+    :ivar b: BM25 section length normalization, from 0.0 to 1.0.
+    :type b: float
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[Path, str]] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> None:
+        self.path = Path(path) if path is not None else None
+        self.k1 = k1
+        self.b = b
+        self._segment: Optional[_Segment] = None
+        self._closed = False
+        self._reset()
+        if self.path is not None and self.path.exists():
+            self._load(self.path)
+
+    def _reset(self) -> None:
+        # Ids below the number of documents in the file are documents of the
+        # file; the others index `_added`
+        self._ids: Dict[str, int] = {}
+        self._removed: Set[int] = set()
+        self._added: List[Tuple[str, List[ParsedSection], array]] = []
+        self._postings: Dict[str, List[_Posting]] = {}
+        self._n_sections = 0
+        self._total_length = 0
+
+    def _load(self, path: Path) -> None:
+        segment = self._segment = _Segment(path)
+        self._ids = {key: i for i, key in enumerate(segment.paths)}
+        self._n_sections = segment.n_sections
+        self._total_length = segment.total_length
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise ValueError("operation on a closed FullTextIndex")
+
+    @property
+    def _n_stored(self) -> int:
+        return self._segment.n_docs if self._segment is not None else 0
+
+    def add(self, document: MarkdownDocument) -> None:
+        """
+        Indexes the sections of `document`, replacing the document indexed
+        under the same path, if any.
+
+        :raises ValueError: If the document has no path, or the index is closed.
+        """
+        self._check_open()
+        if document.path is None:
+            raise ValueError("only documents with a path can be indexed")
+        key = _path_key(document.path)
+        if key in self._ids:
+            self.remove(key)
+        doc_id = self._n_stored + len(self._added)
+        # Copied, so that sections of a closed mapping stay readable
+        sections = [ParsedSection(s.type, s.content, s.depth, s.meta) for s in document]
+        lengths = array("I")
+        postings = self._postings
+        for position, section in enumerate(sections):
+            terms = _tokenize(section.content)
+            lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings.setdefault(term, []).append((doc_id, position, tf))
+        self._added.append((key, sections, lengths))
+        self._ids[key] = doc_id
+        self._n_sections += len(sections)
+        self._total_length += sum(lengths)
+
+    def remove(self, path: Union[Path, str]) -> None:
+        """
+        Removes the document indexed under `path`.
+
+        :raises KeyError: If no document is indexed under `path`.
+        :raises ValueError: If the index is closed.
+        """
+        self._check_open()
+        doc_id = self._ids.pop(_path_key(path))
+        self._removed.add(doc_id)
+        segment = self._segment
+        if doc_id < self._n_stored:
+            start, end = segment.doc_starts[doc_id], segment.doc_starts[doc_id + 1]
+            self._n_sections -= end - start
+            self._total_length -= sum(segment.lengths[start:end])
+        else:
+            _, sections, lengths = self._added[doc_id - self._n_stored]
+            self._n_sections -= len(sections)
+            self._total_length -= sum(lengths)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, path: Union[Path, str]) -> bool:
+        return _path_key(path) in self._ids
+
+    def _term_postings(self, term: str) -> List[_Posting]:
+        # The postings of the live documents, stored ones first
+        postings: List[_Posting] = []
+        segment = self._segment
+        if segment is not None:
+            i = segment.find(term)
+            if i >= 0:
+                postings.extend(segment.postings(i))
+        postings.extend(self._postings.get(term, ()))
+        removed = self._removed
+        if removed:
+            postings = [posting for posting in postings if posting[0] not in removed]
+        return postings
+
+    def _path(self, doc_id: int) -> str:
+        n_stored = self._n_stored
+        if doc_id < n_stored:
+            return self._segment.paths[doc_id]
+        return self._added[doc_id - n_stored][0]
+
+    def _section(self, doc_id: int, position: int) -> ParsedSection:
+        n_stored = self._n_stored
+        if doc_id < n_stored:
+            return self._segment.section(doc_id, position)
+        return self._added[doc_id - n_stored][1][position]
+
+    def search(
+        self, query: str, limit: Optional[int] = 10
+    ) -> List[Tuple[float, Path, int, ParsedSection]]:
+        """
+        Ranks the sections containing any term of `query` with BM25.
+
+        :param query: Free text, tokenized like the sections.
+        :param limit: The maximum number of results, or None for all of them.
+        :return: ``(score, path, position, section)`` tuples, best first, where
+            `position` is the index of the section within the document at
+            `path`. Ties keep document order.
+        :raises ValueError: If the index is closed.
+        """
+        self._check_open()
+        n_sections = self._n_sections
+        terms = dict.fromkeys(_tokenize(query))
+        if not terms or not n_sections:
+            return []
+        k1, b = self.k1, self.b
+        avg_length = self._total_length / n_sections or 1.0
+        # The length normalization is k1 * (1 - b + b * length / avg_length)
+        norm_base, norm_scale = k1 * (1.0 - b), k1 * b / avg_length
+        n_stored = self._n_stored
+        if n_stored:
+            doc_starts, lengths = self._segment.doc_starts, self._segment.lengths
+        scores: Dict[Tuple[int, int], float] = {}
+        for term in terms:
+            postings = self._term_postings(term)
+            if not postings:
+                continue
+            df = len(postings)
+            weight = (k1 + 1.0) * math.log(1.0 + (n_sections - df + 0.5) / (df + 0.5))
+            for doc_id, position, tf in postings:
+                if doc_id < n_stored:
+                    length = lengths[doc_starts[doc_id] + position]
+                else:
+                    length = self._added[doc_id - n_stored][2][position]
+                key = (doc_id, position)
+                score = weight * tf / (tf + norm_base + norm_scale * length)
+                scores[key] = scores.get(key, 0.0) + score
+
+        def rank(item: Tuple[Tuple[int, int], float]) -> Tuple[float, int, int]:
+            (doc_id, position), score = item
+            return -score, doc_id, position
+
+        if limit is None:
+            ranked = sorted(scores.items(), key=rank)
+        else:
+            ranked = heapq.nsmallest(limit, scores.items(), key=rank)
+        return [
+            (score, Path(self._path(doc)), position, self._section(doc, position))
+            for (doc, position), score in ranked
+        ]
+
+    def save(self, path: Optional[Union[Path, str]] = None) -> None:
+        """
+        Writes the index to `path`, or to the path it was loaded from, and maps
+        the new file in. The file is written next to its destination and then
+        renamed over it, so a failed save leaves the previous file intact.
+
+        :raises ValueError: If no path is given and the index has none, or the
+            index is closed.
+        """
+        self._check_open()
+        target = Path(path) if path is not None else self.path
+        if target is None:
+            raise ValueError("no path to save the index to")
+        temp = target.with_name(target.name + ".tmp")
+        try:
+            with open(temp, "wb") as fid:
+                self._write(fid)
+        except BaseException:
+            if temp.exists():
+                temp.unlink()
+            raise
+        self._unmap()
+        os.replace(temp, target)
+        self.path = target
+        self._reset()
+        self._load(target)
+
+    def _live_documents(self) -> Iterator[Tuple[int, str]]:
+        n_stored = self._n_stored
+        ids = range(n_stored + len(self._added))
+        for doc_id in ids:
+            if doc_id not in self._removed:
+                yield doc_id, self._path(doc_id)
+
+    def _write(self, fid: Any) -> None:
+        segment = self._segment
+        n_stored = self._n_stored
+        columns: Dict[str, Any] = {
+            name: array(typecode) for name, typecode in _COLUMNS if typecode != "B"
+        }
+        columns.update(
+            (name, bytearray()) for name, typecode in _COLUMNS if typecode == "B"
+        )
+        for name in ("doc_starts", "text_offsets", "meta_offsets", "term_offsets"):
+            columns[name].append(0)
+        columns["posting_offsets"].append(0)
+        text, metas = columns["text"], columns["metas"]
+        renumbered: Dict[int, int] = {}
+        paths: List[str] = []
+        for doc_id, key in self._live_documents():
+            renumbered[doc_id] = len(paths)
+            paths.append(key)
+            if doc_id < n_stored:
+                # Copied column by column, shifting the offsets
+                start, end = segment.doc_starts[doc_id], segment.doc_starts[doc_id + 1]
+                columns["types"] += segment.types[start:end]
+                columns["depths"] += segment.depths[start:end]
+                columns["lengths"].extend(segment.lengths[start:end])
+                for data, offsets, source, source_offsets in (
+                    (text, "text_offsets", segment.text, segment.text_offsets),
+                    (metas, "meta_offsets", segment.metas, segment.meta_offsets),
+                ):
+                    shift = len(data) - source_offsets[start]
+                    data += source[source_offsets[start] : source_offsets[end]]
+                    columns[offsets].extend(
+                        offset + shift for offset in source_offsets[start + 1 : end + 1]
+                    )
+            else:
+                _, sections, lengths = self._added[doc_id - n_stored]
+                columns["lengths"].extend(lengths)
+                for section in sections:
+                    columns["types"].append(section.type)
+                    columns["depths"].append(section.depth)
+                    text += section.content.encode("utf-8")
+                    columns["text_offsets"].append(len(text))
+                    if section.meta:
+                        metas += json.dumps(dict(section.meta)).encode("utf-8")
+                    columns["meta_offsets"].append(len(metas))
+            columns["doc_starts"].append(len(columns["types"]))
+
+        stored_terms: Dict[str, int] = {}
+        if segment is not None:
+            stored_terms = {segment.term(i): i for i in range(segment.n_terms)}
+        terms = columns["terms"]
+        post_docs = columns["post_docs"]
+        post_sections = columns["post_sections"]
+        post_tfs = columns["post_tfs"]
+        for term in sorted(stored_terms.keys() | self._postings.keys()):
+            n_postings = len(post_docs)
+            postings: Iterator[_Posting] = iter(self._postings.get(term, ()))
+            if term in stored_terms:
+                postings = chain(segment.postings(stored_terms[term]), postings)
+            for doc_id, position, tf in postings:
+                new_id = renumbered.get(doc_id)
+                if new_id is not None:
+                    post_docs.append(new_id)
+                    post_sections.append(position)
+                    post_tfs.append(tf)
+            if len(post_docs) > n_postings:
+                terms += term.encode("utf-8")
+                columns["term_offsets"].append(len(terms))
+                columns["posting_offsets"].append(len(post_docs))
+        columns["paths"] += json.dumps(paths).encode("utf-8")
+
+        n_terms = len(columns["term_offsets"]) - 1
+        total_length = sum(columns["lengths"])
+        header = _HEADER.pack(
+            _MAGIC, _VERSION, len(paths), len(columns["types"]), n_terms, total_length
+        )
+        # Each column starts on an 8-byte boundary
+        offset = _HEADER.size + _DIRECTORY.size
+        directory: List[int] = []
+        chunks: List[bytes] = []
+        for name, typecode in _COLUMNS:
+            column = columns[name]
+            if typecode != "B" and sys.byteorder != "little":
+                column.byteswap()
+            data = bytes(column)
+            padding = -len(data) % 8
+            directory += (offset, len(column))
+            chunks.append(data + b"\0" * padding)
+            offset += len(data) + padding
+        fid.write(header)
+        fid.write(_DIRECTORY.pack(*directory))
+        fid.writelines(chunks)
+
+    def close(self) -> None:
+        """
+        Unmaps the index file and forgets the documents added since it was
+        saved. Sections returned from it can no longer be read, and any later
+        use of the index but `len` and ``in`` raises ValueError. Calling it twice
+        does nothing.
+        """
+        self._unmap()
+        self._reset()
+        self._closed = True
+
+    def _unmap(self) -> None:
+        segment, self._segment = self._segment, None
+        if segment is not None:
+            segment.close()
+
+    def __enter__(self) -> "FullTextIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return (
+            f"FullTextIndex({self.path!r}, {len(self)} documents, "
+            f"{self._n_sections} sections)"
+        )
@@ -1,13 +1,41 @@
 from __future__ import annotations
 
+import io
+import mmap
 from pathlib import Path
-from typing import Union
+from typing import Any, Callable, FrozenSet, Iterable, Iterator, Optional, Union
 
-from .models import MarkdownDocument
-from .parser import parse_lines
+from .models import MarkdownDocument, ParsedSection, SectionType, SourceSpans
+from .parallel import parse_text_parallel
+from .pool import ContentPool
+from .parser import (
+    _selected_types,
+    iter_byte_sections,
+    iter_sections,
+    parse_byte_lines,
+    parse_columnar,
+    parse_lines,
+    parse_mapped,
+)
 
+PARSE_MODES = ("text", "bytes", "mmap")
 
-def parse_markdown_file(file_path: Path) -> MarkdownDocument:
+_CR = ord("\r")
+
+
+def parse_markdown_file(
+    file_path: Path,
+    mode: str = "text",
+    workers: Optional[int] = None,
+    include: Optional[Iterable[SectionType]] = None,
+    exclude: Optional[Iterable[SectionType]] = None,
+    max_sections: Optional[int] = None,
+    max_lines: Optional[int] = None,
+    stop_when: Optional[Callable[[ParsedSection], bool]] = None,
+    columnar: bool = False,
+    pool: Optional[ContentPool] = None,
+    spans: bool = False,
+) -> MarkdownDocument:
     """
     Parses a markdown file into a MarkdownDocument object.
 
@@ -15,19 +43,176 @@ def parse_markdown_file(file_path: Path) -> MarkdownDocument:
     content, and processes it to create a `MarkdownDocument` object. The parsed
     document will have its associated file path added for reference.
 
+    In ``"bytes"`` mode the file is read and parsed as raw bytes, see `parse_bytes`;
+    each section is only decoded when its content is accessed. All modes produce
+    the same sections: lines holding non-ASCII bytes are classified with the same
+    Unicode whitespace and digit rules as text mode.
+
+    In ``"mmap"`` mode the file is memory-mapped once and every section only stores
+    the offsets of its content in the mapping, which is sliced and decoded on
+    access. The document keeps the mapping open until it is closed, so use it as a
+    context manager::
+
+        with parse_markdown_file(path, mode="mmap") as doc:
+            titles = [s.content for s in doc.headers()]
+
+    With `workers` set, a text mode file is read at once, split at blank lines
+    outside fenced code and parsed in a pool of that many processes, see
+    `parse_text_parallel`. This pays off for files of tens of megabytes and more.
+
+    With `include` or `exclude` set, only sections of the selected types are built,
+    in every mode; see `parse_lines`::
+
+        code = parse_markdown_file(path, include={SectionType.CODE})
+
+    `max_sections`, `max_lines` and `stop_when` stop reading the file as soon as
+    they are reached, and mark the document as `truncated` if part of it was left
+    unread; see `parse_lines`::
+
+        toc = parse_markdown_file(path, include={SectionType.HEADER}, max_sections=5)
+
+    With `columnar` set, a text mode file is read at once and its sections are
+    stored column by column in a `SectionTable` that shares the file's text, see
+    `parse_columnar`. This takes far less memory per section than a list of
+    `ParsedSection` objects, which are then built on access.
+
+    Passing the same `pool` to many calls makes identical section contents across
+    the parsed files share a single string, see `ContentPool`::
+
+        pool = ContentPool()
+        docs = [parse_markdown_file(path, pool=pool) for path in readmes]
+
+    With `spans` set, the document's `spans` records the lines and offsets of the
+    file each section comes from, see `SourceSpans`. Offsets count characters of
+    the text as read in ``"text"`` mode, with ``"\n"`` line endings, and bytes of
+    the file in ``"bytes"`` and ``"mmap"`` mode.
+
     :param file_path: Path to the markdown file to be parsed.
     :type file_path: Path
+    :param mode: One of ``"text"`` (default), ``"bytes"`` or ``"mmap"``.
+    :type mode: str
+    :param workers: Number of processes to parse with; by default the file is
+        parsed in this process. Only supported in ``"text"`` mode.
+    :type workers: Optional[int]
+    :param include: The section types to build; all of them by default.
+    :param exclude: Section types not to build, applied after `include`.
+    :param max_sections: Maximum number of sections to build.
+    :param max_lines: Maximum number of lines to read.
+    :param stop_when: Predicate called with each section; parsing stops after the
+        first section it returns true for.
+    :param columnar: Whether to store the sections in a `SectionTable`. Only
+        supported in ``"text"`` mode, without `workers` or limits.
+    :param pool: Optional pool to share section contents through. Only supported
+        in ``"text"`` mode, without `columnar`.
+    :param spans: Whether to record the source span of each section. Not
+        supported with `workers`.
+    :raises ValueError: If `mode` is not one of `PARSE_MODES`, `workers` is
+        combined with another mode than ``"text"``, with a limit or with `spans`,
+        a limit is out of range, or `columnar` or `pool` is combined with an
+        unsupported option.
     :return: Parsed markdown document.
     :rtype: MarkdownDocument
     """
+    if mode not in PARSE_MODES:
+        raise ValueError(f"mode must be one of {PARSE_MODES}, got {mode!r}")
+    if workers is not None and mode != "text":
+        raise ValueError(f"workers is only supported in 'text' mode, got {mode!r}")
+    limits = {
+        "max_sections": max_sections,
+        "max_lines": max_lines,
+        "stop_when": stop_when,
+    }
+    limited = any(limit is not None for limit in limits.values())
+    if workers is not None and limited:
+        raise ValueError("workers cannot be combined with parse limits")
+    if workers is not None and spans:
+        raise ValueError("workers cannot be combined with spans")
+    if columnar and (mode != "text" or workers is not None or limited):
+        raise ValueError("columnar needs 'text' mode, without workers or limits")
+    if pool is not None and (mode != "text" or columnar):
+        raise ValueError("pool needs 'text' mode, without columnar")
+    types = _selected_types(include, exclude)
     file_path = check_path(file_path)
-    with open(file_path, "r", encoding="utf-8") as fid:
-        md_doc = parse_lines(fid)
+    if columnar:
+        with open(file_path, "r", encoding="utf-8") as fid:
+            text = fid.read()
+        lines = io.StringIO(text, newline="\n")
+        md_doc = parse_columnar(text, lines, types, spans=spans)
+    elif workers is not None:
+        with open(file_path, "r", encoding="utf-8") as fid:
+            md_doc = parse_text_parallel(fid.read(), workers, types=types)
+        if pool is not None:
+            # Sections come back from the workers as copies
+            for section in md_doc.sections:
+                section.content = pool.intern(section.content)
+    elif mode == "bytes":
+        with open(file_path, "rb") as fid:
+            lines = _iter_byte_lines(fid)
+            md_doc = parse_byte_lines(lines, types, spans=spans, **limits)
+    elif mode == "mmap":
+        md_doc = _parse_mapped_file(file_path, types, spans=spans, **limits)
+    else:
+        with open(file_path, "r", encoding="utf-8") as fid:
+            md_doc = parse_lines(fid, include=types, pool=pool, spans=spans, **limits)
     md_doc.add_path(file_path)
     return md_doc
 
 
-def from_text(text: str) -> MarkdownDocument:
+def iter_markdown_file(
+    file_path: Union[Path, str],
+    mode: str = "text",
+    include: Optional[Iterable[SectionType]] = None,
+    exclude: Optional[Iterable[SectionType]] = None,
+) -> Iterator[ParsedSection]:
+    """
+    Lazily parses a markdown file, yielding each section once it is complete.
+
+    The file is read line by line while the iterator is consumed, so sections can be
+    processed before the whole file has been read, and memory stays constant with
+    respect to the file size. The file is closed once the iterator is exhausted or
+    closed.
+
+    :param file_path: Path to the markdown file to be parsed.
+    :type file_path: Union[Path, str]
+    :param mode: Either ``"text"`` (default) or ``"bytes"``, as for
+        `parse_markdown_file`. A mapping cannot outlive the iterator, so
+        ``"mmap"`` is not supported.
+    :param include: The section types to build; all of them by default.
+    :param exclude: Section types not to build, applied after `include`.
+    :raises ValueError: If `mode` is not ``"text"`` or ``"bytes"``.
+    :raises FileNotFoundError: If the provided file path does not exist.
+    :return: An iterator over the parsed sections, in document order.
+    """
+    if mode not in ("text", "bytes"):
+        raise ValueError(f"mode must be 'text' or 'bytes', got {mode!r}")
+    # Validate eagerly, before the generator body first runs
+    types = _selected_types(include, exclude)
+    return _iter_file_sections(check_path(file_path), mode, types)
+
+
+def _iter_file_sections(
+    file_path: Path, mode: str, types: Optional[FrozenSet[SectionType]]
+) -> Iterator[ParsedSection]:
+    if mode == "bytes":
+        with open(file_path, "rb") as fid:
+            yield from iter_byte_sections(_iter_byte_lines(fid), types)
+    else:
+        with open(file_path, "r", encoding="utf-8") as fid:
+            yield from iter_sections(fid, include=types)
+
+
+def from_text(
+    text: str,
+    editable: bool = False,
+    include: Optional[Iterable[SectionType]] = None,
+    exclude: Optional[Iterable[SectionType]] = None,
+    max_sections: Optional[int] = None,
+    max_lines: Optional[int] = None,
+    stop_when: Optional[Callable[[ParsedSection], bool]] = None,
+    columnar: bool = False,
+    pool: Optional[ContentPool] = None,
+    spans: bool = False,
+) -> MarkdownDocument:
     """
     Parse the given text into a MarkdownDocument.
 
@@ -37,11 +222,95 @@ def from_text(text: str) -> MarkdownDocument:
 
     :param text: The text content to be processed. It is expected to be a string
         containing Markdown content.
+    :param editable: Whether to keep the lines so that the document supports
+        `MarkdownDocument.apply_edit`.
+    :param include: The section types to build; all of them by default.
+    :param exclude: Section types not to build, applied after `include`.
+    :param max_sections: Maximum number of sections to build.
+    :param max_lines: Maximum number of lines to read.
+    :param stop_when: Predicate called with each section; parsing stops after the
+        first section it returns true for.
+    :param columnar: Whether to store the sections in a `SectionTable` sharing
+        `text`, see `parse_columnar`. Cannot be combined with `editable` or limits.
+    :param pool: Optional pool to share section contents through, see
+        `ContentPool`. Not supported with `columnar`.
+    :param spans: Whether to record the lines and character offsets of `text`
+        each section comes from in the document's `spans`, see `SourceSpans`.
+    :raises ValueError: If `columnar` is combined with `editable`, a limit or a
+        pool.
     :return: A `MarkdownDocument` object representing the structured form of the
         input Markdown text.
     """
     lines = text.splitlines(keepends=True)
-    return parse_lines(lines)
+    if columnar:
+        if (
+            editable
+            or pool is not None
+            or not (max_sections is None and max_lines is None and stop_when is None)
+        ):
+            raise ValueError(
+                "columnar cannot be combined with editable, limits or a pool"
+            )
+        types = _selected_types(include, exclude)
+        return parse_columnar(text, lines, types, spans=spans)
+    return parse_lines(
+        lines,
+        editable=editable,
+        include=include,
+        exclude=exclude,
+        max_sections=max_sections,
+        max_lines=max_lines,
+        stop_when=stop_when,
+        pool=pool,
+        spans=spans,
+    )
+
+
+def parse_bytes(data: bytes) -> MarkdownDocument:
+    """
+    Parse UTF-8 encoded Markdown into a MarkdownDocument without decoding it.
+
+    The data is split on ``"\n"``, ``"\r\n"`` and ``"\r"`` like a file read in text
+    mode and run through the bytes engine. Sections keep their raw bytes and only
+    decode them the first time their `content` is read, so decoding errors surface
+    on access rather than while parsing.
+
+    :param data: The encoded Markdown content.
+    :return: A `MarkdownDocument` object whose sections decode lazily.
+    """
+    return parse_byte_lines(data.splitlines(keepends=True))
+
+
+def _parse_mapped_file(
+    file_path: Path,
+    types: Optional[FrozenSet[SectionType]] = None,
+    spans: bool = False,
+    **limits: Any,
+) -> MarkdownDocument:
+    with open(file_path, "rb") as fid:
+        if fid.seek(0, 2) == 0:
+            # Empty files cannot be mapped
+            md_doc = MarkdownDocument()
+            if spans:
+                md_doc.spans = SourceSpans()
+            return md_doc
+        mapping = mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        lines = _iter_byte_lines(iter(mapping.readline, b""))
+        return parse_mapped(mapping, lines, types, spans=spans, **limits)
+    except BaseException:
+        mapping.close()
+        raise
+
+
+def _iter_byte_lines(fid: Iterable[bytes]) -> Iterator[bytes]:
+    # Binary files only split on "\n"; split lone "\r" endings as text mode would.
+    # An int membership test is a plain memchr, unlike ``b"\r" in line``.
+    for line in fid:
+        if _CR in line:
+            yield from line.splitlines(keepends=True)
+        else:
+            yield line
 
 
 def check_path(file_path: Union[Path, str]) -> Path:
@@ -1,9 +1,32 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import pickle
+import re
+import sys
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
 from enum import IntEnum, auto
+from itertools import accumulate, chain, islice, repeat
 from pathlib import Path
-from typing import Optional, Any, List, Callable
+from typing import (
+    TYPE_CHECKING,
+    Optional,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Match,
+    Pattern,
+    Callable,
+    Set,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from .selectors import Selector
 
 
 class SectionType(IntEnum):
@@ -24,8 +47,6 @@ class SectionType(IntEnum):
     QUOTE = auto()
 
 
-# @dataclass(slots=True) todo: check memory with slots
-@dataclass
 class ParsedSection:
     """
     Represents a parsed section of a document.
@@ -49,10 +70,23 @@ class ParsedSection:
     :type meta: Optional[dict[str, Any]]
     """
 
-    type: SectionType
-    content: str
-    depth: int = 0
-    meta: Optional[dict[str, Any]] = None
+    # Written by hand rather than with ``@dataclass(slots=True)``, which needs
+    # Python 3.10. Without a per-instance __dict__ each section saves about 90
+    # bytes (see benchmarks/bench_section_memory.py), which adds up over
+    # millions of sections.
+    __slots__ = ("type", "content", "depth", "meta")
+
+    def __init__(
+        self,
+        type: SectionType,
+        content: str,
+        depth: int = 0,
+        meta: Optional[dict[str, Any]] = None,
+    ) -> None:
+        self.type = type
+        self.content = content
+        self.depth = depth
+        self.meta = meta
 
     def is_header(self) -> bool:
         return self.type == SectionType.HEADER
@@ -60,6 +94,958 @@ class ParsedSection:
     def __str__(self) -> str:
         return f"<{self.type.name}: {self.content!r}>"
 
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__qualname__}(type={self.type!r}, content={self.content!r}, "
+            f"depth={self.depth!r}, meta={self.meta!r})"
+        )
+
+    def __eq__(self, other: object) -> bool:
+        # Sections compare by value across subclasses, whatever their storage
+        if not isinstance(other, ParsedSection):
+            return NotImplemented
+        return (self.type, self.content, self.depth, self.meta) == (
+            other.type,
+            other.content,
+            other.depth,
+            other.meta,
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+class FrozenMeta(dict):
+    """
+    An immutable meta dictionary, shared by every section with the same metadata.
+
+    It is a `dict` subclass, so it compares equal to, serializes to JSON and
+    pickles like a plain dictionary, but every mutating method raises TypeError.
+    Instances are hashable and are obtained through `intern_meta`.
+    """
+
+    __slots__ = ()
+
+    def _immutable(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("section meta is immutable; copy it with dict(meta)")
+
+    __setitem__ = __delitem__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable  # type: ignore
+    __ior__ = _immutable  # type: ignore
+
+    def __hash__(self) -> int:  # type: ignore[override]
+        return hash(frozenset(self.items()))
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # The default reduction of dict subclasses refills them item by item;
+        # interning again also shares the unpickled mappings
+        return _intern_fields, (dict(self),)
+
+    def __copy__(self) -> "FrozenMeta":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "FrozenMeta":
+        return self
+
+
+# Interned meta mappings by their sorted items; bounded, since its keys come
+# from the documents
+_META_CACHE: Dict[Tuple[Tuple[str, Any], ...], FrozenMeta] = {}
+_META_CACHE_SIZE = 4096
+
+
+def intern_meta(**fields: Any) -> FrozenMeta:
+    """
+    Returns the shared `FrozenMeta` holding `fields`.
+
+    Identical metadata, such as ``{"lang": "python"}`` on most code blocks of a
+    corpus, is then stored once instead of once per section. String values are
+    interned with `sys.intern` as well. Once the cache holds a few thousand
+    distinct mappings, new ones are returned without being cached.
+
+    :param fields: The metadata; values must be hashable.
+    :return: An immutable mapping equal to `fields`.
+    """
+    key = tuple(sorted(fields.items()))
+    meta = _META_CACHE.get(key)
+    if meta is None:
+        meta = FrozenMeta(
+            (name, sys.intern(value) if type(value) is str else value)
+            for name, value in key
+        )
+        if len(_META_CACHE) < _META_CACHE_SIZE:
+            _META_CACHE[key] = meta
+    return meta
+
+
+def _intern_fields(fields: Dict[str, Any]) -> FrozenMeta:
+    return intern_meta(**fields)
+
+
+def _decode(raw: bytes) -> str:
+    # Decodes UTF-8 and translates line endings as a text mode read would
+    text = raw.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+class EncodedSection(ParsedSection):
+    """
+    A parsed section that keeps its content as UTF-8 bytes until it is first read.
+
+    Produced by the bytes engine, so parsing never decodes a section nobody looks
+    at. Reading `content` decodes once, translates ``"\\r\\n"`` and ``"\\r"`` line
+    endings to ``"\\n"`` as text mode would, and drops the raw bytes. Compares
+    equal to a `ParsedSection` with the same fields.
+
+    :ivar raw: The encoded content, or None once it has been decoded.
+    :type raw: Optional[bytes]
+    """
+
+    __slots__ = ("raw", "_content")
+
+    def __init__(
+        self,
+        type: SectionType,
+        content: bytes,
+        depth: int = 0,
+        meta: Optional[dict[str, Any]] = None,
+    ) -> None:
+        self.type = type
+        self.raw: Optional[bytes] = content
+        self._content: Optional[str] = None
+        self.depth = depth
+        self.meta = meta
+
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            self._content = _decode(self.raw)
+            self.raw = None
+        return self._content
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._content = value
+        self.raw = None
+
+
+class MappedSection(EncodedSection):
+    """
+    A parsed section that slices its content out of a shared buffer on access.
+
+    Produced by the mmap engine: the section only stores the offsets of its
+    content in the mapped file and decodes that slice each time `content` is
+    read, so nothing is copied until it is needed. The owning `MarkdownDocument`
+    keeps the mapping alive; reading `content` after the document has been
+    closed raises ValueError. Assigning `content` detaches the section from the
+    buffer.
+
+    :ivar source: The buffer holding the encoded content.
+    :ivar start: Offset of the first byte of the content.
+    :type start: int
+    :ivar end: Offset just past the last byte of the content.
+    :type end: int
+    """
+
+    __slots__ = ("source", "start", "end")
+
+    def __init__(
+        self,
+        type: SectionType,
+        source: Any,
+        start: int,
+        end: int,
+        depth: int = 0,
+        meta: Optional[dict[str, Any]] = None,
+    ) -> None:
+        self.type = type
+        self.raw = None
+        self._content: Optional[str] = None
+        self.depth = depth
+        self.meta = meta
+        self.source = source
+        self.start = start
+        self.end = end
+
+    @property
+    def content(self) -> str:
+        if self._content is not None:
+            return self._content
+        return _decode(self.source[self.start : self.end])
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._content = value
+        self.source = None
+
+
+class FrozenSection(ParsedSection):
+    """
+    An immutable, hashable section, as held by a `FrozenDocument`.
+
+    Assigning to a field raises AttributeError, and the meta is a `FrozenMeta`.
+    Sections compare equal to the mutable sections with the same fields, and
+    copying one returns it unchanged.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        type: SectionType,
+        content: str,
+        depth: int = 0,
+        meta: Optional[dict[str, Any]] = None,
+    ) -> None:
+        if meta is not None and not isinstance(meta, FrozenMeta):
+            meta = intern_meta(**meta)
+        set_field = object.__setattr__
+        set_field(self, "type", type)
+        set_field(self, "content", content)
+        set_field(self, "depth", depth)
+        set_field(self, "meta", meta)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"cannot assign to field {name!r} of a frozen section")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"cannot delete field {name!r} of a frozen section")
+
+    def __hash__(self) -> int:  # type: ignore[override]
+        return hash((self.type, self.content, self.depth, self.meta))
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return FrozenSection, (self.type, self.content, self.depth, self.meta)
+
+    def __copy__(self) -> "FrozenSection":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "FrozenSection":
+        return self
+
+
+def _frozen_section(section: ParsedSection) -> FrozenSection:
+    if type(section) is FrozenSection:
+        return section
+    return FrozenSection(section.type, section.content, section.depth, section.meta)
+
+
+# SectionType members indexed by value, to turn stored type codes back into members
+_TYPES_BY_VALUE = [None] * (max(SectionType) + 1)
+for _member in SectionType:
+    _TYPES_BY_VALUE[_member] = _member
+
+
+class SectionTable(Sequence):
+    """
+    Columnar storage for the sections of a document.
+
+    Instead of one object per section, the table keeps one compact array per field:
+    type codes and depths as unsigned bytes, and the ``[start, end)`` offsets of
+    each section's content within a single shared `text` as 64-bit integers. Meta
+    dictionaries, which only code blocks have, are kept apart by position. A
+    section costs 18 bytes plus its share of `text`, which holds the content of
+    every section once.
+
+    The table is a read-only sequence of `ParsedSection`: each section is built
+    from the arrays when it is accessed, so changing it does not change the table.
+    Sections added with `append` have their content copied to the end of `text`.
+
+    :ivar types: The `SectionType` value of each section.
+    :type types: array
+    :ivar depths: The depth of each section.
+    :type depths: array
+    :ivar starts: Offset of the first character of each section's content.
+    :type starts: array
+    :ivar ends: Offset just past the last character of each section's content.
+    :type ends: array
+    :ivar metas: The meta dictionary of each section that has one, by position.
+    :type metas: Dict[int, dict]
+    """
+
+    def __init__(self, text: str = "") -> None:
+        self._text = text
+        # Content appended since `text` was last joined
+        self._pending: List[str] = []
+        self._length = len(text)
+        self.types = array("B")
+        self.depths = array("B")
+        self.starts = array("q")
+        self.ends = array("q")
+        self.metas: Dict[int, dict] = {}
+
+    @property
+    def text(self) -> str:
+        """The buffer holding the content of every section."""
+        if self._pending:
+            self._pending.insert(0, self._text)
+            self._text = "".join(self._pending)
+            self._pending.clear()
+        return self._text
+
+    def add_span(
+        self,
+        sec_type: SectionType,
+        start: int,
+        end: int,
+        depth: int = 0,
+        meta: Optional[dict] = None,
+    ) -> int:
+        """
+        Adds a section whose content is ``text[start:end]``.
+
+        :return: The position of the new section.
+        """
+        i = len(self.types)
+        self.types.append(sec_type)
+        self.depths.append(depth)
+        self.starts.append(start)
+        self.ends.append(end)
+        if meta is not None:
+            self.metas[i] = meta
+        return i
+
+    def append(self, section: ParsedSection) -> None:
+        """Adds a copy of `section`, appending its content to `text`."""
+        content = section.content
+        start = self._length
+        self._pending.append(content)
+        self._length += len(content)
+        self.add_span(section.type, start, self._length, section.depth, section.meta)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self._section(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("section index out of range")
+        return self._section(index)
+
+    def _section(self, i: int) -> ParsedSection:
+        return ParsedSection(
+            _TYPES_BY_VALUE[self.types[i]],
+            self.text[self.starts[i] : self.ends[i]],
+            self.depths[i],
+            self.metas.get(i),
+        )
+
+    def __iter__(self) -> Iterator[ParsedSection]:
+        text = self.text
+        metas = self.metas
+        for i, (type_code, depth, start, end) in enumerate(
+            zip(self.types, self.depths, self.starts, self.ends)
+        ):
+            yield ParsedSection(
+                _TYPES_BY_VALUE[type_code], text[start:end], depth, metas.get(i)
+            )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (list, tuple, SectionTable)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"SectionTable({list(self)!r})"
+
+    def __reduce_ex__(self, protocol: int) -> Tuple[Any, ...]:
+        # The text and the arrays are pickled as buffers, which protocol 5 can
+        # hand to a buffer_callback instead of copying them into the stream
+        text: Any = self.text
+        if protocol >= 5:
+            text = pickle.PickleBuffer(text.encode("utf-8", "surrogatepass"))
+        columns = tuple(
+            _array_buffer(column, protocol)
+            for column in (self.types, self.depths, self.starts, self.ends)
+        )
+        return _restore_table, (text, columns, self.metas, sys.byteorder)
+
+    def to_dicts(self) -> List[dict[str, Any]]:
+        """The sections in the format of `MarkdownDocument.to_dict`."""
+        text = self.text
+        metas = self.metas
+        records = []
+        for i, (type_code, depth, start, end) in enumerate(
+            zip(self.types, self.depths, self.starts, self.ends)
+        ):
+            record = {
+                "type": _TYPES_BY_VALUE[type_code].name,
+                "content": text[start:end],
+                "header_depth": depth,
+            }
+            if i in metas:
+                record["meta"] = dict(metas[i])
+            records.append(record)
+        return records
+
+
+class SectionView(Sequence):
+    """
+    A read-only window on the sections of another document, without copying them.
+
+    The view holds the parent's sections and a `range` of positions within them,
+    so it costs the same whatever its length, and slicing it narrows the range
+    instead of nesting views. Sections are fetched from the parent when
+    accessed, so the view reflects later changes to the parent's sections.
+
+    :ivar base: The sections of the parent document.
+    :type base: Sequence[ParsedSection]
+    :ivar positions: The positions within `base` the view covers, in order.
+    :type positions: range
+    """
+
+    def __init__(self, base: Sequence, positions: range) -> None:
+        self.base = base
+        self.positions = positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return SectionView(self.base, self.positions[index])
+        return self.base[self.positions[index]]
+
+    def __iter__(self) -> Iterator[ParsedSection]:
+        positions = self.positions
+        if positions.step == 1 and isinstance(self.base, (list, tuple)):
+            return islice(self.base, positions.start, positions.stop)
+        return map(self.base.__getitem__, positions)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (list, tuple, SectionTable, SectionView)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"SectionView({list(self)!r})"
+
+    def append(self, section: ParsedSection) -> None:
+        raise TypeError("cannot add a section to a view of another document")
+
+
+def _array_buffer(column: array, protocol: int) -> Any:
+    # The contents of `column` as a buffer protocol 5 can pass out of band
+    return pickle.PickleBuffer(column) if protocol >= 5 else column.tobytes()
+
+
+def _load_array(column: array, data: Any, byteorder: str) -> None:
+    # Buffers passed out of band keep the item format of the pickled array
+    column.frombytes(memoryview(data).cast("B"))
+    if byteorder != sys.byteorder:
+        column.byteswap()
+
+
+def _restore_table(
+    text: Any, columns: Tuple[Any, ...], metas: Dict[int, dict], byteorder: str
+) -> SectionTable:
+    if not isinstance(text, str):
+        text = str(text, "utf-8", "surrogatepass")
+    table = SectionTable(text)
+    arrays = (table.types, table.depths, table.starts, table.ends)
+    for column, data in zip(arrays, columns):
+        _load_array(column, data, byteorder)
+    table.metas = metas
+    return table
+
+
+def _restore_spans(columns: Tuple[Any, ...], byteorder: str) -> "SourceSpans":
+    spans = SourceSpans()
+    for column, data in zip(spans._columns(), columns):
+        _load_array(column, data, byteorder)
+    return spans
+
+
+def _table_of(sections: List[ParsedSection]) -> Optional[SectionTable]:
+    # Copies plain sections into a table column by column, or returns None if
+    # some section does not fit in one: a subclass, or fields outside the ranges
+    # of the columns
+    if not all(type(section) is ParsedSection for section in sections):
+        return None
+    contents = [section.content for section in sections]
+    if not all(type(content) is str for content in contents):
+        return None
+    table = SectionTable("".join(contents))
+    try:
+        table.types = array("B", [section.type for section in sections])
+        table.depths = array("B", [section.depth for section in sections])
+    except (OverflowError, TypeError):
+        return None
+    table.ends = array("q", accumulate(map(len, contents)))
+    # Each section starts where the previous one ends
+    table.starts = array("q", [0])
+    table.starts.extend(table.ends)
+    table.starts.pop()
+    table.metas = {
+        i: section.meta
+        for i, section in enumerate(sections)
+        if section.meta is not None
+    }
+    return table
+
+
+def _sections_of(table: SectionTable) -> List[ParsedSection]:
+    # Builds the sections of a table at once, faster than iterating over it
+    text = table.text
+    metas = table.metas
+    return list(
+        map(
+            ParsedSection,
+            map(_TYPES_BY_VALUE.__getitem__, table.types),
+            [text[start:end] for start, end in zip(table.starts, table.ends)],
+            table.depths,
+            [metas.get(i) for i in range(len(table))] if metas else repeat(None),
+        )
+    )
+
+
+def _restore_document(sections: SectionTable, columnar: bool) -> "MarkdownDocument":
+    return MarkdownDocument(sections if columnar else _sections_of(sections))
+
+
+class SourceSpans:
+    """
+    Where each section of a document comes from in its source.
+
+    Four parallel arrays hold, for the section at the same position in
+    `MarkdownDocument.sections`, the ``[start, end)`` range of source lines it
+    consumed, counting from 0, and the offsets of those lines within the source:
+    characters for text, bytes for documents parsed in ``"bytes"`` or ``"mmap"``
+    mode. ``source[start:end]`` is the exact markup of the section, line endings
+    included. Blank lines outside code blocks belong to no section.
+
+    :ivar start_lines: The first line of each section.
+    :type start_lines: array
+    :ivar end_lines: The line just past each section.
+    :type end_lines: array
+    :ivar starts: Offset of the first line of each section.
+    :type starts: array
+    :ivar ends: Offset just past the last line of each section.
+    :type ends: array
+    """
+
+    def __init__(self) -> None:
+        self._start_lines = array("q")
+        self._end_lines = array("q")
+        self._starts = array("q")
+        self._ends = array("q")
+        # An edit shifts the spans of every section after it. The shift of the
+        # spans from `_shift_from` on is kept pending and only added to them when
+        # the columns are read, so a run of edits does not pass over the whole
+        # document each time
+        self._shift_from = 0
+        self._line_shift = 0
+        self._offset_shift = 0
+
+    @property
+    def start_lines(self) -> array:
+        return self._columns()[0]
+
+    @property
+    def end_lines(self) -> array:
+        return self._columns()[1]
+
+    @property
+    def starts(self) -> array:
+        return self._columns()[2]
+
+    @property
+    def ends(self) -> array:
+        return self._columns()[3]
+
+    def add(self, start_line: int, end_line: int, start: int, end: int) -> None:
+        # Only called while parsing, when no shift is pending
+        self._start_lines.append(start_line)
+        self._end_lines.append(end_line)
+        self._starts.append(start)
+        self._ends.append(end)
+
+    def _truncate(self, length: int) -> None:
+        # Drops the spans of sections parsed past a limit and never added
+        for column in self._columns():
+            del column[length:]
+
+    def _columns(self) -> Tuple[array, array, array, array]:
+        if self._line_shift or self._offset_shift:
+            self._move_shift(len(self))
+            self._line_shift = self._offset_shift = 0
+        return self._start_lines, self._end_lines, self._starts, self._ends
+
+    def _move_shift(self, index: int) -> None:
+        # Moves the start of the pending shift to `index`, adding it to or taking
+        # it back from the spans in between
+        low, high, sign = self._shift_from, index, 1
+        if low > high:
+            low, high, sign = high, low, -1
+        line_shift, offset_shift = sign * self._line_shift, sign * self._offset_shift
+        columns = (self._start_lines, self._end_lines, self._starts, self._ends)
+        shifts = (line_shift, line_shift, offset_shift, offset_shift)
+        for column, shift in zip(columns, shifts):
+            if shift:
+                column[low:high] = array("q", [n + shift for n in column[low:high]])
+        self._shift_from = index
+
+    def _shifted_columns(self) -> Tuple["_ShiftedColumn", ...]:
+        # Read-only views of the columns with the pending shift added, which
+        # leave it pending
+        start, line_shift = self._shift_from, self._line_shift
+        offset_shift = self._offset_shift
+        return (
+            _ShiftedColumn(self._start_lines, start, line_shift),
+            _ShiftedColumn(self._end_lines, start, line_shift),
+            _ShiftedColumn(self._starts, start, offset_shift),
+            _ShiftedColumn(self._ends, start, offset_shift),
+        )
+
+    def _replace(
+        self,
+        first: int,
+        stop: int,
+        spans: "SourceSpans",
+        line_shift: int,
+        offset_shift: int,
+    ) -> None:
+        # Replaces the spans of the sections at [first, stop) with `spans` and
+        # shifts the ones after them. Only the spans between the pending shift
+        # and the edit are touched, so nearby edits stay cheap.
+        self._move_shift(stop)
+        columns = (self._start_lines, self._end_lines, self._starts, self._ends)
+        for column, new_column in zip(columns, spans._columns()):
+            column[first:stop] = new_column
+        self._shift_from = first + len(spans)
+        self._line_shift += line_shift
+        self._offset_shift += offset_shift
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, index: int) -> Tuple[int, int, int, int]:
+        """
+        Returns ``(start_line, end_line, start, end)`` for the section at `index`.
+        """
+        return (
+            self.start_lines[index],
+            self.end_lines[index],
+            self.starts[index],
+            self.ends[index],
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SourceSpans):
+            return NotImplemented
+        return self._columns() == other._columns()
+
+    def __repr__(self) -> str:
+        return f"SourceSpans({len(self)} sections)"
+
+    def __reduce_ex__(self, protocol: int) -> Tuple[Any, ...]:
+        columns = tuple(_array_buffer(column, protocol) for column in self._columns())
+        return _restore_spans, (columns, sys.byteorder)
+
+    def lines(self, index: int) -> Tuple[int, int]:
+        """Returns the ``[start, end)`` lines of the section at `index`."""
+        return self.start_lines[index], self.end_lines[index]
+
+    def offsets(self, index: int) -> Tuple[int, int]:
+        """Returns the ``[start, end)`` source offsets of the section at `index`."""
+        return self.starts[index], self.ends[index]
+
+    def section_at_line(self, line: int) -> Optional[int]:
+        """
+        Returns the index of the section covering source line `line`, or None if
+        the line belongs to no section.
+        """
+        i = bisect_right(self.start_lines, line) - 1
+        return i if i >= 0 and line < self.end_lines[i] else None
+
+    def section_at_offset(self, offset: int) -> Optional[int]:
+        """
+        Returns the index of the section covering source offset `offset`, or None
+        if the offset belongs to no section.
+        """
+        i = bisect_right(self.starts, offset) - 1
+        return i if i >= 0 and offset < self.ends[i] else None
+
+
+class _ShiftedColumn:
+    """A column of `SourceSpans` read with the shift pending from `start` on."""
+
+    __slots__ = ("column", "start", "shift")
+
+    def __init__(self, column: array, start: int, shift: int) -> None:
+        self.column = column
+        self.start = start
+        self.shift = shift
+
+    def __len__(self) -> int:
+        return len(self.column)
+
+    def __getitem__(self, index: int) -> int:
+        value = self.column[index]
+        return value + self.shift if index >= self.start else value
+
+
+class MemoryUsage:
+    """
+    Bytes held by parsed documents, broken down by section type.
+
+    For each `SectionType`, memory is split into ``"content"`` (content strings,
+    or raw bytes not decoded yet), ``"sections"`` (section objects, or their rows
+    in a `SectionTable`) and ``"meta"`` (meta dictionaries with their keys and
+    values). What belongs to no single section, such as the sections list, array
+    overallocation, source spans and the part of a shared text buffer outside any
+    section, is counted in `container`.
+
+    Objects shared by several sections, such as pooled content or interned meta,
+    are counted once, for the first section that holds them; across documents
+    too, for a usage measured with `of_corpus`. Sizes are measured with
+    `sys.getsizeof`, so they include object headers but not allocator overhead.
+
+    :ivar by_type: Bytes per kind of memory for each section type present.
+    :type by_type: Dict[SectionType, Dict[str, int]]
+    :ivar container: Bytes not attributed to any section.
+    :type container: int
+    :ivar documents: Number of documents measured.
+    :type documents: int
+    """
+
+    KINDS = ("content", "sections", "meta")
+
+    def __init__(self) -> None:
+        self.by_type: Dict[SectionType, Dict[str, int]] = {}
+        self.container = 0
+        self.documents = 0
+
+    @classmethod
+    def of_corpus(
+        cls, documents: Iterable["MarkdownDocument"], deep: bool = True
+    ) -> "MemoryUsage":
+        """
+        Measures many documents at once, counting objects they share only once.
+
+        :param documents: The documents to measure.
+        :param deep: Whether to include content and meta, see
+            `MarkdownDocument.memory_usage`.
+        :return: The aggregated usage.
+        """
+        usage = cls()
+        seen: Set[int] = set()
+        for document in documents:
+            usage._measure(document, deep, seen)
+        return usage
+
+    def _row(self, sec_type: SectionType) -> Dict[str, int]:
+        row = self.by_type.get(sec_type)
+        if row is None:
+            row = self.by_type[sec_type] = dict.fromkeys(self.KINDS, 0)
+        return row
+
+    def _measure(
+        self, document: "MarkdownDocument", deep: bool, seen: Set[int]
+    ) -> None:
+        # Adds the memory of `document`; `seen` holds the ids of the objects
+        # already counted
+        self.documents += 1
+        if document.spans is not None:
+            self.container += sum(map(sys.getsizeof, document.spans._columns()))
+        sections = document.sections
+        if isinstance(sections, SectionTable):
+            self._measure_table(sections, deep, seen)
+            return
+        getsizeof = sys.getsizeof
+        self.container += getsizeof(sections)
+        for section in sections:
+            row = self._row(section.type)
+            row["sections"] += getsizeof(section)
+            if not deep:
+                continue
+            if isinstance(section, EncodedSection):
+                # Lazy sections are measured as they are, without decoding them
+                content = section._content
+                if content is None:
+                    content = section.raw
+            else:
+                content = section.content
+            if content is not None and id(content) not in seen:
+                seen.add(id(content))
+                row["content"] += getsizeof(content)
+            if section.meta is not None:
+                row["meta"] += _meta_size(section.meta, seen)
+
+    def _measure_table(self, table: SectionTable, deep: bool, seen: Set[int]) -> None:
+        getsizeof = sys.getsizeof
+        columns = (table.types, table.depths, table.starts, table.ends)
+        row_size = sum(column.itemsize for column in columns)
+        self.container += sum(map(getsizeof, columns)) - row_size * len(table)
+        self.container += getsizeof(table.metas)
+        text = table.text
+        text_size = getsizeof(text) if id(text) not in seen else 0
+        seen.add(id(text))
+        chars: Dict[SectionType, int] = {}
+        for i, (type_code, start, end) in enumerate(
+            zip(table.types, table.starts, table.ends)
+        ):
+            sec_type = _TYPES_BY_VALUE[type_code]
+            row = self._row(sec_type)
+            row["sections"] += row_size
+            if deep:
+                chars[sec_type] = chars.get(sec_type, 0) + end - start
+                meta = table.metas.get(i)
+                if meta is not None:
+                    row["meta"] += _meta_size(meta, seen)
+        if not deep:
+            return
+        # The shared text is split in proportion to the characters of each type
+        attributed = 0
+        for sec_type, n_chars in chars.items():
+            share = text_size * n_chars // max(len(text), 1)
+            self.by_type[sec_type]["content"] += share
+            attributed += share
+        self.container += text_size - attributed
+
+    @property
+    def total(self) -> int:
+        """All bytes measured."""
+        attributed = sum(sum(row.values()) for row in self.by_type.values())
+        return self.container + attributed
+
+    def __add__(self, other: "MemoryUsage") -> "MemoryUsage":
+        if not isinstance(other, MemoryUsage):
+            return NotImplemented
+        usage = MemoryUsage()
+        for source in (self, other):
+            for sec_type, row in source.by_type.items():
+                target = usage._row(sec_type)
+                for kind, nbytes in row.items():
+                    target[kind] += nbytes
+            usage.container += source.container
+            usage.documents += source.documents
+        return usage
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total": self.total,
+            "container": self.container,
+            "documents": self.documents,
+            "by_type": {
+                sec_type.name: dict(row)
+                for sec_type, row in sorted(self.by_type.items())
+            },
+        }
+
+    def __repr__(self) -> str:
+        return f"MemoryUsage(total={self.total}, documents={self.documents})"
+
+
+def _meta_size(meta: dict, seen: Set[int]) -> int:
+    # Size of a meta dict and of its keys and values not counted yet
+    if id(meta) in seen:
+        return 0
+    seen.add(id(meta))
+    size = sys.getsizeof(meta)
+    for obj in chain.from_iterable(meta.items()):
+        if id(obj) not in seen:
+            seen.add(id(obj))
+            size += sys.getsizeof(obj)
+    return size
+
+
+class OutlineNode:
+    """
+    A header of a document and the headers nested under it, see
+    `MarkdownDocument.outline`.
+
+    A node owns the sections from its header up to the next header of the same
+    or a smaller depth, which covers the headers nested under it and their
+    sections. These are the sections ``[start, end)`` of the document, which
+    `sections` returns at once, as a view sharing the document's sections.
+    The root node has no header, a depth of 0 and owns the whole document.
+
+    :ivar document: The document the outline was built from.
+    :type document: MarkdownDocument
+    :ivar depth: The depth of the header, or 0 for the root.
+    :type depth: int
+    :ivar start: Position of the header in the document, or 0 for the root.
+    :type start: int
+    :ivar end: Position just past the last section the node owns.
+    :type end: int
+    :ivar parent: The node this one is nested under, or None for the root.
+    :type parent: Optional[OutlineNode]
+    :ivar children: The nodes directly nested under this one, in document order.
+    :type children: List[OutlineNode]
+    """
+
+    __slots__ = ("document", "depth", "start", "end", "parent", "children", "_rank")
+
+    def __init__(
+        self,
+        document: "MarkdownDocument",
+        depth: int,
+        start: int,
+        end: int,
+        parent: Optional["OutlineNode"] = None,
+    ) -> None:
+        self.document = document
+        self.depth = depth
+        self.start = start
+        self.end = end
+        self.parent = parent
+        self.children: List[OutlineNode] = []
+        # Position among the children of `parent`
+        self._rank = 0
+        if parent is not None:
+            self._rank = len(parent.children)
+            parent.children.append(self)
+
+    @property
+    def header(self) -> Optional[ParsedSection]:
+        """The header section, or None for the root."""
+        if self.parent is None:
+            return None
+        return self.document[self.start]  # type: ignore[return-value]
+
+    @property
+    def sections(self) -> SectionView:
+        """The sections the node owns, its header included, as a view."""
+        return self.document[self.start : self.end].sections  # type: ignore
+
+    @property
+    def next_sibling(self) -> Optional["OutlineNode"]:
+        if self.parent is None:
+            return None
+        siblings = self.parent.children
+        return siblings[self._rank + 1] if self._rank + 1 < len(siblings) else None
+
+    @property
+    def previous_sibling(self) -> Optional["OutlineNode"]:
+        if self.parent is None or self._rank == 0:
+            return None
+        return self.parent.children[self._rank - 1]
+
+    def walk(self) -> Iterator["OutlineNode"]:
+        """Iterates over this node and the nodes nested under it, depth first."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def __repr__(self) -> str:
+        header = self.header
+        title = "<root>" if header is None else repr(header.content)
+        return (
+            f"OutlineNode({title}, depth={self.depth}, sections=[{self.start}, "
+            f"{self.end}), children={len(self.children)})"
+        )
+
 
 class MarkdownDocument:
     """
@@ -70,15 +1056,27 @@ class MarkdownDocument:
     into a dictionary format. It also supports filtering and searching operations
     on the document's headers or sections.
 
-    :ivar sections: A list of parsed sections that compose the markdown document.
-    :type sections: List[ParsedSection]
+    :ivar sections: A list of parsed sections that compose the markdown document,
+        a `SectionTable` for documents parsed with ``columnar=True``, or a
+        `SectionView` for documents obtained by slicing another one.
+    :type sections: Union[List[ParsedSection], SectionTable, SectionView]
     :ivar path: An optional file path associated with the markdown document.
     :type path: Optional[Path]
+    :ivar truncated: Whether parsing stopped at a limit before the end of the input.
+    :type truncated: bool
+    :ivar spans: The source lines and offsets of each section, for documents
+        parsed with ``spans=True`` or ``editable=True``, otherwise None.
+    :type spans: Optional[SourceSpans]
     """
 
+    # Attributes derived from the sections, rebuilt when needed
+    _CACHES = ("_type_index", "_header_index", "_search_buffer", "_parent_index")
+
     def __init__(
         self,
-        sections: Optional[List[ParsedSection]] = None,
+        sections: Optional[
+            Union[List[ParsedSection], SectionTable, SectionView]
+        ] = None,
         f_path: Optional[Path] = None,
     ) -> None:
         self.path: Optional[Path] = f_path
@@ -86,15 +1084,132 @@ class MarkdownDocument:
             self.sections: List[ParsedSection] = []
         else:
             self.sections = sections
+        self.truncated = False
+        self.spans: Optional[SourceSpans] = None
+        self._source: Any = None
+        self._editable: Any = None
+        # Positions of the sections of each type, built on first use, and the
+        # number of sections they cover
+        self._type_index: Optional[Dict[SectionType, array]] = None
+        self._type_index_size = 0
+        # Positions of the headers of each depth, built from the type index
+        self._header_index: Optional[Dict[int, array]] = None
+        # The content of every section in one string, with the offsets of each
+        self._search_buffer: Optional[Tuple[str, array, array]] = None
+        # The position of the header each section is nested under
+        self._parent_index: Optional[array] = None
+
+    def attach_source(self, source: Any) -> None:
+        """
+        Keeps `source`, the buffer the sections read their content from, alive for
+        as long as the document and releases it on `close`.
+        """
+        self._source = source
+
+    def close(self) -> None:
+        """
+        Releases the attached source buffer, such as the mapping of a file parsed
+        with ``mode="mmap"``. Sections that read from it can no longer be accessed.
+        Calling it on a document without a source, or twice, does nothing.
+        """
+        source, self._source = self._source, None
+        if source is not None and hasattr(source, "close"):
+            source.close()
+
+    def __enter__(self) -> "MarkdownDocument":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
     def add_section(self, section: ParsedSection) -> None:
         if isinstance(section, ParsedSection):
             self.sections.append(section)
+            # A section added by hand has no source lines to reparse or point to
+            self._editable = None
+            self.spans = None
+            self._search_buffer = None
+            index = self._type_index
+            if index is not None and self._type_index_size == len(self.sections) - 1:
+                positions = index.get(section.type)
+                if positions is None:
+                    positions = index[section.type] = array("q")
+                positions.append(self._type_index_size)
+                header_index = self._header_index
+                if header_index is not None and section.type == SectionType.HEADER:
+                    bucket = header_index.get(section.depth)
+                    if bucket is None:
+                        bucket = header_index[section.depth] = array("q")
+                    bucket.append(self._type_index_size)
+                self._type_index_size += 1
+
+    def apply_edit(
+        self, start_line: int, end_line: int, new_text: str
+    ) -> Tuple[int, int]:
+        """
+        Replaces lines ``[start_line, end_line)`` of the source with `new_text` and
+        updates the sections in place, as if the edited text had been reparsed.
+
+        Only the sections the edit can affect are reparsed: parsing restarts after the
+        last blank line outside code before the edit and stops at the first blank
+        line after it where the new and old parses agree, so the cost depends on the
+        size of the edit rather than of the document. Sections outside that window
+        are reused unchanged.
+
+        `new_text` is split into lines like `from_text` does and should end with a
+        line break unless it replaces the end of the document; otherwise it is joined
+        with the line that follows.
+
+        :param start_line: First line to replace, counting from 0.
+        :param end_line: Line just past the last line to replace; equal to
+            `start_line` to insert before it.
+        :param new_text: The replacement text.
+        :raises ValueError: If the document was not parsed with ``editable=True``, or
+            the line range is out of bounds.
+        :return: The ``[start, stop)`` indices of the reparsed sections in `sections`.
+        """
+        if self._editable is None:
+            raise ValueError("apply_edit needs a document parsed with editable=True")
+        self._drop_caches()
+        return self._editable.apply(self, start_line, end_line, new_text)
 
     def add_path(self, f_path: Path) -> None:
         self.path = f_path
 
+    def __reduce_ex__(self, protocol: int) -> Tuple[Any, ...]:
+        """
+        Pickles the sections as the columns of a `SectionTable` rather than one
+        object at a time: a single text buffer holding every content, four arrays
+        and the meta dictionaries, which pickle once each however many sections
+        share them. With protocol 5 the buffers can be passed out of band::
+
+            buffers = []
+            data = pickle.dumps(doc, protocol=5, buffer_callback=buffers.append)
+            copy = pickle.loads(data, buffers=buffers)
+
+        A document of `ParsedSection` objects unpickles to a list of equal
+        sections, a columnar document to a `SectionTable`. Documents holding
+        other sections, such as the lazy sections of the bytes modes, are
+        pickled as usual.
+        """
+        sections = self.sections
+        columnar = isinstance(sections, SectionTable)
+        table = sections if columnar else _table_of(sections)
+        if table is None:
+            return super().__reduce_ex__(protocol)
+        state = {
+            key: value
+            for key, value in vars(self).items()
+            if key != "sections" and key not in self._CACHES
+        }
+        return _restore_document, (table, columnar), state
+
     def to_dict(self) -> dict[str, Any]:
+        if isinstance(self.sections, SectionTable):
+            return {
+                "path": str(self.path) if self.path is not None else None,
+                "sections": self.sections.to_dicts(),
+            }
         return {
             "path": str(self.path) if self.path is not None else None,
             "sections": [
@@ -102,7 +1217,7 @@ class MarkdownDocument:
                     "type": s.type.name,
                     "content": s.content,
                     "header_depth": s.depth,
-                    **({"meta": s.meta} if s.meta is not None else {}),
+                    **({"meta": dict(s.meta)} if s.meta is not None else {}),
                 }
                 for s in self.sections
             ],
@@ -111,18 +1226,159 @@ class MarkdownDocument:
     def headers(
         self, min_depth: Optional[int] = None, max_depth: Optional[int] = None
     ) -> List[ParsedSection]:
-        result = [s for s in self.sections if s.type == SectionType.HEADER]
-        if min_depth is not None:
-            result = [s for s in result if s.depth >= min_depth]
-        if max_depth is not None:
-            result = [s for s in result if s.depth <= max_depth]
-        return result
+        """
+        Returns the headers whose depth is within ``[min_depth, max_depth]``, in
+        document order.
+
+        Header positions are indexed by depth on first use and kept up to date
+        like the index behind `of_type`, so a call only costs the number of
+        headers returned: the positions of each depth in range are merged back
+        into document order.
+
+        :param min_depth: Smallest depth returned; no lower bound by default.
+        :param max_depth: Largest depth returned; no upper bound by default.
+        :return: The matching header sections.
+        """
+        sections = self.sections
+        buckets = [
+            positions
+            for depth, positions in sorted(self._header_buckets().items())
+            if (min_depth is None or depth >= min_depth)
+            and (max_depth is None or depth <= max_depth)
+        ]
+        if len(buckets) == 1:
+            return [sections[i] for i in buckets[0]]
+        # Each bucket is a sorted run, which sorting merges at C speed
+        return [sections[i] for i in sorted(chain.from_iterable(buckets))]
+
+    def _header_buckets(self) -> Dict[int, array]:
+        # The positions of the headers of each depth, built from the type index
+        headers = self._section_index().get(SectionType.HEADER, ())
+        index = self._header_index
+        if index is not None:
+            return index
+        index = {}
+        for i, depth in zip(headers, self._depths(headers)):
+            positions = index.get(depth)
+            if positions is None:
+                positions = index[depth] = array("q")
+            positions.append(i)
+        if not isinstance(self.sections, SectionView):
+            object.__setattr__(self, "_header_index", index)
+        return index
+
+    def _outline_parents(self) -> array:
+        # The position of the header each section is nested under in `outline`,
+        # or -1 at the top level: the header of the parent node for a header,
+        # of the deepest node owning it for other sections
+        sections = self.sections
+        parents = self._parent_index
+        if parents is not None and len(parents) == len(sections):
+            return parents
+        headers = self._section_index().get(SectionType.HEADER, ())
+        parents = array("q")
+        # The open headers, as ``(position, depth)``
+        stack: List[Tuple[int, int]] = []
+        for i, depth in zip(headers, self._depths(headers)):
+            parents.extend(repeat(stack[-1][0] if stack else -1, i - len(parents)))
+            while stack and stack[-1][1] >= depth:
+                stack.pop()
+            parents.append(stack[-1][0] if stack else -1)
+            stack.append((i, depth))
+        owner = stack[-1][0] if stack else -1
+        parents.extend(repeat(owner, len(sections) - len(parents)))
+        if not isinstance(sections, SectionView):
+            object.__setattr__(self, "_parent_index", parents)
+        return parents
+
+    def _depths(self, positions: Iterable[int]) -> Iterable[int]:
+        # The depths of the sections at `positions`, without building the
+        # sections of a table
+        sections = self.sections
+        if isinstance(sections, SectionTable):
+            return map(sections.depths.__getitem__, positions)
+        return (sections[i].depth for i in positions)
 
     def find(
         self, predicate: Callable[[ParsedSection], bool]
     ) -> Optional[ParsedSection]:
         return next((s for s in self.sections if predicate(s)), None)
 
+    def select(self, selector: Union[str, Selector]) -> List[ParsedSection]:
+        """
+        Returns the sections matching a selector, in document order::
+
+            doc.select('h2 > code[lang=python], table:under("Install")')
+
+        The selector is compiled once by `compile_selector`, which caches it, and
+        answered from the type, depth and outline indexes of the document rather
+        than by testing every section. See `compile_selector` for the syntax.
+
+        :param selector: The selector, as text or compiled.
+        :raises ValueError: If the selector text is invalid.
+        :return: The matching sections.
+        """
+        from .selectors import compile_selector
+
+        if isinstance(selector, str):
+            selector = compile_selector(selector)
+        return selector.select(self)
+
+    def memory_usage(self, deep: bool = True) -> MemoryUsage:
+        """
+        Measures the memory held by the sections of the document.
+
+        With `deep` unset, only the section objects (or table rows) and their
+        container are counted, which is fast. With `deep` set, content strings and
+        meta dictionaries are counted as well; lazily decoded sections are measured
+        without being decoded. Use `MemoryUsage.of_corpus` to measure many
+        documents at once.
+
+        :param deep: Whether to include content and meta.
+        :return: The memory held, broken down by section type.
+        :rtype: MemoryUsage
+        """
+        return MemoryUsage.of_corpus((self,), deep)
+
+    def outline(self) -> OutlineNode:
+        """
+        Builds the header tree of the document in one pass over its headers.
+
+        Each header is nested under the closest header before it with a smaller
+        depth, and owns the sections up to the next header of the same or a
+        smaller depth. Content before the first header belongs to the root::
+
+            for node in doc.outline().walk():
+                print("  " * node.depth, node.header, len(node.sections))
+
+        :return: The root node, which owns every section.
+        :rtype: OutlineNode
+        """
+        n_sections = len(self.sections)
+        headers = self._section_index().get(SectionType.HEADER, ())
+        root = OutlineNode(self, 0, 0, n_sections)
+        # The open nodes, from the root to the last header seen
+        stack = [root]
+        for i, depth in zip(headers, self._depths(headers)):
+            while len(stack) > 1 and stack[-1].depth >= depth:
+                stack.pop().end = i
+            stack.append(OutlineNode(self, depth, i, n_sections, stack[-1]))
+        return root
+
+    def freeze(self) -> "FrozenDocument":
+        """
+        Returns an immutable snapshot of the document, see `FrozenDocument`.
+
+        Freezing copies no content: the snapshot's sections share their strings
+        with the document's. Lazily decoded sections are decoded, which also
+        detaches them from a memory-mapped source.
+
+        :raises TypeError: If the meta of a section holds unhashable values.
+        :return: The snapshot.
+        :rtype: FrozenDocument
+        """
+        return FrozenDocument(self)
+
     @property
     def path(self):
         return self._path
@@ -133,16 +1389,260 @@ class MarkdownDocument:
             self._path = Path(f_path)
         self._path = f_path
 
-    def of_type(self): ...
+    def of_type(self, *types: SectionType) -> List[ParsedSection]:
+        """
+        Returns the sections of the given types, in document order.
 
-    def __getitem__(self): ...
+        The first call indexes the positions of the sections of every type in one
+        pass, and `add_section` keeps the index up to date, so later calls only
+        cost the number of sections returned. Changes made to `sections` other
+        than through `add_section` and `apply_edit` are only noticed when they
+        change the number of sections. Views obtained by slicing are not
+        indexed, since their parent can change under them.
 
-    def __iter__(self): ...
+        :param types: The section types to select.
+        :return: The matching sections.
+        """
+        sections = self.sections
+        index = self._section_index()
+        if len(types) == 1:
+            positions: Iterable[int] = index.get(types[0], ())
+        else:
+            positions = sorted(
+                chain.from_iterable(index.get(t, ()) for t in set(types))
+            )
+        return [sections[i] for i in positions]
+
+    def _section_index(self) -> Dict[SectionType, array]:
+        # The positions of the sections of each type, built in one pass if the
+        # cached index is missing or stale
+        sections = self.sections
+        index = self._type_index
+        if index is not None and self._type_index_size == len(sections):
+            return index
+        index = {}
+        types: Iterable[SectionType]
+        if isinstance(sections, SectionTable):
+            types = map(_TYPES_BY_VALUE.__getitem__, sections.types)
+        else:
+            types = (section.type for section in sections)
+        for i, sec_type in enumerate(types):
+            positions = index.get(sec_type)
+            if positions is None:
+                positions = index[sec_type] = array("q")
+            positions.append(i)
+        if not isinstance(sections, SectionView):
+            # Set directly, so that frozen documents can cache them too
+            object.__setattr__(self, "_type_index", index)
+            object.__setattr__(self, "_type_index_size", len(sections))
+            object.__setattr__(self, "_header_index", None)
+        return index
+
+    def _drop_caches(self) -> None:
+        for name in self._CACHES:
+            object.__setattr__(self, name, None)
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[ParsedSection, "MarkdownDocument"]:
+        """
+        Returns the section at `index`, or for a slice a document viewing the
+        selected sections.
+
+        The view shares this document's sections through a `SectionView` rather
+        than copying them, so slicing costs the same whatever the size of the
+        document or of the slice. The view has the same path, is read-only, and
+        reflects later changes to this document's sections.
+        """
+        sections = self.sections
+        if not isinstance(index, slice):
+            return sections[index]
+        if isinstance(sections, SectionView):
+            view = sections[index]
+        else:
+            view = SectionView(sections, range(len(sections))[index])
+        return MarkdownDocument(view, self.path)
+
+    def __iter__(self) -> Iterator[ParsedSection]:
+        """Iterates lazily over the sections, in document order."""
+        return iter(self.sections)
+
+    def search(
+        self,
+        pattern: Union[str, Pattern[str]],
+        types: Optional[Iterable[SectionType]] = None,
+        flags: int = 0,
+    ) -> Iterator[Tuple[int, Tuple[int, int], Match[str]]]:
+        """
+        Lazily finds the matches of a regex in the content of the sections.
+
+        The pattern runs once over a single buffer holding the content of every
+        section, ``"\\n"``-separated, rather than once per section: each match
+        is mapped back to its section by bisecting the offsets of the sections.
+        The buffer is built on first use and kept until the sections change.
+
+        A match never spans two sections: one that would is searched again
+        within its first section. The anchors ``^`` and ``$`` apply to the
+        buffer, so pass ``re.MULTILINE`` to anchor them at the start and end of
+        each section, as well as of each line. Lookarounds can see past the ends
+        of a section.
 
-    def search(self): ...
+        :param pattern: The regex, as a string or compiled pattern.
+        :param types: The section types to search; all of them by default.
+        :param flags: `re` flags to compile a string pattern with.
+        :raises re.error: If `pattern` is not a valid regex.
+        :return: An iterator over ``(index, (start, end), match)`` tuples in
+            document order, where `index` is the position of the section and
+            ``(start, end)`` the span of the match within its content. Spans of
+            the match object itself are offsets in the buffer.
+        """
+        regex = re.compile(pattern, flags)
+        selected = None
+        if types is not None:
+            index = self._section_index()
+            selected = bytearray(len(self.sections))
+            for sec_type in set(types):
+                for i in index.get(sec_type, ()):
+                    selected[i] = 1
+        return self._search(regex, selected)
 
-    """Should allow the user to search by regex"""
+    def _search(
+        self, regex: Pattern[str], selected: Optional[bytearray]
+    ) -> Iterator[Tuple[int, Tuple[int, int], Match[str]]]:
+        buffer, starts, ends = self._search_source()
+        n_sections = len(starts)
+        # The section of the last match, kept until a match starts past it
+        i = -1
+        start = end = next_start = 0
+        skip = False
+        pos = 0
+        while n_sections and pos <= len(buffer):
+            for match in regex.finditer(buffer, pos):
+                m_start, m_end = match.span()
+                if m_start >= next_start:
+                    i = bisect_right(starts, m_start) - 1
+                    start, end = starts[i], ends[i]
+                    next_start = ends[i] + 1
+                    skip = selected is not None and not selected[i]
+                if skip:
+                    break
+                if m_end > end:
+                    # The match runs into the next section: search this one alone
+                    for match in regex.finditer(buffer, m_start, end):
+                        m_start, m_end = match.span()
+                        yield i, (m_start - start, m_end - start), match
+                    break
+                yield i, (m_start - start, m_end - start), match
+            else:
+                return
+            # Go on from the next section
+            pos = next_start
+
+    def _search_source(self) -> Tuple[str, array, array]:
+        # A buffer holding the content of every section and the offsets of each
+        # section within it
+        sections = self.sections
+        cached = self._search_buffer
+        if cached is not None and len(cached[1]) == len(sections):
+            return cached
+        if isinstance(sections, SectionTable):
+            # Sliced from the shared text, whose gaps between sections hold markup
+            text = sections.text
+            spans = zip(sections.starts, sections.ends)
+            contents = [text[start:end] for start, end in spans]
+        else:
+            contents = [section.content for section in sections]
+        # Each section is followed by a "\n", so its end is the next start minus 1
+        starts = array("q", [0])
+        starts.extend(accumulate(len(content) + 1 for content in contents))
+        ends = array("q", [start - 1 for start in islice(starts, 1, None)])
+        del starts[-1]
+        source = ("\n".join(contents), starts, ends)
+        if not isinstance(sections, SectionView):
+            object.__setattr__(self, "_search_buffer", source)
+        return source
 
     def plain_markdown(self): ...
 
     """Should reconstruct markdown from the self.sections"""
+
+
+class FrozenDocument(MarkdownDocument):
+    """
+    An immutable snapshot of a `MarkdownDocument`, returned by its `freeze`.
+
+    The sections are a tuple of `FrozenSection` and neither the snapshot nor its
+    sections can be changed, so a snapshot can be shared between threads without
+    copying; `copy.copy` and `copy.deepcopy` return it as is. Snapshots are
+    hashable, and usable as dict or cache keys: the hash of the sections is
+    computed on first use and cached. Two snapshots are equal when they have the
+    same path and equal sections.
+
+    A snapshot keeps neither the source spans of the document nor what
+    `apply_edit` needs; `thaw` returns a mutable copy.
+    """
+
+    def __init__(self, document: MarkdownDocument) -> None:
+        super().__init__(
+            tuple(map(_frozen_section, document.sections)),  # type: ignore[arg-type]
+            document.path,
+        )
+        self.truncated = document.truncated
+        self._hash: Optional[int] = None
+        self._frozen = True
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"cannot assign to {name!r} of a frozen document")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"cannot delete {name!r} of a frozen document")
+
+    def add_section(self, section: ParsedSection) -> None:
+        raise TypeError("cannot add a section to a frozen document")
+
+    def close(self) -> None:
+        """Does nothing: a snapshot holds no source buffer."""
+
+    def freeze(self) -> "FrozenDocument":
+        return self
+
+    def thaw(self) -> MarkdownDocument:
+        """Returns a mutable copy of the snapshot."""
+        document = MarkdownDocument(
+            [ParsedSection(s.type, s.content, s.depth, s.meta) for s in self.sections],
+            self.path,
+        )
+        document.truncated = self.truncated
+        return document
+
+    def __hash__(self) -> int:
+        # Threads racing to fill the cache compute the same value
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(self.sections))
+        return self._hash  # type: ignore[return-value]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FrozenDocument):
+            return NotImplemented
+        if self is other:
+            return True
+        if self._hash is not None and other._hash is not None:
+            if self._hash != other._hash:
+                return False
+        return self.path == other.path and self.sections == other.sections
+
+    def __reduce_ex__(self, protocol: int) -> Tuple[Any, ...]:
+        # Pickled as a mutable document, which has a faster reduction
+        return _freeze, (self.thaw(),)
+
+    def __copy__(self) -> "FrozenDocument":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "FrozenDocument":
+        return self
+
+
+def _freeze(document: MarkdownDocument) -> FrozenDocument:
+    return document.freeze()
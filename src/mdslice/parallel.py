@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import io
+import os
+import re
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import FrozenSet, List, Optional, Tuple
+
+from .constants import _FENCE_CLOSE_RE, _FENCE_OPEN_RE
+from .models import MarkdownDocument, ParsedSection, SectionType
+from .parser import iter_sections
+
+# Smallest chunk worth shipping to another process
+MIN_CHUNK_SIZE = 1 << 20
+
+# Lines whose first non-space character could open or close a fence
+_FENCE_LINE_RE = re.compile(r"^[^\S\n]*[`~]{3,}.*$", re.MULTILINE)
+# A blank line, matched from the line break that precedes it
+_BLANK_LINE_RE = re.compile(r"\n[^\S\n]*(?:\n|$)")
+
+
+def fenced_ranges(text: str) -> List[Tuple[int, int]]:
+    """
+    Finds the spans of all fenced code blocks in `text` without parsing it.
+
+    Whether a line opens or closes a fence only depends on the fence state, never on
+    the surrounding sections, so scanning the candidate lines with the parser's fence
+    rules gives exactly the code blocks `parse_lines` would see. Lines end at
+    ``"\\n"``, as in a file read in text mode.
+
+    :param text: The Markdown text to scan.
+    :return: Sorted ``(start, end)`` offsets, from the start of each opening fence
+        line to the end of its closing fence line, or of `text` if it never closes.
+    """
+    ranges: List[Tuple[int, int]] = []
+    start = -1
+    fence_char = ""
+    fence_len = 0
+    for match in _FENCE_LINE_RE.finditer(text):
+        stripped = match.group().strip()
+        if start < 0:
+            m_open = _FENCE_OPEN_RE.match(stripped)
+            if m_open:
+                start = match.start()
+                fence_char = m_open.group(1)[0]
+                fence_len = len(m_open.group(1))
+        else:
+            m_close = _FENCE_CLOSE_RE.match(stripped)
+            if (
+                m_close
+                and m_close.group(1)[0] == fence_char
+                and len(m_close.group(1)) >= fence_len
+            ):
+                ranges.append((start, match.end()))
+                start = -1
+    if start >= 0:
+        ranges.append((start, len(text)))
+    return ranges
+
+
+def split_points(text: str, n_chunks: int) -> List[int]:
+    """
+    Picks up to ``n_chunks - 1`` offsets that split `text` into independent chunks.
+
+    Every offset is the start of the line following a blank line outside fenced code.
+    A blank line flushes the open section and leaves the parser in its initial state,
+    so each chunk parses to exactly the sections it contributes to the whole text,
+    including setext headers and paragraph continuations, which cannot span a blank
+    line.
+
+    :param text: The Markdown text to split.
+    :param n_chunks: The number of chunks wanted.
+    :return: Strictly increasing offsets in ``(0, len(text))``.
+    """
+    ranges = fenced_ranges(text)
+    starts = [start for start, _ in ranges]
+    target = len(text) // max(n_chunks, 1)
+    points: List[int] = []
+    pos = target
+    while target and pos < len(text) and len(points) < n_chunks - 1:
+        match = _BLANK_LINE_RE.search(text, pos)
+        if match is None:
+            break
+        blank = match.start() + 1
+        i = bisect_right(starts, blank) - 1
+        if i >= 0 and blank < ranges[i][1]:
+            # Inside a code block: look again past its closing fence
+            pos = ranges[i][1]
+            continue
+        point = match.end()
+        if point >= len(text):
+            break
+        points.append(point)
+        pos = max(point, target * (len(points) + 1))
+    return points
+
+
+def _parse_chunk(
+    chunk: str, types: Optional[FrozenSet[SectionType]] = None
+) -> MarkdownDocument:
+    # A document, rather than a list, goes back to the parent in a few buffers
+    sections = iter_sections(io.StringIO(chunk, newline="\n"), include=types)
+    return MarkdownDocument(list(sections))
+
+
+def parse_text_parallel(
+    text: str,
+    workers: Optional[int] = None,
+    min_chunk_size: int = MIN_CHUNK_SIZE,
+    types: Optional[FrozenSet[SectionType]] = None,
+) -> MarkdownDocument:
+    """
+    Parses `text` in a pool of processes, as `parse_lines` would on its lines.
+
+    The text is cut at `split_points` into a few chunks per worker, no more than
+    one per `min_chunk_size` characters, the chunks are parsed concurrently, and
+    their section lists are concatenated in order. Lines end at ``"\\n"``, as in a
+    file read in text mode. Text too short to be worth splitting is parsed in this
+    process.
+
+    :param text: The Markdown text to parse.
+    :param workers: Number of worker processes; None or 0 uses `os.cpu_count()`.
+    :param min_chunk_size: Smallest chunk, in characters, sent to a worker.
+    :param types: The section types to build, or None to build all of them.
+    :return: The parsed document.
+    :rtype: MarkdownDocument
+    """
+    workers = workers or os.cpu_count() or 1
+    # A few chunks per worker evens out chunks that parse slower than others
+    n_chunks = min(workers * 4, len(text) // max(min_chunk_size, 1))
+    points = split_points(text, n_chunks) if workers > 1 else []
+    if not points:
+        return _parse_chunk(text, types)
+
+    bounds = [0, *points, len(text)]
+    chunks = [text[start:end] for start, end in zip(bounds, bounds[1:])]
+    sections: List[ParsedSection] = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        for chunk_doc in pool.map(partial(_parse_chunk, types=types), chunks):
+            sections.extend(chunk_doc.sections)
+    return MarkdownDocument(sections)
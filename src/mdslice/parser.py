@@ -1,53 +1,769 @@
 from __future__ import annotations
 
-from typing import List, Optional, Iterable, Any
-
-from .constants import (
-    _HEADER_RE,
-    _FENCE_OPEN_RE,
-    _FENCE_CLOSE_RE,
-    _SETEXT_H1_RE,
-    _SETEXT_H2_RE,
-    PATTERNS,
+import copy
+import io
+from bisect import bisect_right
+from collections import deque
+from itertools import chain, islice
+from typing import (
+    Any,
+    AnyStr,
+    Callable,
+    Deque,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
 )
-from .models import ParsedSection, SectionType, MarkdownDocument
+
+from .constants import BYTES_GRAMMAR, TEXT_GRAMMAR, Grammar
+from .models import (
+    EncodedSection,
+    MappedSection,
+    intern_meta,
+    ParsedSection,
+    SectionTable,
+    SectionType,
+    SourceSpans,
+    MarkdownDocument,
+)
+from .pool import ContentPool
+
+SectionFactory = Callable[..., ParsedSection]
 
 
 def _flush(
-    buffer: List[str],
-    md: MarkdownDocument,
+    buffer: List[AnyStr],
+    make_section: SectionFactory,
     sec_type: SectionType,
     header_depth: int = 0,
     meta: Optional[dict[str, Any]] = None,
-) -> None:
+    grammar: Grammar = TEXT_GRAMMAR,
+) -> Optional[ParsedSection]:
     """
-    Flushes the provided buffer content into a MarkdownDocument section and clears the buffer.
+    Builds a section from the provided buffer content and clears the buffer.
 
-    This function processes the accumulated text content in the buffer and appends it as a
-    section to the specified MarkdownDocument instance. It is primarily responsible for creating
-    a section with the given type, content, header depth, and optional metadata. Once the section
-    is added, the buffer is cleared to allow for subsequent content accumulation.
+    This function joins the accumulated lines in the buffer, strips the trailing line
+    ending and hands the result to `make_section` together with the given type, header
+    depth, and optional metadata. Once the section is built, the buffer is cleared to
+    allow for subsequent content accumulation.
 
-    :param buffer: A list of strings representing the accumulated content to process and add
-        to the MarkdownDocument. If empty, no operation will be performed.
-    :param md: The MarkdownDocument instance to which the new section will be added.
+    :param buffer: A list of lines representing the accumulated content of the section.
+        If empty, no section is built.
+    :param make_section: Callable building the section, usually `ParsedSection`.
     :param sec_type: The SectionType defining the type of section to be created.
     :param header_depth: The depth of the section's header, often based on its hierarchical
         level. Default is 0.
     :param meta: An optional dictionary containing metadata associated with the section.
+    :param grammar: The grammar matching the type of the buffered lines.
 
-    :return: None
+    :return: The new section, or None if the buffer was empty.
     """
     if not buffer:
+        return None
+    content = grammar.empty.join(buffer).rstrip(grammar.newline_chars)
+    buffer.clear()
+    return make_section(sec_type, content, header_depth, meta)
+
+
+def _buffer_span(
+    buffer: List[AnyStr], end: int, strip_chars: AnyStr
+) -> Tuple[int, int]:
+    """
+    Locates the content `_flush` would build from `buffer` in the source.
+
+    :param buffer: The buffered lines, which are contiguous in the source.
+    :param end: Offset just past the last buffered line.
+    :param strip_chars: The line ending characters `_flush` strips.
+    :return: The ``(start, end)`` offsets of the stripped content.
+    """
+    start = end - sum(map(len, buffer))
+    for line in reversed(buffer):
+        trimmed = line.rstrip(strip_chars)
+        end -= len(line) - len(trimmed)
+        if trimmed:
+            break
+    return start, end
+
+
+def _selected_types(
+    include: Optional[Iterable[SectionType]] = None,
+    exclude: Optional[Iterable[SectionType]] = None,
+) -> Optional[FrozenSet[SectionType]]:
+    """
+    Resolves the `include` and `exclude` arguments of the parse entry points.
+
+    :param include: The section types to build, or None for all of them.
+    :param exclude: Section types not to build, or None.
+    :raises ValueError: If a value is not a `SectionType`.
+    :return: The section types to build, or None to build all of them.
+    """
+    if include is None and exclude is None:
+        return None
+    if include is None:
+        include = SectionType
+    types = frozenset(map(SectionType, include))
+    if exclude is not None:
+        types -= frozenset(map(SectionType, exclude))
+    return types
+
+
+def _pooled(make_section: SectionFactory, pool: ContentPool) -> SectionFactory:
+    # Wraps a content-taking section factory to share content through `pool`
+    intern = pool.intern
+
+    def make_pooled(sec_type, content, depth, meta):
+        return make_section(sec_type, intern(content), depth, meta)
+
+    return make_pooled
+
+
+def _code_meta(sec_type: SectionType, code_lang: Optional[str]) -> Optional[dict]:
+    # Code blocks of the same language share one immutable meta mapping
+    if sec_type == SectionType.CODE and code_lang:
+        return intern_meta(lang=code_lang)
+    return None
+
+
+class _LineParser:
+    """
+    The line-by-line state machine behind every parse entry point.
+
+    The parser state (current buffer and type, fence character and length, code
+    language, source offset) lives on the instance, so a document can be fed in
+    several pieces. `feed` yields every section finalized by the given lines and
+    `close` yields the section still open at the end of the input.
+
+    By default sections are built as ``make_section(type, content, depth, meta)``.
+    With `spans` set, content is never joined and sections are built as
+    ``make_section(type, start, end, depth, meta)`` instead, where the offsets
+    locate the content within the concatenated lines.
+
+    If given, `on_span` is called with the ``[start, end)`` range of lines each
+    section consumed and the offsets of those lines, as
+    ``on_span(start_line, end_line, start, end)``, just before the section is
+    yielded. Blank lines outside code blocks belong to no section.
+
+    If `types` is given, only sections of those types are built. Lines of the other
+    types still drive the state transitions but are never buffered, except for
+    paragraphs when headers are wanted, since a setext underline turns the buffered
+    paragraph into a header.
+
+    :ivar grammar: Rules and literals matching the type of the fed lines.
+    :ivar make_section: Callable building a section.
+    :ivar spans: Whether `make_section` takes offsets instead of content.
+    :ivar on_span: Optional callable receiving the source span of each section.
+    :ivar types: The section types to build, or None to build all of them.
+    :ivar pos: Offset just past the last line fed so far.
+    :ivar line_no: Number of lines fed so far.
+    """
+
+    def __init__(
+        self,
+        grammar: Grammar = TEXT_GRAMMAR,
+        make_section: SectionFactory = ParsedSection,
+        spans: bool = False,
+        on_span: Optional[Callable[[int, int, int, int], Any]] = None,
+        types: Optional[FrozenSet[SectionType]] = None,
+    ) -> None:
+        self.grammar = grammar
+        self.make_section = make_section
+        self.spans = spans
+        self.on_span = on_span
+        self.types = types
+        # Whether to build, and whether to buffer, each type, indexed by its value
+        self._wanted = [
+            types is None or t in types for t in range(max(SectionType) + 1)
+        ]
+        self._buffered = list(self._wanted)
+        if types is not None and SectionType.HEADER in types:
+            self._buffered[SectionType.PARAGRAPH] = True
+        self.pos = 0
+        self.line_no = 0
+        self.buffer: List[AnyStr] = []
+        self.current_type: SectionType = SectionType.NONE
+        self.in_code_block = False
+        self.fence_char = grammar.empty
+        self.fence_len = 0
+        self.code_lang: Optional[str] = None
+
+    def _build(
+        self, sec_type: SectionType, code_lang: Optional[str], end: int, end_line: int
+    ) -> Optional[ParsedSection]:
+        # Builds the buffered section of `sec_type`, ending at offset `end` and
+        # just before line `end_line`
+        buffer = self.buffer
+        if not self._wanted[sec_type]:
+            # A paragraph only buffered in case it turned into a setext header
+            buffer.clear()
+            return None
+        meta = _code_meta(sec_type, code_lang)
+        if buffer and self.on_span is not None:
+            self.on_span(
+                end_line - len(buffer), end_line, end - sum(map(len, buffer)), end
+            )
+        if not self.spans:
+            return _flush(
+                buffer, self.make_section, sec_type, meta=meta, grammar=self.grammar
+            )
+        if not buffer:
+            return None
+        start, end = _buffer_span(buffer, end, self.grammar.newline_chars)
+        buffer.clear()
+        return self.make_section(sec_type, start, end, 0, meta)
+
+    def copy(self) -> "_LineParser":
+        """Returns an independent parser in the same state."""
+        clone = copy.copy(self)
+        clone.buffer = list(self.buffer)
+        return clone
+
+    def close(self) -> Iterator[ParsedSection]:
+        if self.current_type != SectionType.NONE:
+            section = self._build(
+                self.current_type, self.code_lang, self.pos, self.line_no
+            )
+            if section is not None:
+                yield section
+        self.current_type = SectionType.NONE
+        self.code_lang = None
+
+    def feed(self, lines: Iterable[AnyStr]) -> Iterator[ParsedSection]:
+        g = self.grammar
+        make_section = self.make_section
+        build = self._build
+        spans = self.spans
+        on_span = self.on_span
+        empty = g.empty
+        nbsp = g.nbsp
+        fence_chars = g.fence_chars
+        header_char = g.header_char
+        setext_chars = g.setext_chars
+        patterns_by_first_char = g.patterns_by_first_char
+        strip = g.strip
+        lstrip = g.lstrip
+        wanted = self._wanted
+        buffered = self._buffered
+        keep_code = buffered[SectionType.CODE]
+        keep_paragraph = buffered[SectionType.PARAGRAPH]
+
+        # The state lives in locals while the loop runs and is stored back on exit
+        current_buffer = self.buffer
+        current_type = self.current_type
+        in_code_block = self.in_code_block
+        fence_char = self.fence_char
+        fence_len = self.fence_len
+        code_lang = self.code_lang
+        pos = self.pos
+        line_no = self.line_no
+
+        def flush_current(end: int, end_line: int) -> Optional[ParsedSection]:
+            nonlocal current_type, code_lang
+            if current_type == SectionType.NONE:
+                return None
+            section = build(current_type, code_lang, end, end_line)
+            current_type = SectionType.NONE
+            code_lang = None
+            return section
+
+        try:
+            for raw_line in lines:
+                line_start = pos
+                pos += len(raw_line)
+                line_no += 1
+                stripped = strip(raw_line)
+
+                if in_code_block:
+                    if keep_code:
+                        current_buffer.append(raw_line)
+                    m_close = g.fence_close.match(stripped)
+                    if (
+                        m_close
+                        and fence_char
+                        and m_close.group(1)[:1] == fence_char
+                        and len(m_close.group(1)) >= fence_len
+                    ):
+                        section = flush_current(pos, line_no)
+                        if section is not None:
+                            yield section
+                        in_code_block = False
+                        fence_char = empty
+                        fence_len = 0
+                    continue
+
+                # Blank line flushes
+                if stripped == empty or stripped == nbsp:
+                    section = flush_current(line_start, line_no - 1)
+                    if section is not None:
+                        yield section
+                    continue
+
+                # Only try the rules that can match the first non-space character
+                first = stripped[:1]
+
+                if first in fence_chars:
+                    m_open = g.fence_open.match(stripped)
+                    if m_open:
+                        section = flush_current(line_start, line_no - 1)
+                        if section is not None:
+                            yield section
+                        fence = m_open.group(1)
+                        rest = strip(m_open.group(2) or empty)
+                        code_lang = g.to_str(g.split(rest)[0]) if rest else None
+                        in_code_block = True
+                        current_type = SectionType.CODE
+                        fence_char = fence[:1]
+                        fence_len = len(fence)
+                        if keep_code:
+                            current_buffer.append(raw_line)
+                        continue
+
+                # Header
+                elif first == header_char:
+                    m_header = g.header.match(stripped)
+                    if m_header:
+                        section = flush_current(line_start, line_no - 1)
+                        if section is not None:
+                            yield section
+                        if not wanted[SectionType.HEADER]:
+                            continue
+                        hashes, content = m_header.groups()
+                        if on_span is not None:
+                            on_span(line_no - 1, line_no, line_start, pos)
+                        if spans:
+                            start = (
+                                line_start
+                                + len(raw_line)
+                                - len(lstrip(raw_line))
+                                + m_header.start(2)
+                                + len(content)
+                                - len(lstrip(content))
+                            )
+                            content = strip(content)
+                            yield make_section(
+                                SectionType.HEADER,
+                                start,
+                                start + len(content),
+                                len(hashes),
+                                None,
+                            )
+                        else:
+                            yield make_section(
+                                SectionType.HEADER, strip(content), len(hashes), None
+                            )
+                        continue
+
+                # Setext Header
+                elif first in setext_chars and current_type == SectionType.PARAGRAPH:
+                    h1 = first == g.setext_h1_char
+                    if (g.setext_h1 if h1 else g.setext_h2).match(stripped):
+                        # Re-interpret previous paragraph as header
+                        if not wanted[SectionType.HEADER]:
+                            current_buffer.clear()
+                            current_type = SectionType.NONE
+                            continue
+                        depth = 1 if h1 else 2
+                        if on_span is not None:
+                            on_span(
+                                line_no - 1 - len(current_buffer),
+                                line_no,
+                                line_start - sum(map(len, current_buffer)),
+                                pos,
+                            )
+                        if spans:
+                            head, tail = current_buffer[0], current_buffer[-1]
+                            start = (
+                                line_start
+                                - sum(map(len, current_buffer))
+                                + len(head)
+                                - len(lstrip(head))
+                            )
+                            end = line_start - (len(tail) - len(g.rstrip(tail)))
+                            section = make_section(
+                                SectionType.HEADER, start, end, depth, None
+                            )
+                        else:
+                            content = strip(empty.join(current_buffer))
+                            section = make_section(
+                                SectionType.HEADER, content, depth, None
+                            )
+                        current_buffer.clear()
+                        current_type = SectionType.NONE
+                        yield section
+                        continue
+
+                # Pattern search for list, table, etc.
+                patterns = patterns_by_first_char.get(first)
+                if patterns is None:
+                    patterns = g.list_patterns if first.isdigit() else ()
+                matched = False
+                for regex, sec_type in patterns:
+                    if regex.match(stripped):
+                        if sec_type == SectionType.IMAGE:
+                            section = flush_current(line_start, line_no - 1)
+                            if section is not None:
+                                yield section
+                            if wanted[sec_type]:
+                                if on_span is not None:
+                                    on_span(line_no - 1, line_no, line_start, pos)
+                                if spans:
+                                    start = line_start + len(raw_line)
+                                    start -= len(lstrip(raw_line))
+                                    end = start + len(stripped)
+                                    yield make_section(sec_type, start, end, 0, None)
+                                else:
+                                    yield make_section(sec_type, stripped, 0, None)
+                        else:
+                            if current_type not in (SectionType.NONE, sec_type):
+                                section = flush_current(line_start, line_no - 1)
+                                if section is not None:
+                                    yield section
+                            current_type = sec_type
+                            if buffered[sec_type]:
+                                current_buffer.append(raw_line)
+                        matched = True
+                        break
+
+                # Flush last section
+                if not matched:
+                    if current_type not in (SectionType.NONE, SectionType.PARAGRAPH):
+                        section = flush_current(line_start, line_no - 1)
+                        if section is not None:
+                            yield section
+                    current_type = SectionType.PARAGRAPH
+                    if keep_paragraph:
+                        current_buffer.append(raw_line)
+        finally:
+            self.current_type = current_type
+            self.in_code_block = in_code_block
+            self.fence_char = fence_char
+            self.fence_len = fence_len
+            self.code_lang = code_lang
+            self.pos = pos
+            self.line_no = line_no
+
+
+def iter_sections(
+    lines: Iterable[str],
+    include: Optional[Iterable[SectionType]] = None,
+    exclude: Optional[Iterable[SectionType]] = None,
+) -> Iterator[ParsedSection]:
+    """
+    Lazily parses an iterable of strings, yielding each section once it is complete.
+
+    This runs the same state machine as `parse_lines`, but hands every section to the
+    caller as soon as it is finalized instead of collecting them into a document, so
+    the first sections are available before the input has been read to the end and
+    memory does not grow with the document.
+
+    :param lines: An iterable of strings representing lines of a Markdown document.
+    :param include: Section types to build, see `parse_lines`.
+    :param exclude: Section types to skip, see `parse_lines`.
+    :return: An iterator over the parsed sections, in document order.
+    """
+    parser = _LineParser(types=_selected_types(include, exclude))
+    yield from parser.feed(lines)
+    yield from parser.close()
+
+
+class PushParser:
+    """
+    Incremental parser for Markdown that arrives in arbitrary chunks.
+
+    Text is pushed with `feed` as it arrives; each section is passed to `on_section`
+    as soon as it is finalized, and the parser state is kept between calls, so each
+    chunk only costs time proportional to its own size (plus the partial line it
+    completes). Lines end at ``"\n"``, so for text with ``"\n"`` or ``"\r\n"`` line
+    endings the sections match `from_text` on the concatenated chunks. Call `close`
+    once the input is complete to emit what is still open.
+
+    By default finalized sections are appended to `queue`, to be consumed by the
+    caller::
+
+        parser = PushParser()
+        for chunk in stream:
+            parser.feed(chunk)
+            while parser.queue:
+                render(parser.queue.popleft())
+            render_preview(parser.tail)
+        parser.close()
+
+    :ivar on_section: Callable receiving each finalized section.
+    :ivar queue: Finalized sections not yet consumed, when no `on_section` callable
+        was given.
+    :type queue: Deque[ParsedSection]
+    """
+
+    def __init__(
+        self, on_section: Optional[Callable[[ParsedSection], Any]] = None
+    ) -> None:
+        self.queue: Deque[ParsedSection] = deque()
+        self.on_section = on_section if on_section is not None else self.queue.append
+        self._parser = _LineParser()
+        self._partial: List[str] = []
+        self._closed = False
+
+    def feed(self, chunk: str) -> None:
+        """
+        Pushes the next chunk of text, emitting every section it finalizes.
+
+        :param chunk: Any piece of the document, not necessarily ending at a line break.
+        :raises ValueError: If the parser has been closed.
+        """
+        if self._closed:
+            raise ValueError("feed() called on a closed PushParser")
+        end = chunk.rfind("\n") + 1
+        if not end:
+            self._partial.append(chunk)
+            return
+        head = chunk[:end]
+        if self._partial:
+            self._partial.append(head)
+            head = "".join(self._partial)
+            self._partial.clear()
+        if end < len(chunk):
+            self._partial.append(chunk[end:])
+        on_section = self.on_section
+        for section in self._parser.feed(io.StringIO(head, newline="\n")):
+            on_section(section)
+
+    @property
+    def tail(self) -> List[ParsedSection]:
+        """
+        The sections still open at this point of the stream: what `close` would emit
+        if the input ended here, including the unterminated last line. The parser
+        state is left untouched. Usually a single section; building it costs time
+        proportional to the open sections, not to the document.
+        """
+        preview = self._parser.copy()
+        partial = "".join(self._partial)
+        sections = list(preview.feed([partial] if partial else []))
+        sections.extend(preview.close())
+        return sections
+
+    def close(self) -> None:
+        """
+        Ends the input, emitting the unterminated last line and the open section.
+        Closing twice does nothing.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        partial = "".join(self._partial)
+        self._partial.clear()
+        on_section = self.on_section
+        for section in self._parser.feed([partial] if partial else []):
+            on_section(section)
+        for section in self._parser.close():
+            on_section(section)
+
+
+# Characters `str.splitlines` breaks lines at
+_LINE_BREAKS = frozenset("\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029")
+
+
+class _EditableSource:
+    """
+    The source lines of a document and the span of source each section consumed.
+
+    This is what `MarkdownDocument.apply_edit` needs to reparse only the part of a
+    document an edit can affect. Sections are ordered and never overlap, and the
+    lines no section covers are exactly the blank lines outside code blocks: the
+    points where the parser is back in its initial state.
+
+    :ivar lines: The source lines, with their line endings.
+    :ivar spans: The document's spans, kept up to date with each edit.
+    """
+
+    def __init__(self, lines: List[str], spans: SourceSpans) -> None:
+        self.lines = lines
+        self.spans = spans
+
+    def _is_gap(self, line: int) -> bool:
+        starts, ends, _, _ = self.spans._shifted_columns()
+        i = bisect_right(starts, line) - 1
+        return i < 0 or line >= ends[i]
+
+    def _resync_line(self, line: int) -> int:
+        # The nearest line at or before `line` that follows a gap line, or 0
+        starts, ends, _, _ = self.spans._shifted_columns()
+        i = bisect_right(starts, line - 1) - 1
+        while line > 0 and i >= 0 and ends[i] > line - 1:
+            line = starts[i]
+            i -= 1
+        return line
+
+    def _offset(self, line: int) -> int:
+        # The source offset of `line`, counted from the end of the last section
+        # before it
+        _, end_lines, _, ends = self.spans._shifted_columns()
+        i = bisect_right(end_lines, line) - 1
+        if i < 0:
+            return sum(map(len, self.lines[:line]))
+        return ends[i] + sum(map(len, self.lines[end_lines[i] : line]))
+
+    def _whole_lines(self, start: int, end: int, text: str) -> Tuple[int, int, str]:
+        # Widens the edit until splitting it gives the lines `from_text` would give
+        # for the edited document: the lines around it must end with a line break,
+        # so must `text` unless it runs to the end, and no "\r\n" pair may straddle
+        # either end.
+        lines = self.lines
+        while True:
+            if start > 0:
+                previous = lines[start - 1]
+                following = text or (lines[end] if end < len(lines) else "")
+                if previous[-1] not in _LINE_BREAKS or (
+                    previous.endswith("\r") and following.startswith("\n")
+                ):
+                    start -= 1
+                    text = previous + text
+                    continue
+            if end < len(lines) and text:
+                if text[-1] not in _LINE_BREAKS or (
+                    text.endswith("\r") and lines[end].startswith("\n")
+                ):
+                    text += lines[end]
+                    end += 1
+                    continue
+            return start, end, text
+
+    def apply(
+        self, md: MarkdownDocument, start_line: int, end_line: int, new_text: str
+    ) -> Tuple[int, int]:
+        lines = self.lines
+        if not 0 <= start_line <= end_line <= len(lines):
+            raise ValueError(
+                f"invalid line range [{start_line}, {end_line}) for a document "
+                f"of {len(lines)} lines"
+            )
+        start, end, new_text = self._whole_lines(start_line, end_line, new_text)
+        new_lines = new_text.splitlines(keepends=True)
+        delta = len(new_lines) - (end - start)
+        shift = len(new_text) - sum(map(len, lines[start:end]))
+        resync = self._resync_line(start)
+
+        # Reparse from the resync point until the new parse reaches a blank line
+        # outside code after the edit that was also one in the old parse
+        parser = _LineParser()
+        parser.line_no = resync
+        parser.pos = self._offset(resync)
+        new_spans = SourceSpans()
+        parser.on_span = new_spans.add
+        lines[start:end] = new_lines
+        edit_end = start + len(new_lines)
+        new_sections: List[ParsedSection] = []
+        converged_at = None
+        for j in range(resync, len(lines)):
+            line = lines[j]
+            stripped = line.strip()
+            is_gap = not parser.in_code_block and stripped in ("", "&nbsp;")
+            new_sections.extend(parser.feed((line,)))
+            if is_gap and j >= edit_end and self._is_gap(j - delta):
+                converged_at = j - delta
+                break
+        else:
+            new_sections.extend(parser.close())
+
+        # Splice the reparsed sections in and shift the spans after them
+        spans = self.spans
+        start_lines, end_lines, _, _ = spans._shifted_columns()
+        first = bisect_right(end_lines, resync)
+        if converged_at is None:
+            stop = len(spans)
+        else:
+            stop = bisect_right(start_lines, converged_at)
+        md.sections[first:stop] = new_sections
+        spans._replace(first, stop, new_spans, delta, shift)
+        return first, first + len(new_sections)
+
+
+def _parse_into(
+    md: MarkdownDocument,
+    parser: _LineParser,
+    lines: Iterable[AnyStr],
+    max_sections: Optional[int] = None,
+    max_lines: Optional[int] = None,
+    stop_when: Optional[Callable[[ParsedSection], bool]] = None,
+    spans: bool = False,
+) -> None:
+    """
+    Feeds `lines` to `parser` and adds the sections to `md`, stopping early once a
+    limit is reached.
+
+    Parsing stops after the `max_sections`-th section, or after the first section
+    for which `stop_when` returns true, which are both kept, or once `max_lines`
+    lines have been read, in which case the section open at that line is kept as
+    if the input ended there. No line past the stopping point is read, except one
+    to tell whether the input had more to it; if it did, `md.truncated` is set.
+
+    :param md: The document receiving the sections.
+    :param parser: A fresh parser.
+    :param lines: The lines to parse.
+    :param max_sections: Maximum number of sections to build.
+    :param max_lines: Maximum number of lines to read.
+    :param stop_when: Predicate called with each section; parsing stops after the
+        first section it returns true for.
+    :param spans: Whether to record the source span of each section in `md.spans`.
+    :raises ValueError: If `max_sections` is lower than 1 or `max_lines` is negative.
+    """
+    if not spans:
+        _add_sections(md, parser, lines, max_sections, max_lines, stop_when)
+        return
+    source_spans = SourceSpans()
+    parser.on_span = source_spans.add
+    _add_sections(md, parser, lines, max_sections, max_lines, stop_when)
+    # Sections parsed only to tell whether the input was truncated are not kept
+    source_spans._truncate(len(md.sections))
+    md.spans = source_spans
+
+
+def _add_sections(
+    md: MarkdownDocument,
+    parser: _LineParser,
+    lines: Iterable[AnyStr],
+    max_sections: Optional[int],
+    max_lines: Optional[int],
+    stop_when: Optional[Callable[[ParsedSection], bool]],
+) -> None:
+    if max_sections is None and max_lines is None and stop_when is None:
+        for section in chain(parser.feed(lines), parser.close()):
+            md.add_section(section)
         return
-    content = "".join(buffer).rstrip("\n")
-    md.add_section(
-        ParsedSection(type=sec_type, content=content, depth=header_depth, meta=meta)
+    if max_sections is not None and max_sections < 1:
+        raise ValueError(f"max_sections must be at least 1, got {max_sections}")
+    if max_lines is not None and max_lines < 0:
+        raise ValueError(f"max_lines must not be negative, got {max_lines}")
+
+    it = iter(lines)
+    sections = chain(
+        parser.feed(it if max_lines is None else islice(it, max_lines)),
+        parser.close(),
     )
-    buffer.clear()
+    count = 0
+    for section in sections:
+        md.add_section(section)
+        count += 1
+        if count == max_sections or (stop_when is not None and stop_when(section)):
+            # Whatever remains to be read or parsed is cut off. Once the input
+            # is exhausted, finishing the parse reads nothing more.
+            md.truncated = next(it, None) is not None or any(True for _ in sections)
+            return
+    md.truncated = max_lines is not None and next(it, None) is not None
 
 
-def parse_lines(lines: Iterable[str]) -> MarkdownDocument:
+def parse_lines(
+    lines: Iterable[str],
+    editable: bool = False,
+    include: Optional[Iterable[SectionType]] = None,
+    exclude: Optional[Iterable[SectionType]] = None,
+    max_sections: Optional[int] = None,
+    max_lines: Optional[int] = None,
+    stop_when: Optional[Callable[[ParsedSection], bool]] = None,
+    pool: Optional[ContentPool] = None,
+    spans: bool = False,
+) -> MarkdownDocument:
     """
     Parses an iterable of strings into a structured Markdown document.
 
@@ -57,117 +773,174 @@ def parse_lines(lines: Iterable[str]) -> MarkdownDocument:
     and other Markdown-specific features. The function ensures each recognized Markdown
     section is appropriately parsed and added to the hierarchical structure of the output.
 
+    With `editable` set, the lines are kept along with the range of lines behind each
+    section, so that `MarkdownDocument.apply_edit` can later reparse only what an edit
+    affects.
+
+    With `include` or `exclude` set, only sections of the selected types are built;
+    the lines of the other types are still read to track the parser state, but they
+    are never buffered or joined. This makes extracting a few section types, such as
+    code blocks, much cheaper than a full parse followed by filtering.
+
+    `max_sections`, `max_lines` and `stop_when` stop the parse, and the reading of
+    `lines`, early: after that many sections, after that many lines, or after the
+    first section `stop_when` returns true for. The document then holds the sections
+    parsed so far, and its `truncated` flag tells whether input was left unparsed.
+
+    With a `pool`, the content of every section goes through `ContentPool.intern`,
+    so identical contents across all documents parsed with that pool share a single
+    string.
+
+    With `spans` set, the document's `spans` records the lines each section consumed
+    and their character offsets within the concatenated `lines`, so that the markup
+    of a section can be sliced from the source or located in it without another
+    pass. Editable documents always record them.
+
     :param lines: An iterable of strings representing lines of a Markdown document.
         Each string should represent a single line, and newlines should already be stripped.
+    :param editable: Whether to keep what `MarkdownDocument.apply_edit` needs.
+    :param include: The section types to build; all of them by default.
+    :param exclude: Section types not to build, applied after `include`.
+    :param max_sections: Maximum number of sections to build.
+    :param max_lines: Maximum number of lines to read.
+    :param stop_when: Predicate called with each section; parsing stops after the
+        first section it returns true for.
+    :param pool: Optional pool to share section contents through.
+    :param spans: Whether to record the source span of each section.
+    :raises ValueError: If `editable` is combined with `include`, `exclude` or a
+        limit, which leave parts of the source without a section to reparse from,
+        a selected type is not a `SectionType`, or a limit is out of range.
     :return: A `MarkdownDocument` instance containing the structured representation of
         the parsed Markdown input.
     :rtype: MarkdownDocument
     """
+    types = _selected_types(include, exclude)
+    make_section = ParsedSection if pool is None else _pooled(ParsedSection, pool)
     md = MarkdownDocument()
-    current_buffer: List[str] = []
-    current_type: SectionType = SectionType.NONE
-    current_header_depth = 0
-
-    in_code_block = False
-    fence_char: str = ""
-    fence_len: int = 0
-    code_lang: Optional[str] = None
-
-    def flush_current():
-        nonlocal md, current_type, current_header_depth, code_lang
-        if current_type == SectionType.NONE:
-            return
+    if not editable:
+        parser = _LineParser(make_section=make_section, types=types)
+        _parse_into(md, parser, lines, max_sections, max_lines, stop_when, spans)
+        return md
+    if types is not None:
+        raise ValueError("editable cannot be combined with include or exclude")
+    if not (max_sections is None and max_lines is None and stop_when is None):
+        raise ValueError("editable cannot be combined with parse limits")
 
-        meta = (
-            {"lang": code_lang}
-            if current_type == SectionType.CODE and code_lang
-            else None
-        )
-        _flush(current_buffer, md, current_type, current_header_depth, meta=meta)
-        current_type = SectionType.NONE
-        current_header_depth = 0
-        code_lang = None
-
-    for raw_line in lines:
-        line = raw_line.rstrip("\n")
-        stripped = line.strip()
-
-        if in_code_block:
-            current_buffer.append(raw_line)
-            m_close = _FENCE_CLOSE_RE.match(stripped)
-            if (
-                m_close
-                and fence_char
-                and m_close.group(1)[0] == fence_char
-                and len(m_close.group(1)) >= fence_len
-            ):
-                flush_current()
-                in_code_block = False
-                fence_char = ""
-                fence_len = 0
-            continue
-
-        # Blank line flushes
-        if stripped == "" or stripped == "&nbsp;":
-            flush_current()
-            continue
-
-        m_open = _FENCE_OPEN_RE.match(stripped)
-        if m_open:
-            flush_current()
-            fence = m_open.group(1)
-            rest = (m_open.group(2) or "").strip()
-            code_lang = rest.split()[0] if rest else None
-            in_code_block = True
-            current_type = SectionType.CODE
-            fence_char = fence[0]
-            fence_len = len(fence)
-            current_buffer.append(raw_line)
-            continue
-
-        # Header
-        m_header = _HEADER_RE.match(stripped)
-        if m_header:
-            flush_current()
-            hashes, content = m_header.groups()
-            md.add_section(
-                ParsedSection(SectionType.HEADER, content.strip(), depth=len(hashes))
-            )
-            continue
-
-        # Setext Header
-        m1 = _SETEXT_H1_RE.match(stripped)
-        m2 = _SETEXT_H2_RE.match(stripped)
-        if (m1 or m2) and current_type == SectionType.PARAGRAPH:
-            # Re-interpret previous paragraph as header
-            content = "".join(current_buffer).strip()
-            current_buffer.clear()
-            current_type = SectionType.NONE
-            depth = 1 if m1 else 2
-            md.add_section(ParsedSection(SectionType.HEADER, content, depth=depth))
-            continue
-
-        # Pattern search for list, table, etc.
-        matched = False
-        for regex, sec_type in PATTERNS:
-            if regex.match(stripped):
-                if sec_type == SectionType.IMAGE:
-                    flush_current()
-                    md.add_section(ParsedSection(sec_type, stripped))
-                else:
-                    if current_type not in (SectionType.NONE, sec_type):
-                        flush_current()
-                    current_type = sec_type
-                    current_buffer.append(raw_line)
-                matched = True
-                break
+    lines = list(lines)
+    parser = _LineParser(make_section=make_section)
+    _parse_into(md, parser, lines, spans=True)
+    md._editable = _EditableSource(lines, md.spans)
+    return md
+
+
+def parse_columnar(
+    text: str,
+    lines: Iterable[str],
+    types: Optional[FrozenSet[SectionType]] = None,
+    spans: bool = False,
+) -> MarkdownDocument:
+    """
+    Parses the lines of `text` into a document backed by a `SectionTable`.
+
+    This runs the state machine in span mode: content is never joined or copied,
+    each section only appends its type, depth and content offsets within `text` to
+    the table's arrays, and `text` becomes the table's shared buffer.
 
-        # Flush last section
-        if not matched:
-            if current_type not in (SectionType.NONE, SectionType.PARAGRAPH):
-                flush_current()
-            current_type = SectionType.PARAGRAPH
-            current_buffer.append(raw_line)
+    :param text: The Markdown text.
+    :param lines: The lines of `text`, in order and covering it from offset 0.
+    :param types: The section types to build, or None to build all of them.
+    :param spans: Whether to record the source span of each section.
+    :return: A `MarkdownDocument` whose `sections` is a `SectionTable`.
+    :rtype: MarkdownDocument
+    """
+    table = SectionTable(text)
+    parser = _LineParser(make_section=table.add_span, spans=True, types=types)
+    source_spans = None
+    if spans:
+        source_spans = SourceSpans()
+        parser.on_span = source_spans.add
+    # The parser yields the positions of the added rows, which are not needed
+    deque(chain(parser.feed(lines), parser.close()), maxlen=0)
+    md = MarkdownDocument(table)
+    md.spans = source_spans
+    return md
+
+
+def iter_byte_sections(
+    lines: Iterable[bytes], types: Optional[FrozenSet[SectionType]] = None
+) -> Iterator[EncodedSection]:
+    """
+    Lazily parses UTF-8 encoded lines, yielding each section once it is complete.
+
+    The streaming counterpart of `parse_byte_lines`, see `iter_sections`.
+
+    :param lines: An iterable of bytes, each holding a single line of the document.
+    :param types: The section types to build, or None to build all of them.
+    :return: An iterator over sections that decode lazily, in document order.
+    """
+    parser = _LineParser(BYTES_GRAMMAR, EncodedSection, types=types)
+    yield from parser.feed(lines)
+    yield from parser.close()
 
-    flush_current()
+
+def parse_byte_lines(
+    lines: Iterable[bytes],
+    types: Optional[FrozenSet[SectionType]] = None,
+    spans: bool = False,
+    **limits: Any,
+) -> MarkdownDocument:
+    """
+    Parses an iterable of UTF-8 encoded lines into a structured Markdown document.
+
+    This runs the same state machine as `parse_lines`, with bytes regexes, so lines are
+    never decoded while parsing. Each section keeps its raw bytes and decodes them the
+    first time its `content` is read. Line endings may be ``"\\n"``, ``"\\r\\n"`` or
+    ``"\\r"``; content reads back with ``"\\n"`` endings, as in text mode. Unlike
+    `parse_lines`, only ASCII whitespace counts as blank or indentation.
+
+    :param lines: An iterable of bytes, each holding a single line of the document.
+    :param types: The section types to build, or None to build all of them.
+    :param spans: Whether to record the source span of each section, with offsets
+        in bytes.
+    :param limits: `max_sections`, `max_lines` or `stop_when`, see `parse_lines`.
+    :return: A `MarkdownDocument` instance whose sections decode lazily.
+    :rtype: MarkdownDocument
+    """
+    md = MarkdownDocument()
+    parser = _LineParser(BYTES_GRAMMAR, EncodedSection, types=types)
+    _parse_into(md, parser, lines, spans=spans, **limits)
+    return md
+
+
+def parse_mapped(
+    source: Any,
+    lines: Iterable[bytes],
+    types: Optional[FrozenSet[SectionType]] = None,
+    spans: bool = False,
+    **limits: Any,
+) -> MarkdownDocument:
+    """
+    Parses the UTF-8 encoded `lines` of `source` into a document that references it.
+
+    This runs the bytes engine of `parse_byte_lines` without ever joining content:
+    each section is a `MappedSection` holding the offsets of its content within
+    `source`, which the document keeps attached until it is closed.
+
+    :param source: A bytes-like buffer, such as an `mmap.mmap`, that supports slicing.
+    :param lines: The lines of `source`, in order and covering it from offset 0.
+    :param types: The section types to build, or None to build all of them.
+    :param spans: Whether to record the source span of each section, with offsets
+        in bytes.
+    :param limits: `max_sections`, `max_lines` or `stop_when`, see `parse_lines`.
+    :return: A `MarkdownDocument` instance owning `source`.
+    :rtype: MarkdownDocument
+    """
+
+    def make_section(sec_type, start, end, depth, meta):
+        return MappedSection(sec_type, source, start, end, depth, meta)
+
+    md = MarkdownDocument()
+    md.attach_source(source)
+    parser = _LineParser(BYTES_GRAMMAR, make_section, spans=True, types=types)
+    _parse_into(md, parser, lines, spans=spans, **limits)
     return md
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Optional
+
+
+class ContentPool:
+    """
+    Shares one string object between all identical section contents.
+
+    Badges, license paragraphs and other boilerplate repeat across many documents
+    of a corpus; passing the same pool to every parse call makes each repeat point
+    to the string of the first occurrence instead of holding its own copy. The pool
+    remembers the most recently used contents only: once `max_entries` strings, or
+    `max_chars` characters in total, are pooled, the least recently used ones are
+    forgotten. Sections keep the strings they already hold.
+
+    A pool is not thread-safe; use one per thread.
+
+    :ivar max_entries: Maximum number of distinct contents remembered.
+    :ivar max_chars: Maximum total length of the remembered contents, or None.
+    :ivar hits: Contents found in the pool.
+    :ivar misses: Contents added to the pool.
+    :ivar evictions: Contents forgotten to respect the bounds.
+    """
+
+    def __init__(
+        self, max_entries: int = 100_000, max_chars: Optional[int] = None
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1, got {max_entries}")
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._chars = 0
+        self._strings: OrderedDict[str, str] = OrderedDict()
+
+    def intern(self, content: str) -> str:
+        """
+        Returns the pooled string equal to `content`, adding `content` if there is
+        none.
+        """
+        strings = self._strings
+        pooled = strings.get(content)
+        if pooled is not None:
+            strings.move_to_end(content)
+            self.hits += 1
+            return pooled
+        self.misses += 1
+        if self.max_chars is not None and len(content) > self.max_chars:
+            return content
+        strings[content] = content
+        self._chars += len(content)
+        while len(strings) > self.max_entries or (
+            self.max_chars is not None and self._chars > self.max_chars
+        ):
+            evicted, _ = strings.popitem(last=False)
+            self._chars -= len(evicted)
+            self.evictions += 1
+        return content
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of contents found in the pool, from 0.0 to 1.0."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def size(self) -> int:
+        """The total length of the remembered contents."""
+        return self._chars
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def clear(self) -> None:
+        """Forgets every content and resets the statistics."""
+        self._strings.clear()
+        self._chars = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"ContentPool({len(self)} entries, {self._chars} chars, "
+            f"hits={self.hits}, misses={self.misses}, evictions={self.evictions}, "
+            f"hit_rate={self.hit_rate:.1%})"
+        )
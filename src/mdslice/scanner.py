@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import os
+import re
+from typing import List, Union
+
+from .constants import (
+    _FENCE_CLOSE_RE,
+    _FENCE_OPEN_RE,
+    _HEADER_RE,
+    _SETEXT_H1_RE,
+    _SETEXT_H2_RE,
+    LIST_PATTERNS,
+    PATTERNS_BY_FIRST_CHAR,
+    TEXT_GRAMMAR,
+)
+from .models import ParsedSection, SectionType
+from .parser import parse_lines
+
+# Lines that can open or close a fence, be an ATX header or underline a setext
+# header; every other line only matters as part of a setext header's paragraph.
+# Matched from the preceding line break: a literal prefix lets the regex engine
+# jump between line breaks, which is several times faster than a "^" anchor.
+_CANDIDATE_RE = re.compile(r"\n[^\S\n]*(?:[`~]{3}|#|={3}|-{3})[^\n]*")
+# Line breaks `str.splitlines` knows besides "\n", which split lines differently
+_OTHER_BREAKS_RE = re.compile("[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+def _is_paragraph_line(stripped: str) -> bool:
+    # Whether the parser appends a line to an open paragraph, for the lines that
+    # are not candidates: blank lines and section patterns end the paragraph
+    if not stripped or stripped == TEXT_GRAMMAR.nbsp:
+        return False
+    first = stripped[:1]
+    patterns = PATTERNS_BY_FIRST_CHAR.get(first)
+    if patterns is None:
+        patterns = LIST_PATTERNS if first.isdigit() else ()
+    return not any(regex.match(stripped) for regex, _ in patterns)
+
+
+def _scan_text(text: str) -> List[ParsedSection]:
+    # Every line, including the first, now follows a line break
+    text = "\n" + text
+    headers: List[ParsedSection] = []
+    # The line break after which lines can belong to the paragraph of a setext
+    # header: the end of the last fence, header or setext underline
+    barrier = 0
+    fence_char = ""
+    fence_len = 0
+    for match in _CANDIDATE_RE.finditer(text):
+        stripped = match.group().strip()
+        if fence_char:
+            m_close = _FENCE_CLOSE_RE.match(stripped)
+            if (
+                m_close
+                and m_close.group(1)[:1] == fence_char
+                and len(m_close.group(1)) >= fence_len
+            ):
+                fence_char = ""
+                barrier = match.end()
+            continue
+
+        m_open = _FENCE_OPEN_RE.match(stripped)
+        if m_open:
+            fence_char = m_open.group(1)[:1]
+            fence_len = len(m_open.group(1))
+            continue
+
+        m_header = _HEADER_RE.match(stripped)
+        if m_header:
+            hashes, content = m_header.groups()
+            headers.append(
+                ParsedSection(SectionType.HEADER, content.strip(), len(hashes), None)
+            )
+            barrier = match.end()
+            continue
+
+        h1 = stripped[:1] == "="
+        if not (_SETEXT_H1_RE if h1 else _SETEXT_H2_RE).match(stripped):
+            continue
+        # Walk back over the paragraph the underline turns into a header
+        start = end = match.start() + 1
+        while start > barrier + 1:
+            line_start = text.rfind("\n", barrier, start - 1) + 1
+            if not _is_paragraph_line(text[line_start:start].strip()):
+                break
+            start = line_start
+        if start < end:
+            content = text[start:end].strip()
+            headers.append(ParsedSection(SectionType.HEADER, content, 1 if h1 else 2))
+            barrier = match.end()
+    return headers
+
+
+def scan_headers(text_or_path: Union[str, os.PathLike]) -> List[ParsedSection]:
+    """
+    Extracts the headers of a Markdown document without parsing its other sections.
+
+    A single multiline regex pass visits only the lines that can open or close a
+    fence, be an ATX header or underline a setext header. Fenced code is skipped
+    with the parser's fence rules, and the paragraph above a setext underline is
+    found by walking back from it, so no other section is ever built. The result
+    equals ``doc.headers()`` for the document `parse_markdown_file` or `from_text`
+    would build.
+
+    Text containing line breaks other than ``"\\n"``, which `from_text` splits on
+    too, goes through the regular parser restricted to headers.
+
+    :param text_or_path: Markdown text, or a path-like object naming a UTF-8 file,
+        which is read in text mode. A plain string is always taken as text.
+    :raises FileNotFoundError: If the given path does not exist.
+    :return: The ATX and setext headers, in document order.
+    """
+    if isinstance(text_or_path, str):
+        if _OTHER_BREAKS_RE.search(text_or_path):
+            lines = text_or_path.splitlines(keepends=True)
+            return parse_lines(lines, include={SectionType.HEADER}).sections
+        return _scan_text(text_or_path)
+    with open(text_or_path, "r", encoding="utf-8") as fid:
+        return _scan_text(fid.read())
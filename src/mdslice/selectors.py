@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from itertools import chain
+from typing import List, Optional, Sequence, Set, Tuple
+
+from .models import MarkdownDocument, ParsedSection, SectionType
+
+# Type names, besides "h1" to "h6", all matched case-insensitively. NONE only
+# marks the parser state and no section has it.
+_TYPE_NAMES = {
+    sec_type.name.lower(): sec_type
+    for sec_type in SectionType
+    if sec_type != SectionType.NONE
+}
+_TYPE_NAMES.update(h=SectionType.HEADER, p=SectionType.PARAGRAPH)
+_HEADER_NAME_RE = re.compile(r"h(\d+)", re.IGNORECASE)
+
+_STRING = r""" "(?:[^"\\]|\\.)*" | '(?:[^'\\]|\\.)*' """
+_TOKEN_RE = re.compile(
+    rf"""
+    \s*(?P<comma>,)\s*
+    | \s*(?P<child>>)\s*
+    | (?P<descendant>\s+)
+    | [hH](?P<min_depth>\d+)\.\.[hH]?(?P<max_depth>\d+)\b
+    | (?P<name>\*|[A-Za-z][\w-]*)
+    | \[\s*(?P<key>[\w-]+)\s*(?:=\s*(?P<value>{_STRING}|[^\]\s]+)\s*)?\]
+    | :(?P<pseudo>[\w-]+)\(\s*(?P<arg>{_STRING}|[^)\s]*)\s*\)
+    """,
+    re.VERBOSE,
+)
+_ESCAPE_RE = re.compile(r"\\(.)")
+
+
+def _unquote(value: str) -> str:
+    if value[:1] in ("'", '"'):
+        return _ESCAPE_RE.sub(r"\1", value[1:-1])
+    return value
+
+
+def _nested_under(parents: Sequence[int], i: int, anchors: Set[int]) -> bool:
+    # Whether a header the section at `i` is nested under is in `anchors`
+    parent = parents[i]
+    while parent >= 0:
+        if parent in anchors:
+            return True
+        parent = parents[parent]
+    return False
+
+
+class _Compound:
+    """
+    One step of a selector: a section type, or any, and the attribute and
+    pseudo-class conditions written after it.
+    """
+
+    __slots__ = ("sec_type", "min_depth", "max_depth", "attrs", "under")
+
+    def __init__(
+        self,
+        sec_type: Optional[SectionType] = None,
+        min_depth: Optional[int] = None,
+        max_depth: Optional[int] = None,
+    ) -> None:
+        self.sec_type = sec_type
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        # ``(key, value)`` pairs the meta must hold; a None value only needs
+        # the key
+        self.attrs: List[Tuple[str, Optional[str]]] = []
+        # Header contents the section must be nested under
+        self.under: List[str] = []
+
+    def positions(
+        self, document: MarkdownDocument, parents: Sequence[int]
+    ) -> Sequence[int]:
+        # Candidates come from the indexes; only the conditions look at sections
+        sections = document.sections
+        positions: Sequence[int]
+        if self.sec_type is None:
+            positions = range(len(sections))
+        elif self.min_depth is not None:
+            buckets = document._header_buckets()
+            runs = [
+                buckets[depth]
+                for depth in sorted(buckets)
+                if self.min_depth <= depth <= self.max_depth  # type: ignore
+            ]
+            if len(runs) == 1:
+                positions = runs[0]
+            else:
+                positions = sorted(chain.from_iterable(runs))
+        else:
+            positions = document._section_index().get(self.sec_type, ())
+        for key, value in self.attrs:
+            positions = [
+                i for i in positions if _has_attr(sections[i].meta, key, value)
+            ]
+        if self.under:
+            headers = document._section_index().get(SectionType.HEADER, ())
+            for title in self.under:
+                anchors = {i for i in headers if sections[i].content == title}
+                positions = [i for i in positions if _nested_under(parents, i, anchors)]
+        return positions
+
+
+def _has_attr(meta: Optional[dict], key: str, value: Optional[str]) -> bool:
+    if not meta or key not in meta:
+        return False
+    return value is None or str(meta[key]) == value
+
+
+class _Chain:
+    """Compounds joined by combinators, matched from the last one backwards."""
+
+    __slots__ = ("steps", "combinators")
+
+    def __init__(self, steps: List[_Compound], combinators: List[str]) -> None:
+        self.steps = steps
+        # The combinator before each step but the first: ">" or " "
+        self.combinators = combinators
+
+    def positions(
+        self, document: MarkdownDocument, parents: Sequence[int]
+    ) -> Sequence[int]:
+        *ancestors, last = self.steps
+        positions = last.positions(document, parents)
+        if not ancestors:
+            return positions
+        anchors = [set(step.positions(document, parents)) for step in ancestors]
+        k = len(ancestors)
+        return [i for i in positions if self._nested(i, k, anchors, parents)]
+
+    def _nested(
+        self, i: int, k: int, anchors: List[Set[int]], parents: Sequence[int]
+    ) -> bool:
+        # Whether the section at `i`, matched by step `k`, is nested under
+        # sections matching the steps before it
+        if k == 0:
+            return True
+        matches = anchors[k - 1]
+        parent = parents[i]
+        if self.combinators[k - 1] == ">":
+            return parent in matches and self._nested(parent, k - 1, anchors, parents)
+        while parent >= 0:
+            if parent in matches and self._nested(parent, k - 1, anchors, parents):
+                return True
+            parent = parents[parent]
+        return False
+
+
+class Selector:
+    """
+    A compiled selector, returned by `compile_selector`.
+
+    A selector holds no document state, so one instance can be kept and run
+    against any number of documents; each document keeps the indexes it needs.
+
+    :ivar text: The selector source.
+    :type text: str
+    """
+
+    __slots__ = ("text", "_chains")
+
+    def __init__(self, text: str, chains: List[_Chain]) -> None:
+        self.text = text
+        self._chains = chains
+
+    def positions(self, document: MarkdownDocument) -> List[int]:
+        """Returns the positions of the matching sections, in document order."""
+        chains = self._chains
+        parents: Sequence[int] = ()
+        if any(len(c.steps) > 1 or any(s.under for s in c.steps) for c in chains):
+            parents = document._outline_parents()
+        if len(chains) == 1:
+            return list(chains[0].positions(document, parents))
+        matches: Set[int] = set()
+        for selector_chain in chains:
+            matches.update(selector_chain.positions(document, parents))
+        return sorted(matches)
+
+    def select(self, document: MarkdownDocument) -> List[ParsedSection]:
+        """Returns the matching sections of `document`, in document order."""
+        sections = document.sections
+        return [sections[i] for i in self.positions(document)]
+
+    def __repr__(self) -> str:
+        return f"Selector({self.text!r})"
+
+
+def _type_step(name: str) -> _Compound:
+    if name == "*":
+        return _Compound()
+    m_header = _HEADER_NAME_RE.fullmatch(name)
+    if m_header:
+        depth = int(m_header.group(1))
+        return _Compound(SectionType.HEADER, depth, depth)
+    sec_type = _TYPE_NAMES.get(name.lower())
+    if sec_type is None:
+        raise ValueError(f"unknown section type {name!r} in selector")
+    return _Compound(sec_type)
+
+
+def _parse(text: str) -> List[_Chain]:
+    chains: List[_Chain] = []
+    steps: List[_Compound] = []
+    combinators: List[str] = []
+    step: Optional[_Compound] = None
+    text = text.strip()
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if match is None:
+            raise ValueError(f"invalid selector {text!r} at offset {pos}")
+        if match.group("comma") or match.group("child") or match.group("descendant"):
+            if step is None:
+                raise ValueError(f"missing selector in {text!r} at offset {pos}")
+            steps.append(step)
+            step = None
+            if match.group("comma"):
+                chains.append(_Chain(steps, combinators))
+                steps, combinators = [], []
+            else:
+                combinators.append(">" if match.group("child") else " ")
+        elif match.group("min_depth") or match.group("name"):
+            if step is not None:
+                raise ValueError(f"unexpected type in {text!r} at offset {pos}")
+            if match.group("name"):
+                step = _type_step(match.group("name"))
+            else:
+                min_depth = int(match.group("min_depth"))
+                max_depth = int(match.group("max_depth"))
+                if min_depth > max_depth:
+                    raise ValueError(f"empty depth range in selector {text!r}")
+                step = _Compound(SectionType.HEADER, min_depth, max_depth)
+        else:
+            if step is None:
+                step = _Compound()
+            if match.group("key"):
+                value = match.group("value")
+                step.attrs.append(
+                    (match.group("key"), None if value is None else _unquote(value))
+                )
+            elif match.group("pseudo") == "under":
+                step.under.append(_unquote(match.group("arg")))
+            else:
+                raise ValueError(
+                    f"unknown pseudo-class :{match.group('pseudo')} in selector"
+                )
+        pos = match.end()
+    if step is None:
+        raise ValueError(f"incomplete selector {text!r}")
+    steps.append(step)
+    chains.append(_Chain(steps, combinators))
+    return chains
+
+
+@lru_cache(maxsize=1024)
+def compile_selector(text: str) -> Selector:
+    """
+    Compiles a selector into a query plan that `MarkdownDocument.select` and
+    `Selector.select` run against documents.
+
+    A selector is a comma-separated list of alternatives, each made of steps
+    separated by ``>`` (the right step is directly nested under the left one in
+    the document outline) or by spaces (nested at any depth). A step is a
+    section type, optionally followed by conditions:
+
+    - ``h1`` to ``h6``, a depth range such as ``h1..h3``, ``h`` or ``header``
+      for headers of any depth, ``p`` or ``paragraph``, ``list``, ``code``,
+      ``table``, ``image``, ``quote``, ``info``, or ``*`` for any section.
+      Type names are case-insensitive, so ``H2`` and ``Code`` work too;
+    - ``[key]`` or ``[key=value]``, on the section meta, as in
+      ``code[lang=python]``;
+    - ``:under("Title")``, for sections nested at any depth under a header
+      whose content is exactly ``Title``.
+
+    Each step gets its candidates from the indexes behind `of_type`, `headers`
+    and `outline` instead of testing every section, and only the conditions
+    are checked section by section. Compiled selectors are cached by text, so
+    running the same few hundred selectors against many documents parses each
+    of them once.
+
+    :param text: The selector, such as ``h2 > code[lang=python]``.
+    :raises ValueError: If the selector is invalid.
+    :return: The compiled selector.
+    """
+    return Selector(text, _parse(text))
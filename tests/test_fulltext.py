@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from mdslice import FullTextIndex, SectionType, from_text
+
+
+def _document(path: str, text: str):
+    doc = from_text(text)
+    doc.path = Path(path)
+    return doc
+
+
+class TestFullTextIndex(unittest.TestCase):
+    def setUp(self):
+        self.install = _document(
+            "install.md",
+            "# Install\n\npip install mdslice\n\n```python\nimport mdslice\n```\n",
+        )
+        self.usage = _document(
+            "usage.md", "# Usage\n\nParse a file.\n\nThen install the extras.\n"
+        )
+
+    def test_sections_are_ranked_with_bm25(self):
+        index = FullTextIndex()
+        index.add(self.install)
+        index.add(self.usage)
+        hits = index.search("install mdslice")
+        self.assertEqual(
+            [(path.name, position) for _, path, position, _ in hits],
+            [("install.md", 1), ("install.md", 2), ("install.md", 0), ("usage.md", 2)],
+        )
+        scores = [score for score, _, _, _ in hits]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(hits[0][3].content, "pip install mdslice")
+        self.assertEqual(len(index.search("install", limit=2)), 2)
+        self.assertEqual(index.search("missing"), [])
+
+    def test_saved_index_is_mapped_back_with_the_same_ranking(self):
+        with TemporaryDirectory() as td:
+            index_path = Path(td) / "docs.idx"
+            index = FullTextIndex()
+            index.add(self.install)
+            index.add(self.usage)
+            expected = index.search("install mdslice")
+            index.save(index_path)
+            index.close()
+
+            with FullTextIndex(index_path) as loaded:
+                self.assertEqual(len(loaded), 2)
+                hits = loaded.search("install mdslice")
+                self.assertEqual(
+                    [hit[:3] for hit in hits], [hit[:3] for hit in expected]
+                )
+                self.assertEqual([hit[3] for hit in hits], [hit[3] for hit in expected])
+                code = hits[1][3]
+                self.assertEqual(code.type, SectionType.CODE)
+                self.assertEqual(code.meta, {"lang": "python"})
+
+    def test_documents_are_added_and_removed_by_path(self):
+        with TemporaryDirectory() as td:
+            index_path = Path(td) / "docs.idx"
+            with FullTextIndex(index_path) as index:
+                index.add(self.install)
+                index.add(self.usage)
+                index.save()
+
+            with FullTextIndex(index_path) as index:
+                index.remove("install.md")
+                self.assertNotIn("install.md", index)
+                with self.assertRaises(KeyError):
+                    index.remove("install.md")
+                # Adding a path again replaces its document
+                index.add(_document("usage.md", "Nothing to see.\n"))
+                index.add(_document("faq.md", "How do I install it?\n"))
+                self.assertEqual(
+                    [path.name for _, path, _, _ in index.search("install")],
+                    ["faq.md"],
+                )
+                index.save()
+
+            with FullTextIndex(index_path) as index:
+                self.assertEqual(len(index), 2)
+                self.assertIn("usage.md", index)
+                hits = index.search("install see")
+                self.assertEqual(
+                    [(path.name, section.content) for _, path, _, section in hits],
+                    [
+                        ("usage.md", "Nothing to see."),
+                        ("faq.md", "How do I install it?"),
+                    ],
+                )
+
+    def test_closed_index_cannot_be_used(self):
+        with TemporaryDirectory() as td:
+            index_path = Path(td) / "docs.idx"
+            index = FullTextIndex()
+            index.add(self.install)
+            index.save(index_path)
+            index.add(self.usage)
+            index.close()
+            index.close()
+            self.assertEqual(len(index), 0)
+            self.assertNotIn("install.md", index)
+            for use in (
+                lambda: index.search("install"),
+                lambda: index.add(self.usage),
+                lambda: index.remove("install.md"),
+                index.save,
+            ):
+                with self.assertRaises(ValueError):
+                    use()
+            with FullTextIndex(index_path) as loaded:
+                self.assertEqual(len(loaded), 1)
+
+    def test_other_files_are_rejected(self):
+        with TemporaryDirectory() as td:
+            for data in (b"", b"# Not an index\n" * 10):
+                path = Path(td) / "other.idx"
+                path.write_bytes(data)
+                with self.assertRaisesRegex(ValueError, "not an mdslice"):
+                    FullTextIndex(path)
+
+    def test_documents_need_a_path(self):
+        with self.assertRaises(ValueError):
+            FullTextIndex().add(from_text("Text\n"))
+        with self.assertRaises(ValueError):
+            FullTextIndex().save()
+
+
+if __name__ == "__main__":
+    unittest.main()
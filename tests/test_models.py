@@ -1,7 +1,24 @@
 from __future__ import annotations
 
+import copy
+import pickle
+import re
+import sys
 import unittest
-from mdslice import ParsedSection, SectionType
+from mdslice import (
+    FrozenDocument,
+    MarkdownDocument,
+    MemoryUsage,
+    ParsedSection,
+    SectionType,
+)
+from mdslice.models import (
+    EncodedSection,
+    FrozenMeta,
+    SectionTable,
+    SectionView,
+    intern_meta,
+)
 
 
 class TestModels(unittest.TestCase):
@@ -38,3 +55,289 @@ class TestModels(unittest.TestCase):
 
         p = ParsedSection(type=SectionType.PARAGRAPH, content="Some text")
         self.assertEqual(str(p), "<PARAGRAPH: 'Some text'>")
+
+    def test_encoded_section_equals_parsed_section(self):
+        encoded = EncodedSection(SectionType.PARAGRAPH, "Hällo".encode(), 0, None)
+        plain = ParsedSection(type=SectionType.PARAGRAPH, content="Hällo")
+        self.assertEqual(encoded, plain)
+        self.assertEqual(plain, encoded)
+        self.assertEqual(str(encoded), "<PARAGRAPH: 'Hällo'>")
+
+    def test_parsed_section_is_slotted_with_dataclass_behavior(self):
+        section = ParsedSection(SectionType.CODE, "x = 1", 0, {"lang": "python"})
+        self.assertFalse(hasattr(section, "__dict__"))
+        self.assertEqual(
+            repr(section),
+            "ParsedSection(type=<SectionType.CODE: 6>, content='x = 1', depth=0, "
+            "meta={'lang': 'python'})",
+        )
+        self.assertEqual(
+            section, ParsedSection(SectionType.CODE, "x = 1", 0, {"lang": "python"})
+        )
+        self.assertNotEqual(section, ParsedSection(SectionType.CODE, "x = 2"))
+        with self.assertRaises(TypeError):
+            hash(section)
+
+    def test_section_table_append_and_access(self):
+        table = SectionTable("# Title\n")
+        table.add_span(SectionType.HEADER, 2, 7, 1)
+        table.append(ParsedSection(SectionType.CODE, "x = 1", 0, {"lang": "py"}))
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.text, "# Title\nx = 1")
+        self.assertEqual(table[0], ParsedSection(SectionType.HEADER, "Title", 1))
+        self.assertEqual(table[-1].meta, {"lang": "py"})
+        self.assertEqual(table[:1], [table[0]])
+        self.assertEqual(list(table), [table[0], table[1]])
+        with self.assertRaises(IndexError):
+            table[2]
+
+    def test_intern_meta_shares_immutable_mappings(self):
+        meta = intern_meta(lang="python")
+        self.assertIsInstance(meta, FrozenMeta)
+        self.assertIs(meta, intern_meta(lang="python"))
+        self.assertEqual(meta, {"lang": "python"})
+        self.assertIs(pickle.loads(pickle.dumps(meta)), meta)
+        with self.assertRaises(TypeError):
+            meta["lang"] = "rust"
+        with self.assertRaises(TypeError):
+            meta.update(lang="rust")
+        self.assertEqual(intern_meta(lang="python"), {"lang": "python"})
+
+    def test_memory_usage_by_section_type(self):
+        shared = "Shared paragraph"
+        doc = MarkdownDocument(
+            [
+                ParsedSection(SectionType.PARAGRAPH, shared),
+                ParsedSection(SectionType.PARAGRAPH, shared),
+                ParsedSection(SectionType.CODE, "x = 1", 0, intern_meta(lang="py")),
+            ]
+        )
+        usage = doc.memory_usage()
+        paragraph = usage.by_type[SectionType.PARAGRAPH]
+        self.assertEqual(paragraph["content"], sys.getsizeof(shared))
+        self.assertEqual(paragraph["sections"], 2 * sys.getsizeof(doc.sections[0]))
+        self.assertGreater(usage.by_type[SectionType.CODE]["meta"], 0)
+        self.assertEqual(usage.container, sys.getsizeof(doc.sections))
+        shallow = doc.memory_usage(deep=False)
+        self.assertEqual(shallow.by_type[SectionType.CODE]["meta"], 0)
+
+        # Objects shared across documents are counted once for the corpus
+        corpus = MemoryUsage.of_corpus([doc, doc])
+        self.assertEqual(corpus.documents, 2)
+        corpus_paragraph = corpus.by_type[SectionType.PARAGRAPH]
+        self.assertEqual(corpus_paragraph["content"], sys.getsizeof(shared))
+        self.assertLess(corpus.total, (usage + usage).total)
+
+    def test_document_pickles_sections_as_columns(self):
+        doc = MarkdownDocument(
+            [
+                ParsedSection(SectionType.HEADER, "Tïtle", 1),
+                ParsedSection(SectionType.CODE, "x = 1", 0, intern_meta(lang="py")),
+                ParsedSection(SectionType.CODE, "y = 2", 0, intern_meta(lang="py")),
+            ],
+            "README.md",
+        )
+        doc.truncated = True
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps(doc, protocol=protocol))
+            self.assertEqual(copy.sections, doc.sections)
+            self.assertIsInstance(copy.sections, list)
+            self.assertEqual((copy.path, copy.truncated), (doc.path, True))
+            self.assertIs(copy.sections[1].meta, copy.sections[2].meta)
+
+        buffers = []
+        data = pickle.dumps(doc, protocol=5, buffer_callback=buffers.append)
+        self.assertEqual(len(buffers), 5)  # the text and four columns
+        self.assertEqual(pickle.loads(data, buffers=buffers).sections, doc.sections)
+
+        table = SectionTable()
+        for section in doc.sections:
+            table.append(section)
+        copy = pickle.loads(pickle.dumps(MarkdownDocument(table), protocol=5))
+        self.assertIsInstance(copy.sections, SectionTable)
+        self.assertEqual(copy.sections, doc.sections)
+
+        # Sections a table cannot hold are pickled one by one
+        lazy = MarkdownDocument([EncodedSection(SectionType.PARAGRAPH, b"text")])
+        copy = pickle.loads(pickle.dumps(lazy))
+        self.assertIsInstance(copy.sections[0], EncodedSection)
+
+    def test_freeze_returns_hashable_immutable_snapshot(self):
+        doc = MarkdownDocument(
+            [
+                ParsedSection(SectionType.HEADER, "Title", 1),
+                ParsedSection(SectionType.CODE, "x = 1", 0, {"lang": "py"}),
+            ],
+            "README.md",
+        )
+        frozen = doc.freeze()
+        self.assertIsInstance(frozen, FrozenDocument)
+        self.assertIsInstance(frozen.sections, tuple)
+        self.assertEqual(list(frozen.sections), doc.sections)
+        self.assertIs(frozen.sections[1].meta, intern_meta(lang="py"))
+        self.assertIs(frozen.freeze(), frozen)
+        self.assertIs(copy.deepcopy(frozen), frozen)
+
+        # Equal snapshots are interchangeable keys
+        cache = {frozen: "parsed"}
+        self.assertEqual(cache[doc.freeze()], "parsed")
+        doc.add_section(ParsedSection(SectionType.PARAGRAPH, "More"))
+        self.assertNotIn(doc.freeze(), cache)
+        self.assertEqual(len(frozen.sections), 2)
+
+        with self.assertRaises(TypeError):
+            frozen.add_section(ParsedSection(SectionType.PARAGRAPH, "More"))
+        with self.assertRaises(AttributeError):
+            frozen.path = "other.md"
+        with self.assertRaises(AttributeError):
+            frozen.sections[0].content = "Other"
+
+        thawed = frozen.thaw()
+        thawed.add_section(ParsedSection(SectionType.PARAGRAPH, "More"))
+        self.assertEqual(len(thawed.sections), 3)
+        self.assertEqual(pickle.loads(pickle.dumps(frozen)), frozen)
+
+    def test_slicing_returns_a_view_sharing_sections(self):
+        sections = [
+            ParsedSection(SectionType.HEADER, "Title", 1),
+            ParsedSection(SectionType.PARAGRAPH, "Intro"),
+            ParsedSection(SectionType.HEADER, "Usage", 2),
+            ParsedSection(SectionType.CODE, "x = 1", 0, {"lang": "py"}),
+        ]
+        doc = MarkdownDocument(sections, "README.md")
+        self.assertIs(doc[1], sections[1])
+        self.assertIs(doc[-1], sections[-1])
+        self.assertEqual(list(doc), sections)
+
+        view = doc[1:]
+        self.assertIsInstance(view.sections, SectionView)
+        self.assertIs(view.sections.base, sections)
+        self.assertEqual(view.path, doc.path)
+        self.assertEqual(view.sections, sections[1:])
+        self.assertEqual(view.headers(), [sections[2]])
+        self.assertIs(view[0], sections[1])
+
+        # Slicing a view narrows it instead of nesting views
+        narrowed = view[::-2]
+        self.assertIs(narrowed.sections.base, sections)
+        self.assertEqual(list(narrowed), sections[1:][::-2])
+        with self.assertRaises(TypeError):
+            view.add_section(ParsedSection(SectionType.PARAGRAPH, "More"))
+
+        table = SectionTable()
+        for section in sections:
+            table.append(section)
+        self.assertEqual(list(MarkdownDocument(table)[1:3]), sections[1:3])
+
+    def test_of_type_uses_maintained_position_index(self):
+        doc = MarkdownDocument(
+            [
+                ParsedSection(SectionType.HEADER, "Title", 1),
+                ParsedSection(SectionType.PARAGRAPH, "Intro"),
+                ParsedSection(SectionType.CODE, "x = 1"),
+                ParsedSection(SectionType.HEADER, "Usage", 2),
+            ]
+        )
+        headers = doc.of_type(SectionType.HEADER)
+        self.assertEqual([s.content for s in headers], ["Title", "Usage"])
+        self.assertEqual(
+            [s.content for s in doc.of_type(SectionType.CODE, SectionType.HEADER)],
+            ["Title", "x = 1", "Usage"],
+        )
+        self.assertEqual(doc.of_type(SectionType.TABLE), [])
+
+        doc.add_section(ParsedSection(SectionType.CODE, "y = 2"))
+        self.assertEqual(list(doc._type_index[SectionType.CODE]), [2, 4])
+        self.assertEqual(len(doc.of_type(SectionType.CODE)), 2)
+
+        # Appending to `sections` directly is noticed by its length
+        doc.sections.append(ParsedSection(SectionType.TABLE, "| a |"))
+        self.assertEqual(len(doc.of_type(SectionType.TABLE)), 1)
+        self.assertEqual(doc[1:4].of_type(SectionType.HEADER), [doc[3]])
+
+    def test_headers_merge_depth_buckets_in_document_order(self):
+        doc = MarkdownDocument(
+            [
+                ParsedSection(SectionType.HEADER, "A", 1),
+                ParsedSection(SectionType.HEADER, "A.1", 2),
+                ParsedSection(SectionType.PARAGRAPH, "Text"),
+                ParsedSection(SectionType.HEADER, "A.1.a", 3),
+                ParsedSection(SectionType.HEADER, "B", 1),
+            ]
+        )
+
+        def contents(headers):
+            return [s.content for s in headers]
+
+        self.assertEqual(contents(doc.headers()), ["A", "A.1", "A.1.a", "B"])
+        self.assertEqual(contents(doc.headers(max_depth=2)), ["A", "A.1", "B"])
+        self.assertEqual(contents(doc.headers(2, 3)), ["A.1", "A.1.a"])
+        self.assertEqual(doc.headers(4), [])
+
+        doc.add_section(ParsedSection(SectionType.HEADER, "B.1", 2))
+        self.assertEqual(list(doc._header_index[2]), [1, 5])
+        self.assertEqual(contents(doc.headers(1, 2)), ["A", "A.1", "B", "B.1"])
+
+    def test_outline_nests_headers_and_owns_section_ranges(self):
+        doc = MarkdownDocument(
+            [
+                ParsedSection(SectionType.PARAGRAPH, "Preamble"),
+                ParsedSection(SectionType.HEADER, "A", 1),
+                ParsedSection(SectionType.HEADER, "A.1", 2),
+                ParsedSection(SectionType.PARAGRAPH, "Text"),
+                ParsedSection(SectionType.HEADER, "A.2", 2),
+                ParsedSection(SectionType.HEADER, "B", 1),
+                ParsedSection(SectionType.CODE, "x = 1"),
+            ]
+        )
+        root = doc.outline()
+        self.assertIsNone(root.header)
+        self.assertEqual((root.start, root.end), (0, 7))
+        a, b = root.children
+        self.assertEqual((a.header.content, a.start, a.end), ("A", 1, 5))
+        self.assertEqual([c.header.content for c in a.children], ["A.1", "A.2"])
+        a1, a2 = a.children
+        self.assertIs(a1.parent, a)
+        self.assertEqual(list(a1.sections), doc.sections[2:4])
+        self.assertIs(a1.next_sibling, a2)
+        self.assertIs(a2.previous_sibling, a1)
+        self.assertIsNone(a2.next_sibling)
+        self.assertIs(a.next_sibling, b)
+        self.assertEqual(list(b.sections), doc.sections[5:])
+        self.assertEqual([node.start for node in root.walk()], [0, 1, 2, 4, 5])
+
+    def test_search_maps_matches_back_to_sections(self):
+        sections = [
+            ParsedSection(SectionType.HEADER, "Install", 1),
+            ParsedSection(SectionType.PARAGRAPH, "pip install mdslice"),
+            ParsedSection(SectionType.CODE, "import mdslice\nmdslice.from_text"),
+            ParsedSection(SectionType.PARAGRAPH, ""),
+        ]
+        table = SectionTable()
+        for section in sections:
+            table.append(section)
+        for doc in (MarkdownDocument(sections), MarkdownDocument(table)):
+            matches = doc.search(r"mdslice")
+            self.assertNotIsInstance(matches, list)
+            self.assertEqual(
+                [(i, span) for i, span, _ in matches],
+                [(1, (12, 19)), (2, (7, 14)), (2, (15, 22))],
+            )
+            code = [i for i, _, _ in doc.search("mdslice", [SectionType.CODE])]
+            self.assertEqual(code, [2, 2])
+            # A match never runs from one section into the next
+            self.assertEqual(
+                [span for _, span, _ in doc.search(r"(?s)l.*")],
+                [(5, 7), (9, 19), (10, 32)],
+            )
+            self.assertEqual(
+                [i for i, _, _ in doc.search("^$", flags=re.MULTILINE)], [3]
+            )
+            _, _, match = next(doc.search("(?i)INSTALL"))
+            self.assertEqual(match.group(), "Install")
+
+        doc = MarkdownDocument(list(sections))
+        list(doc.search("x"))
+        doc.add_section(ParsedSection(SectionType.PARAGRAPH, "appended mdslice"))
+        self.assertEqual([i for i, _, _ in doc.search("mdslice")][-1], 4)
+        self.assertEqual([i for i, _, _ in doc[1:3].search("install")], [0])
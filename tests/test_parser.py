@@ -4,7 +4,19 @@ import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
-from mdslice import parse_markdown_file, SectionType
+from mdslice import (
+    iter_markdown_file,
+    iter_sections,
+    parse_bytes,
+    parse_markdown_file,
+    PushParser,
+    scan_headers,
+    SectionType,
+)
+from mdslice.main import from_text, PARSE_MODES
+from mdslice.models import SectionTable
+from mdslice.parallel import parse_text_parallel, split_points
+from mdslice.parser import parse_lines
 from tests.test_data import MD_SAMPLE
 
 
@@ -162,6 +174,377 @@ Paragraph
             self.assertEqual(headers[1].content, "Title 2")
             self.assertEqual(headers[1].depth, 2)
 
+    def test_first_character_dispatch_edge_cases(self):
+        content = """---
+Paragraph
+- - -
+٣. arabic-indic digit item
+#no space header
+`inline` is not a fence
+"""
+        with TemporaryDirectory() as td:
+            md_path = self._write_temp_md(td, "dispatch.md", content)
+            doc = parse_markdown_file(md_path)
+            types = [s.type for s in doc.sections]
+            # A thematic break without a paragraph above stays paragraph text
+            self.assertEqual(
+                types,
+                [
+                    SectionType.PARAGRAPH,
+                    SectionType.LIST,
+                    SectionType.HEADER,
+                    SectionType.PARAGRAPH,
+                ],
+            )
+            self.assertEqual(doc.sections[0].content, "---\nParagraph")
+            self.assertIn("٣. arabic-indic digit item", doc.sections[1].content)
+            self.assertEqual(doc.sections[2].content, "no space header")
+
+    def test_bytes_mode_matches_text_mode(self):
+        with TemporaryDirectory() as td:
+            md_path = self._write_temp_md(td, "sample.md", MD_SAMPLE)
+            text_doc = parse_markdown_file(md_path)
+            bytes_doc = parse_markdown_file(md_path, mode="bytes")
+            self.assertEqual(bytes_doc.path, Path(md_path))
+            self.assertEqual(bytes_doc.sections, text_doc.sections)
+
+    def test_bytes_mode_decodes_on_access(self):
+        doc = parse_bytes("# Tïtle\r\n\r\nline one\r\nline two\r\n".encode())
+        header, para = doc.sections
+        self.assertEqual(para.raw, b"line one\r\nline two")
+        self.assertEqual(para.content, "line one\nline two")
+        self.assertIsNone(para.raw)
+        self.assertEqual(header.content, "Tïtle")
+
+    def test_bytes_mode_code_lang_is_str(self):
+        doc = parse_bytes(b"```python\nprint()\n```\n")
+        self.assertEqual(doc.sections[0].meta, {"lang": "python"})
+
+    def test_unknown_mode_raises(self):
+        with TemporaryDirectory() as td:
+            md_path = self._write_temp_md(td, "sample.md", MD_SAMPLE)
+            with self.assertRaises(ValueError):
+                parse_markdown_file(md_path, mode="binary")
+
+    def test_mmap_mode_matches_text_mode(self):
+        with TemporaryDirectory() as td:
+            md_path = self._write_temp_md(td, "sample.md", MD_SAMPLE)
+            text_doc = parse_markdown_file(md_path)
+            with parse_markdown_file(md_path, mode="mmap") as mapped_doc:
+                self.assertEqual(mapped_doc.path, Path(md_path))
+                self.assertEqual(mapped_doc.sections, text_doc.sections)
+                header = mapped_doc.sections[0]
+                self.assertEqual((header.start, header.end), (2, 7))
+
+    def test_all_modes_agree_on_non_ascii_input(self):
+        samples = [
+            "before\n\xa0\nafter\n",
+            "\u2003# Title\u3000\n\ntext\n",
+            "٣. arabic-indic item\n٤. next\n",
+            "-\u2003item\n",
+            "```\u2003python\xa0x\ncode\n```\u2003\n",
+            "\x1c\npara\n\x1f# header\n",
+            "Title\xa0\n===\u2003\n",
+            "\xa0![alt](img.png)\xa0\n",
+            "Café naïve\n中文\n",
+        ]
+        with TemporaryDirectory() as td:
+            for text in samples:
+                with self.subTest(text=text):
+                    md_path = Path(td) / "sample.md"
+                    md_path.write_bytes(text.encode("utf-8"))
+                    expected = from_text(text).sections
+                    self.assertEqual(parse_bytes(text.encode()).sections, expected)
+                    for mode in PARSE_MODES:
+                        with parse_markdown_file(md_path, mode=mode) as doc:
+                            self.assertEqual(list(doc.sections), expected)
+
+    def test_mmap_mode_close_releases_mapping(self):
+        with TemporaryDirectory() as td:
+            md_path = self._write_temp_md(td, "sample.md", MD_SAMPLE)
+            with parse_markdown_file(md_path, mode="mmap") as doc:
+                section = doc.sections[1]
+            with self.assertRaises(ValueError):
+                section.content
+            doc.close()
+
+    def test_mmap_mode_empty_file(self):
+        with TemporaryDirectory() as td:
+            md_path = self._write_temp_md(td, "empty.md", "")
+            with parse_markdown_file(md_path, mode="mmap") as doc:
+                self.assertEqual(doc.sections, [])
+
+    def test_iter_sections_yields_before_input_is_exhausted(self):
+        consumed = []
+
+        def lines():
+            for line in ["# Title\n", "para\n", "\n", "- item\n"]:
+                consumed.append(line)
+                yield line
+
+        sections = iter_sections(lines())
+        first = next(sections)
+        self.assertEqual(first.content, "Title")
+        self.assertEqual(len(consumed), 1)
+        rest = list(sections)
+        self.assertEqual(
+            [s.type for s in rest], [SectionType.PARAGRAPH, SectionType.LIST]
+        )
+
+    def test_iter_markdown_file_matches_parse_markdown_file(self):
+        with TemporaryDirectory() as td:
+            md_path = self._write_temp_md(td, "sample.md", MD_SAMPLE)
+            expected = parse_markdown_file(md_path).sections
+            self.assertEqual(list(iter_markdown_file(md_path)), expected)
+            self.assertEqual(list(iter_markdown_file(md_path, mode="bytes")), expected)
+
+    def test_iter_markdown_file_validates_eagerly(self):
+        with TemporaryDirectory() as td:
+            with self.assertRaises(FileNotFoundError):
+                iter_markdown_file(Path(td) / "missing.md")
+            md_path = self._write_temp_md(td, "sample.md", MD_SAMPLE)
+            with self.assertRaises(ValueError):
+                iter_markdown_file(md_path, mode="mmap")
+
+    def test_push_parser_matches_from_text(self):
+        parser = PushParser()
+        for char in MD_SAMPLE:
+            parser.feed(char)
+        parser.close()
+        self.assertEqual(list(parser.queue), from_text(MD_SAMPLE).sections)
+
+    def test_push_parser_callback_and_tail(self):
+        emitted = []
+        parser = PushParser(on_section=emitted.append)
+        parser.feed("# Title\nFirst li")
+        self.assertEqual([s.content for s in emitted], ["Title"])
+        self.assertEqual([s.content for s in parser.tail], ["First li"])
+        parser.feed("ne\nsecond line\n\n- it")
+        self.assertEqual(emitted[-1].content, "First line\nsecond line")
+        self.assertEqual(parser.tail[0].type, SectionType.LIST)
+        parser.close()
+        self.assertEqual(emitted[-1].content, "- it")
+        self.assertEqual(len(parser.queue), 0)
+        with self.assertRaises(ValueError):
+            parser.feed("more")
+
+    def test_split_points_skip_fenced_blank_lines(self):
+        text = "para\n\n```\ncode\n\nmore\n```\n\nTitle\n=====\n"
+        points = split_points(text, 10)
+        fence_start, fence_end = text.index("```"), text.rindex("```")
+        self.assertTrue(points)
+        for point in points:
+            self.assertEqual(text[point - 1], "\n")
+            self.assertFalse(fence_start < point <= fence_end)
+
+    def test_parallel_parse_matches_serial_parse(self):
+        text = MD_SAMPLE * 20
+        with TemporaryDirectory() as td:
+            md_path = self._write_temp_md(td, "sample.md", text)
+            expected = parse_markdown_file(md_path).sections
+            doc = parse_text_parallel(text, workers=2, min_chunk_size=64)
+            self.assertEqual(doc.sections, expected)
+            self.assertEqual(parse_markdown_file(md_path, workers=2).sections, expected)
+            with self.assertRaises(ValueError):
+                parse_markdown_file(md_path, mode="bytes", workers=2)
+
+    def test_apply_edit_matches_full_reparse(self):
+        doc = from_text(MD_SAMPLE, editable=True)
+        lines = MD_SAMPLE.splitlines(keepends=True)
+        edits = [
+            (2, 3, "Edited paragraph\n"),  # inside a paragraph
+            (13, 14, "code\n```\nafter\n"),  # closes the code block early
+            (0, 1, "Setext Title\n===\n"),  # header becomes a setext header
+            (5, 5, ""),  # empty insertion
+        ]
+        for start, end, new_text in edits:
+            doc.apply_edit(start, end, new_text)
+            lines[start:end] = new_text.splitlines(keepends=True)
+            self.assertEqual(doc.sections, from_text("".join(lines)).sections)
+
+    def test_apply_edit_reuses_sections_outside_window(self):
+        doc = from_text(MD_SAMPLE, editable=True)
+        before = list(doc.sections)
+        first, stop = doc.apply_edit(5, 6, "- item one, edited\n")
+        self.assertEqual((first, stop), (2, 3))
+        self.assertEqual(doc.sections[2].content, "- item one, edited\n- item two")
+        for i in (0, 1, 3, 4, 5, 6):
+            self.assertIs(doc.sections[i], before[i])
+
+    def test_apply_edit_requires_editable_document(self):
+        with self.assertRaises(ValueError):
+            from_text(MD_SAMPLE).apply_edit(0, 1, "# New\n")
+        doc = from_text(MD_SAMPLE, editable=True)
+        with self.assertRaises(ValueError):
+            doc.apply_edit(3, 1000, "")
+
+    def test_include_and_exclude_select_section_types(self):
+        full = from_text(MD_SAMPLE).sections
+        for types in ({SectionType.CODE}, {SectionType.HEADER, SectionType.LIST}):
+            expected = [s for s in full if s.type in types]
+            self.assertEqual(from_text(MD_SAMPLE, include=types).sections, expected)
+            excluded = set(SectionType) - types
+            self.assertEqual(from_text(MD_SAMPLE, exclude=excluded).sections, expected)
+        with TemporaryDirectory() as td:
+            md_path = self._write_temp_md(td, "sample.md", MD_SAMPLE)
+            for mode in ("text", "bytes", "mmap"):
+                with parse_markdown_file(
+                    md_path, mode=mode, exclude={SectionType.PARAGRAPH}
+                ) as doc:
+                    self.assertEqual(
+                        doc.sections,
+                        [s for s in full if s.type != SectionType.PARAGRAPH],
+                    )
+        with self.assertRaises(ValueError):
+            from_text(MD_SAMPLE, editable=True, include={SectionType.CODE})
+
+    def test_include_headers_keeps_setext_headers(self):
+        text = "Title\n=====\n\nplain paragraph\n\n```\n# not a header\n```\n"
+        doc = from_text(text, include={SectionType.HEADER})
+        self.assertEqual([(s.content, s.depth) for s in doc.sections], [("Title", 1)])
+        doc = from_text(text, exclude={SectionType.HEADER})
+        self.assertEqual(
+            [s.type for s in doc.sections], [SectionType.PARAGRAPH, SectionType.CODE]
+        )
+
+    def test_max_sections_stops_reading_early(self):
+        lines = MD_SAMPLE.splitlines(keepends=True)
+        read = []
+
+        def tracked():
+            for line in lines:
+                read.append(line)
+                yield line
+
+        full = from_text(MD_SAMPLE).sections
+        doc = parse_lines(tracked(), max_sections=2)
+        self.assertEqual(doc.sections, full[:2])
+        self.assertTrue(doc.truncated)
+        self.assertLess(len(read), len(lines))
+        doc = from_text(MD_SAMPLE, max_sections=len(full) + 1)
+        self.assertEqual(doc.sections, full)
+        self.assertFalse(doc.truncated)
+
+    def test_max_lines_and_stop_when(self):
+        lines = MD_SAMPLE.splitlines(keepends=True)
+        doc = from_text(MD_SAMPLE, max_lines=4)
+        self.assertEqual(doc.sections, from_text("".join(lines[:4])).sections)
+        self.assertTrue(doc.truncated)
+        self.assertFalse(from_text(MD_SAMPLE, max_lines=len(lines)).truncated)
+
+        full = from_text(MD_SAMPLE).sections
+        is_list = lambda s: s.type == SectionType.LIST  # noqa: E731
+        with TemporaryDirectory() as td:
+            md_path = self._write_temp_md(td, "sample.md", MD_SAMPLE)
+            for mode in ("text", "bytes", "mmap"):
+                with parse_markdown_file(md_path, mode=mode, stop_when=is_list) as doc:
+                    self.assertEqual(doc.sections, full[:3])
+                    self.assertTrue(doc.truncated)
+            with self.assertRaises(ValueError):
+                parse_markdown_file(md_path, workers=2, max_lines=10)
+        with self.assertRaises(ValueError):
+            from_text(MD_SAMPLE, max_sections=0)
+
+    def test_scan_headers_matches_parsed_headers(self):
+        text = (
+            MD_SAMPLE
+            + "- item\nTitle\nover two lines\n---\n\n~~~\n# fenced\nx\n===\n~~~\n"
+            + "\n===\nafter blank\n  ===  \n![img](a.png)\n---\n"
+        )
+        expected = from_text(text).headers()
+        self.assertEqual(
+            [(s.content, s.depth) for s in expected[-2:]],
+            [("Title\nover two lines", 2), ("===\nafter blank", 1)],
+        )
+        self.assertEqual(scan_headers(text), expected)
+        crlf = text.replace("\n", "\r\n")
+        self.assertEqual(scan_headers(crlf), from_text(crlf).headers())
+        with TemporaryDirectory() as td:
+            md_path = self._write_temp_md(td, "sample.md", text)
+            self.assertEqual(scan_headers(md_path), expected)
+
+    def test_columnar_document_matches_list_document(self):
+        expected = from_text(MD_SAMPLE)
+        doc = from_text(MD_SAMPLE, columnar=True)
+        self.assertIsInstance(doc.sections, SectionTable)
+        self.assertEqual(doc.sections, expected.sections)
+        self.assertEqual(doc.sections[-1], expected.sections[-1])
+        self.assertEqual(doc.headers(max_depth=1), expected.headers(max_depth=1))
+        self.assertEqual(doc.to_dict(), expected.to_dict())
+        with TemporaryDirectory() as td:
+            md_path = self._write_temp_md(td, "sample.md", MD_SAMPLE)
+            doc = parse_markdown_file(md_path, columnar=True)
+            self.assertEqual(doc.sections, expected.sections)
+            with self.assertRaises(ValueError):
+                parse_markdown_file(md_path, mode="bytes", columnar=True)
+        with self.assertRaises(ValueError):
+            from_text(MD_SAMPLE, editable=True, columnar=True)
+
+    def test_code_blocks_share_interned_meta(self):
+        doc = from_text("```python\na\n```\n\n```python\nb\n```\n")
+        first, second = doc.sections
+        self.assertIs(first.meta, second.meta)
+        self.assertEqual(doc.to_dict()["sections"][0]["meta"], {"lang": "python"})
+        self.assertIs(type(doc.to_dict()["sections"][0]["meta"]), dict)
+
+    def test_spans_locate_each_section_in_the_source(self):
+        doc = from_text(MD_SAMPLE, spans=True)
+        lines = MD_SAMPLE.splitlines(keepends=True)
+        self.assertEqual(len(doc.spans), len(doc.sections))
+        self.assertEqual(doc.spans[1], (2, 4, 9, 41))
+        for i in range(len(doc.sections)):
+            start_line, end_line, start, end = doc.spans[i]
+            self.assertEqual(MD_SAMPLE[start:end], "".join(lines[start_line:end_line]))
+        self.assertEqual(doc.spans.section_at_line(14), 4)
+        self.assertIsNone(doc.spans.section_at_line(1))
+        self.assertEqual(doc.spans.section_at_offset(MD_SAMPLE.index("> quote")), 3)
+        self.assertIsNone(from_text(MD_SAMPLE).spans)
+        columnar = from_text(MD_SAMPLE, spans=True, columnar=True)
+        self.assertEqual(columnar.spans, doc.spans)
+        limited = from_text(MD_SAMPLE, spans=True, max_sections=2)
+        self.assertEqual(list(limited.spans), list(doc.spans)[:2])
+
+    def test_spans_count_bytes_in_bytes_modes(self):
+        text = "# Café\r\n\r\nNaïve text\r\n"
+        with TemporaryDirectory() as td:
+            md_path = Path(td) / "crlf.md"
+            md_path.write_bytes(text.encode("utf-8"))
+            doc = parse_markdown_file(md_path, spans=True)
+            self.assertEqual(list(doc.spans), [(0, 1, 0, 7), (2, 3, 8, 19)])
+            for mode in ("bytes", "mmap"):
+                with parse_markdown_file(md_path, mode=mode, spans=True) as doc:
+                    self.assertEqual(list(doc.spans), [(0, 1, 0, 9), (2, 3, 11, 24)])
+            with self.assertRaises(ValueError):
+                parse_markdown_file(md_path, workers=2, spans=True)
+
+    def test_apply_edit_keeps_spans_up_to_date(self):
+        doc = from_text(MD_SAMPLE, editable=True)
+        lines = MD_SAMPLE.splitlines(keepends=True)
+        doc.apply_edit(5, 6, "- item one\n- item one and a half\n")
+        lines[5:6] = ["- item one\n", "- item one and a half\n"]
+        expected = from_text("".join(lines), spans=True)
+        self.assertEqual(doc.spans, expected.spans)
+        doc.add_section(doc.sections[0])
+        self.assertIsNone(doc.spans)
+
+    def test_apply_edit_sequence_keeps_spans_up_to_date(self):
+        text = MD_SAMPLE * 4
+        doc = from_text(text, editable=True)
+        lines = text.splitlines(keepends=True)
+        # Edits moving back and forth, so the shift left pending by one edit
+        # starts before, inside and after the next one
+        edits = [(30, 31, "# New title\n\n"), (5, 6, ""), (60, 60, "text\n")]
+        edits += [(40, 42, "- a\n- b\n- c\n"), (2, 3, "Paragraph\n"), (70, 71, "")]
+        for start, end, new_text in edits:
+            doc.apply_edit(start, end, new_text)
+            lines[start:end] = new_text.splitlines(keepends=True)
+        expected = from_text("".join(lines), spans=True)
+        self.assertEqual(doc.sections, expected.sections)
+        self.assertEqual(doc.spans, expected.spans)
+        doc.apply_edit(1, 1, "\n")
+        lines[1:1] = ["\n"]
+        self.assertEqual(doc.spans, from_text("".join(lines), spans=True).spans)
+
 
 if __name__ == "__main__":
     unittest.main()
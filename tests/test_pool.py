@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import unittest
+
+from mdslice import ContentPool, from_text
+
+
+class TestContentPool(unittest.TestCase):
+    def test_identical_contents_share_one_string(self):
+        pool = ContentPool()
+        readme = "# Project\n\n![badge](b.svg)\n\nReleased under the MIT license.\n"
+        first = from_text(readme, pool=pool)
+        second = from_text(readme.replace("Project", "Other"), pool=pool)
+        self.assertEqual(second.sections[0].content, "Other")
+        for a, b in zip(first.sections[1:], second.sections[1:]):
+            self.assertIs(a.content, b.content)
+        self.assertEqual((pool.hits, pool.misses), (2, 4))
+        self.assertAlmostEqual(pool.hit_rate, 1 / 3)
+
+    def test_least_recently_used_contents_are_evicted(self):
+        pool = ContentPool(max_entries=2)
+        a, b, c = (pool.intern(text) for text in ("a" * 3, "b" * 3, "c" * 3))
+        self.assertEqual((len(pool), pool.evictions), (2, 1))
+        self.assertIsNot(pool.intern("".join(["a"] * 3)), a)
+        self.assertIs(pool.intern("".join(["c"] * 3)), c)
+
+        pool = ContentPool(max_chars=5)
+        pool.intern("abc")
+        pool.intern("de")
+        pool.intern("fgh")
+        self.assertEqual((len(pool), pool.size, pool.evictions), (2, 5, 1))
+        pool.clear()
+        self.assertEqual((len(pool), pool.hits, pool.hit_rate), (0, 0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import unittest
+
+from mdslice import SectionType, compile_selector, from_text
+
+_TEXT = """Intro
+
+# Install
+
+Some text
+
+```python
+pip install mdslice
+```
+
+## From source
+
+| step | command |
+|------|---------|
+| 1    | make    |
+
+```bash
+make install
+```
+
+## Usage
+
+```python
+import mdslice
+```
+
+# Changelog
+
+| version |
+|---------|
+"""
+
+
+class TestSelectors(unittest.TestCase):
+    def setUp(self):
+        self.doc = from_text(_TEXT)
+
+    def contents(self, selector):
+        return [s.content.splitlines()[0] for s in self.doc.select(selector)]
+
+    def test_types_and_depth_ranges(self):
+        self.assertEqual(
+            self.contents("h1..h2"),
+            ["Install", "From source", "Usage", "Changelog"],
+        )
+        self.assertEqual(self.contents("h2"), ["From source", "Usage"])
+        self.assertEqual(
+            self.contents("p, h1"), ["Intro", "Install", "Some text", "Changelog"]
+        )
+        self.assertEqual(self.contents("code[lang=bash]"), ["```bash"])
+        self.assertEqual(len(self.doc.select("*")), len(self.doc.sections))
+
+    def test_combinators_follow_the_outline(self):
+        (code,) = self.doc.select("h2 > code[lang=python]")
+        self.assertIn("import mdslice", code.content)
+        self.assertEqual(self.contents("h1 > code"), ["```python"])
+        self.assertEqual(len(self.doc.select("h1 code")), 3)
+        self.assertEqual(self.contents("h1 > h2"), ["From source", "Usage"])
+        self.assertEqual(
+            self.contents('table:under("Install")'), ["| step | command |"]
+        )
+        self.assertEqual(self.contents("table:under('Usage')"), [])
+
+    def test_compiled_selectors_are_cached_and_reusable(self):
+        selector = compile_selector("h2 > code")
+        self.assertIs(compile_selector("h2 > code"), selector)
+        other = from_text("## Only\n\n```\ncode\n```\n")
+        self.assertEqual(selector.positions(other), [1])
+        self.assertEqual(selector.select(self.doc), self.doc.select("h2 > code"))
+        self.assertEqual(other[1].type, SectionType.CODE)
+
+    def test_type_names_are_case_insensitive(self):
+        for upper, lower in (("H2", "h2"), ("H1..H2", "h1..h2"), ("Code", "code")):
+            with self.subTest(selector=upper):
+                self.assertEqual(self.contents(upper), self.contents(lower))
+        self.assertEqual(self.contents("P, TABLE"), self.contents("p, table"))
+
+    def test_invalid_selectors_raise_value_error(self):
+        invalid = ("", "h2 >", "> p", "para", "h3..h1", "p:first(1)", "code[")
+        for text in invalid + ("none", "NONE", "h2 > none"):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                compile_selector(text)
+
+
+if __name__ == "__main__":
+    unittest.main()